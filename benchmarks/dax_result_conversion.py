@@ -0,0 +1,66 @@
+r'''
+Benchmark of the executeQueries result conversion to pandas.
+Compares the former row by row conversion with the columnar one in simplepbi.utils
+over a synthetic 100,000 rows response. The former conversion dropped the
+last row (range(rows-1)); here it keeps every row so both sides build the
+same number of rows. The columnar conversion is only about 1.4x-1.6x faster;
+most of the time goes to json.loads, and it also types dates and booleans.
+
+Run from the repository root:
+    python benchmarks/dax_result_conversion.py
+'''
+
+import os
+import sys
+import json
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simplepbi import utils
+
+ROWS = 100000
+
+def build_response(rows):
+    base = datetime(2024, 1, 1)
+    data = [{
+        "Sales[OrderId]": n,
+        "Sales[Customer]": "Customer {}".format(n % 977),
+        "Sales[OrderDate]": (base + timedelta(minutes=n)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "Sales[IsOnline]": n % 3 == 0,
+        "[Amount]": None if n % 50 == 0 else n * 1.25,
+        "[Quantity]": n % 17
+    } for n in range(rows)]
+    body = {"results": [{"tables": [{"rows": data}]}]}
+    return ("\ufeff" + json.dumps(body)).encode("utf-8")
+
+def row_by_row(content):
+    encoded_data = json.loads(content.decode("utf-8").encode().decode('utf-8-sig'))
+    tabla_columnas = list(encoded_data['results'][0]['tables'][0]['rows'][0].keys())
+    columnas = [columnita.split("[")[1].split("]")[0] for columnita in tabla_columnas]
+    rows = len(encoded_data['results'][0]['tables'][0]['rows'])
+    datos = [list(encoded_data['results'][0]['tables'][0]['rows'][n].values()) for n in range(rows)]
+    return pd.DataFrame(data=datos, columns=columnas)
+
+def columnar(content):
+    return utils.dax_result_to_pandas(utils.parse_dax_response(content))
+
+def timeit(func, content, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = func(content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, df
+
+if __name__ == '__main__':
+    content = build_response(ROWS)
+    print("Response size: {:.1f} MB".format(len(content) / 1024 / 1024))
+    old_time, old_df = timeit(row_by_row, content)
+    new_time, new_df = timeit(columnar, content)
+    print("Row by row: {:.3f}s rows={} dtypes={}".format(old_time, len(old_df), dict(old_df.dtypes.astype(str))))
+    print("Columnar:   {:.3f}s rows={} dtypes={}".format(new_time, len(new_df), dict(new_df.dtypes.astype(str))))
+    print("Speedup: {:.2f}x".format(old_time / new_time))
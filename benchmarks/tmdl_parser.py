@@ -0,0 +1,163 @@
+r'''
+Benchmark of the TMDL parsing over a synthetic model of 1,000 tables.
+Compares the former line by line parser and partitions regex with the
+single pass parser in simplepbi.utils.
+
+On unquoted table names (the happy path) the single pass parser is still
+slightly slower than the old regexes: about 1.2x-1.4x on columns and measures
+and about 1.5x-2x on partitions, because every line is still read and
+checked for its indentation while the regexes jump over whole blocks. Building the full object model with
+parse_tmdl costs about 2.5x the columns and measures regexes. On quoted table
+names ('Sales Table') the regex backtracks and grows quadratically (3.2s/12.0s/
+43.8s at 100/200/400 tables against 0.02s/0.03s/0.04s for the parser) and
+still finds none of the partitions.
+
+Run from the repository root:
+    python benchmarks/tmdl_parser.py
+'''
+
+import os
+import re
+import sys
+import time
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from simplepbi import utils
+
+TABLES = 1000
+QUOTED_TABLES = [100, 200, 400]
+COLUMNS = 20
+MEASURES = 10
+
+def build_table(n, quoted=False):
+    name = "'Sales Table{}'".format(n) if quoted else "Table{}".format(n)
+    lines = ["table {}".format(name), "\tlineageTag: table-{}".format(n), ""]
+    for c in range(COLUMNS):
+        lines += [
+            "\tcolumn 'Column {}'".format(c),
+            "\t\tdataType: int64",
+            "\t\tformatString: 0",
+            "\t\tlineageTag: column-{}-{}".format(n, c),
+            "\t\tsummarizeBy: sum",
+            "\t\tsourceColumn: Column {}".format(c),
+            "",
+            "\t\tannotation SummarizationSetBy = Automatic",
+            ""
+        ]
+    for m in range(MEASURES):
+        lines += [
+            "\tmeasure 'Measure {}' =".format(m),
+            "\t\t\tVAR total = SUM(Table{}[Column {}])".format(n, m),
+            "\t\t\tRETURN DIVIDE(total, COUNTROWS(Table{}))".format(n),
+            "\t\tformatString: 0.00",
+            "\t\tlineageTag: measure-{}-{}".format(n, m),
+            ""
+        ]
+    lines += [
+        "\tpartition {} = m".format("'Sales Table{}-partition'".format(n) if quoted else "Table{}-partition".format(n)),
+        "\t\tmode: import",
+        "\t\tsource =",
+        "\t\t\t\tlet",
+        "\t\t\t\t    Source = Sql.Database(\"server\", \"database\"),",
+        "\t\t\t\t    Data = Source{{[Schema=\"dbo\", Item=\"Table{}\"]}}[Data]".format(n),
+        "\t\t\t\tin",
+        "\t\t\t\t    Data",
+        "",
+        "\tannotation PBI_ResultType = Table",
+        ""
+    ]
+    return "\n".join(lines)
+
+def legacy_structure(table_definition):
+    current_table = None
+    records = []
+    lines = table_definition.splitlines()
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        table_match = re.match(r'^table\s+(.+)', line)
+        if table_match:
+            current_table = table_match.group(1).strip()
+            i += 1
+            continue
+        measure_match = re.match(r"^measure\s+'?([^']+)'?\s*=\s*(.*)", line)
+        if measure_match:
+            measure_name = measure_match.group(1).strip()
+            dax_expr = measure_match.group(2).strip()
+            if dax_expr.startswith("```"):
+                dax_lines = []
+                i += 1
+                while i < len(lines):
+                    next_line = lines[i].strip()
+                    if next_line == "```":
+                        break
+                    dax_lines.append(next_line)
+                    i += 1
+                dax_expr = "\n".join(dax_lines)
+                i += 1
+            else:
+                while i + 1 < len(lines):
+                    peek = lines[i + 1].strip()
+                    if peek.startswith(("formatString", "lineageTag", "annotation", "measure", "column", "table")):
+                        break
+                    i += 1
+                    dax_expr += " " + lines[i].strip()
+            records.append({'table': current_table, 'name': measure_name, 'type': 'measure', 'data_type': None, 'expression': dax_expr})
+            i += 1
+            continue
+        column_match = re.match(r"^column\s+'?([^'=]+?)'?(?:\s*=\s*(.+))?$", line)
+        if column_match:
+            col_name = column_match.group(1).strip()
+            expression = column_match.group(2).strip() if column_match.group(2) else None
+            data_type = None
+            i += 1
+            while i < len(lines):
+                next_line = lines[i].strip()
+                if next_line.startswith("dataType:"):
+                    data_type = next_line.replace("dataType:", "").strip()
+                elif next_line.startswith(("column", "measure", "partition", "table")):
+                    break
+                i += 1
+            records.append({'table': current_table, 'name': col_name, 'type': 'column', 'data_type': data_type, 'expression': expression})
+            continue
+        i += 1
+    return pd.DataFrame(records)
+
+def legacy_partitions(decoded_str):
+    return re.findall(
+        r'table\s+([^\s]+)(.*?)partition\s+\1-[\w-]+.*?=\s*m\s+.*?source\s*=\s*(let\s+.*?in\s+.*?)(?=\n\t*annotation|\n\s*$)',
+        decoded_str,
+        flags=re.DOTALL,
+    )
+
+def timeit(func, text, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+if __name__ == '__main__':
+    text = "\n".join(build_table(n) for n in range(TABLES))
+    print("Model size: {:.1f} MB, {} tables".format(len(text) / 1024 / 1024, TABLES))
+    old_time, old_df = timeit(legacy_structure, text)
+    new_time, new_df = timeit(utils.parse_tmdl_structure, text)
+    print("Columns and measures, line by line: {:.3f}s rows={}".format(old_time, len(old_df)))
+    print("Columns and measures, single pass:  {:.3f}s rows={}".format(new_time, len(new_df)))
+    old_time, old_parts = timeit(legacy_partitions, text)
+    new_time, new_parts = timeit(utils.parse_tmdl_partitions, text)
+    print("Partitions, regex:                   {:.3f}s partitions={}".format(old_time, len(old_parts)))
+    print("Partitions, single pass:             {:.3f}s partitions={}".format(new_time, len(new_parts)))
+    new_time, model = timeit(utils.parse_tmdl, text)
+    partitions = sum(len(t.get("partitions", [])) for t in model["model"]["tables"])
+    print("Full object model, single pass:      {:.3f}s partitions={}".format(new_time, partitions))
+    for tables in QUOTED_TABLES:
+        text = "\n".join(build_table(n, quoted=True) for n in range(tables))
+        old_time, old_parts = timeit(legacy_partitions, text, repeat=1)
+        new_time, new_df = timeit(utils.parse_tmdl_partitions, text)
+        print("Quoted names, {} tables, regex:       {:.3f}s partitions={}".format(tables, old_time, len(old_parts)))
+        print("Quoted names, {} tables, single pass: {:.3f}s partitions={}".format(tables, new_time, len(new_df)))
@@ -149,6 +149,67 @@ class Capacities():
         except requests.exceptions.RequestException as e:
             print("Request exception: ", e)
             
+    def get_all_refreshables(self, capacity_id=None, expand="capacity,group", filter=None, return_pandas=False):
+        """Returns all the refreshables the user has access to, or the ones of a single capacity, paging through the results 5000 at a time.
+        ### Parameters
+        ----
+        capacity_id: str uuid
+            Optional. The Power Bi capacity id. If it's not specified it returns the refreshables of all the capacities the user has access to.
+        expand: string
+            Expands related entities inline. By default "capacity,group" to get capacity and workspace of each refreshable.
+        filter: string
+            Filters the results based on a boolean condition
+        return_pandas: bool
+            Flag to specify if you want to return a dict response or a typed pandas dataframe of refreshables.
+        ### Returns
+        ----
+        If return_pandas = True returns a typed Pandas dataframe otherwise it returns a dict with all the refreshables in "value"
+        """
+        top = 5000
+        skip = 0
+        list_total = []
+        try:
+            while True:
+                if capacity_id != None:
+                    res = self.get_refreshables_capacity(capacity_id, top, expand=expand, filter=filter, skip=skip)
+                else:
+                    res = self.get_refreshables(top, expand=expand, filter=filter, skip=skip)
+                if res is None:
+                    raise Exception("Refreshables page starting at {} could not be requested.".format(skip))
+                page = res.get("value", [])
+                list_total.extend(page)
+                if len(page) < top:
+                    break
+                skip = skip + top
+            if return_pandas:
+                return utils.refreshables_to_pandas(list_total)
+            return {"value": list_total}
+        except Exception as e:
+            print("Error while getting refreshables: ", e)
+
+    def get_refreshables_analytics(self, capacity_id=None, filter=None, slot_minutes=30):
+        """Builds refresh contention analytics by capacity from all the refreshables the user has access to or a single capacity.
+        It computes overlapping scheduled refreshes per time slot of the week, average and max durations and failure rates.
+        ### Parameters
+        ----
+        capacity_id: str uuid
+            Optional. The Power Bi capacity id. If it's not specified it analyzes all the capacities the user has access to.
+        filter: string
+            Filters the refreshables based on a boolean condition
+        slot_minutes: int
+            The size of the time slot in minutes used to measure overlapping refreshes. By default 30.
+        ### Returns
+        ----
+        Dict:
+            A dictionary with three pandas dataframes: "refreshables" (one row per refreshable), "time_slots" (concurrent refreshes per capacity and slot) and "capacities" (stats per capacity).
+        """
+        df = self.get_all_refreshables(capacity_id=capacity_id, expand="capacity,group", filter=filter, return_pandas=True)
+        if df is None:
+            return None
+        slots = utils.get_refreshables_time_slots(df, slot_minutes=slot_minutes)
+        stats = utils.get_refreshables_capacity_stats(df, slots)
+        return {"refreshables": df, "time_slots": slots, "capacities": stats}
+
     def get_workload(self, capacity_id, workloadName):
         """Returns the current state of a workload. If the workload is enabled, the percentage of maximum memory that the workload can consume is also returned.
         Workload APIs aren't relevant for Embedded Gen2 capacities.
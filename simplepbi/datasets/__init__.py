@@ -19,9 +19,20 @@ r'''.
 import json
 import requests
 from simplepbi import utils
+from simplepbi import groups
+from simplepbi import dataflows
 from simplepbi.fabric import semanticmodels
 import pandas as pd
 import math
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import hashlib
+import time
+import os
+import shutil
+import collections
+import base64
 
 class Datasets():
     """Simple library to use the Power BI api and obtain datasets from it.
@@ -348,6 +359,31 @@ class Datasets():
         except requests.exceptions.RequestException as e:
             print("Request exception: ", e)
             
+    def get_refresh_execution_details_in_group(self, workspace_id, dataset_id, refresh_id):
+        """Returns execution details of an enhanced refresh operation for the specified dataset from the specified workspace.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL
+        refresh_id: str uuid
+            The refresh id. It's the last part of the Location header of the refresh response. Use utils.get_refresh_id(res)
+        ### Returns
+        ----
+        Dict:
+            A dictionary containing status, times, objects and messages of the refresh.
+        """
+        try:
+            url = "https://api.powerbi.com/v1.0/myorg/groups/{}/datasets/{}/refreshes/{}".format(workspace_id, dataset_id, refresh_id)
+            res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
+            res.raise_for_status()
+            return res.json()
+        except requests.exceptions.HTTPError as ex:
+            print("HTTP Error: ", ex, "\nText: ", ex.response.text)
+        except requests.exceptions.RequestException as e:
+            print("Request exception: ", e)
+            
     def get_refresh_schedule(self, dataset_id):
         """Returns the refresh schedule for the specified dataset from My workspace.
         ### Parameters
@@ -438,6 +474,7 @@ class Datasets():
         ### Returns
         ----
         Response object from requests library. 202 OK
+        The refresh id to track the operation can be taken with utils.get_refresh_id(res)
         
         """
         try: 
@@ -571,7 +608,7 @@ class Datasets():
         except requests.exceptions.RequestException as e:
             print("Request exception: ", e)
             
-    def execute_queries(self, dataset_id, query, return_pandas=False):
+    def execute_queries(self, dataset_id, query, return_pandas=False, return_arrow=False):
         """Executes Data Analysis Expressions (DAX) queries against the provided dataset. The dataset must reside in My workspace or another new workspace experience workspace.
         DAX query errors will result in: A response error, such as DAX query failure. A failure HTTP status code (400).
         Limitation: A query that requests more than one table, or more than 100,000 table rows, will result in Error.
@@ -582,10 +619,12 @@ class Datasets():
         query: str
             DAX query returning a Table. Starts with EVALUATE
         return_pandas: bool
-            Flag to specify if you want to return a dict response or a pandas dataframe of events.
+            Flag to specify if you want to return a dict response or a typed pandas dataframe of the result.
+        return_arrow: bool
+            Flag to return a pyarrow Table of the result. It requires the pyarrow package.
         ### Returns
         ----
-        If return_pandas = True returns a Pandas dataframe concatenating iterations otherwise it returns a dict of the response
+        If return_pandas = True returns a typed Pandas dataframe, if return_arrow = True a pyarrow Table, otherwise it returns a dict of the response
         Response object from requests library. 200 OK
         
         """
@@ -594,23 +633,12 @@ class Datasets():
             body = {"queries": [{"query": query}], "serializerSettings": {"includeNulls": "true"}}
             headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)}
             res = requests.post(url, data = json.dumps(body), headers = headers)      
-            #Encode text in json to avoid Unexpected UTF-8 BOM (decode using utf-8-sig)
-            encoded_data = json.loads(res.text.encode().decode('utf-8-sig'))
+            #Parse the body once, utf-8-sig avoids Unexpected UTF-8 BOM
+            encoded_data = utils.parse_dax_response(res.content)
             if return_pandas:
-                #get columns from json response - keys from dict
-                tabla_columnas = list(encoded_data['results'][0]['tables'][0]['rows'][0].keys())
-                columnas = [columnita.split("[")[1].split("]")[0] for columnita in tabla_columnas]
-                print(columnas)
-                #get the number of rows to loop data
-                rows = len(encoded_data['results'][0]['tables'][0]['rows'])        
-                print(rows)
-                #get data from json response - values from dict
-                datos = [list(encoded_data['results'][0]['tables'][0]['rows'][n].values()) for n in range(rows-1)]
-                print("datos")
-                #build a dataframe from the collected data
-                df = pd.DataFrame(data=datos, columns=columnas)
-                print(df.head())
-                return df
+                return utils.dax_result_to_pandas(encoded_data)
+            elif return_arrow:
+                return utils.dax_result_to_arrow(encoded_data)
             else:
                 return encoded_data
         except requests.exceptions.HTTPError as ex:
@@ -618,7 +646,7 @@ class Datasets():
         except Exception as e:
             print("ERROR ", e)
             
-    def execute_queries_in_group(self, workspace_id, dataset_id, query, return_pandas=False, impersonatedUserName=None):
+    def execute_queries_in_group(self, workspace_id, dataset_id, query, return_pandas=False, impersonatedUserName=None, return_arrow=False):
         """Executes Data Analysis Expressions (DAX) queries against the provided dataset. The dataset must reside in My workspace or another new workspace experience workspace.
         DAX query errors will result in: A response error, such as DAX query failure. A failure HTTP status code (400).
         Limitation: A query that requests more than one table, or more than 100,000 table rows, will result in Error.
@@ -629,7 +657,9 @@ class Datasets():
         dataset_id: str uuid
             The Power Bi Dataset id. You can take it from PBI Service URL        
         return_pandas: bool
-            Flag to specify if you want to return a dict response or a pandas dataframe of events.
+            Flag to specify if you want to return a dict response or a typed pandas dataframe of the result.
+        return_arrow: bool
+            Flag to return a pyarrow Table of the result. It requires the pyarrow package.
         ### Body
         ----
         query: str
@@ -638,7 +668,7 @@ class Datasets():
             The UPN of a user to be impersonated. If the model is not RLS enabled, this will be ignored. E.g. "someuser@mycompany.com"
         ### Returns
         ----
-        If return_pandas = True returns a Pandas dataframe concatenating iterations otherwise it returns a dict of the response
+        If return_pandas = True returns a typed Pandas dataframe, if return_arrow = True a pyarrow Table, otherwise it returns a dict of the response
         Response object from requests library. 200 OK
         
         """
@@ -650,23 +680,12 @@ class Datasets():
             headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)}
             res = requests.post(url, data = json.dumps(body), headers = headers)      
             res.raise_for_status()
-            #Encode text in json to avoid Unexpected UTF-8 BOM (decode using utf-8-sig)
-            encoded_data = json.loads(res.text.encode().decode('utf-8-sig'))
+            #Parse the body once, utf-8-sig avoids Unexpected UTF-8 BOM
+            encoded_data = utils.parse_dax_response(res.content)
             if return_pandas:
-                #get columns from json response - keys from dict
-                tabla_columnas = list(encoded_data['results'][0]['tables'][0]['rows'][0].keys())
-                columnas = [columnita.split("[")[1].split("]")[0] for columnita in tabla_columnas]
-                print(columnas)
-                #get the number of rows to loop data
-                rows = len(encoded_data['results'][0]['tables'][0]['rows'])        
-                print(rows)
-                #get data from json response - values from dict
-                datos = [list(encoded_data['results'][0]['tables'][0]['rows'][n].values()) for n in range(rows-1)]
-                print("datos")
-                #build a dataframe from the collected data
-                df = pd.DataFrame(data=datos, columns=columnas)
-                print(df.head())
-                return df
+                return utils.dax_result_to_pandas(encoded_data)
+            elif return_arrow:
+                return utils.dax_result_to_arrow(encoded_data)
             else:
                 return encoded_data
         except requests.exceptions.HTTPError as ex:
@@ -674,6 +693,172 @@ class Datasets():
         except Exception as e:
             print("ERROR ", e)
             
+    def run_dax_query_in_group(self, workspace_id, dataset_id, query, impersonatedUserName=None, return_arrow=False):
+        """Executes a DAX query like execute_queries_in_group but raising errors instead of printing them.
+        Throttled requests (429) are retried after the Retry-After header. It's the building block of bulk and windowed queries.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL    
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL        
+        query: str
+            DAX query returning a Table. Starts with EVALUATE
+        impersonatedUserName: str
+            The UPN of a user to be impersonated. If the model is not RLS enabled, this will be ignored. E.g. "someuser@mycompany.com"
+        return_arrow: bool
+            Flag to return a pyarrow Table of the result instead of a pandas dataframe. It requires the pyarrow package.
+        ### Returns
+        ----
+        A typed Pandas dataframe of the result or a pyarrow Table if return_arrow = True.
+        It raises requests.exceptions.HTTPError or an Exception with the DAX error when the query fails.
+        """
+        url= "https://api.powerbi.com/v1.0/myorg/groups/{}/datasets/{}/executeQueries".format(workspace_id, dataset_id)
+        body = {"queries": [{"query": query}], "serializerSettings": {"includeNulls": "true"}}
+        if impersonatedUserName != None:
+            body["impersonatedUserName"]=impersonatedUserName
+        headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)}
+        res = utils.request_with_retry("POST", url, data = json.dumps(body), headers = headers)
+        encoded_data = utils.parse_dax_response(res.content)
+        if return_arrow:
+            return utils.dax_result_to_arrow(encoded_data)
+        return utils.dax_result_to_pandas(encoded_data)
+
+    def execute_queries_windowed_in_group(self, workspace_id, dataset_id, table_expression, order_by, mode="topnskip", window_size=100000, max_workers=4, impersonatedUserName=None, output_path=None):
+        """Extracts a DAX table bigger than the executeQueries limits (100,000 rows or 1,000,000 values) splitting it in ordered windows.
+        The window size is adjusted to the number of columns so every window stays under both limits.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL    
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL        
+        table_expression: str
+            DAX table expression with or without EVALUATE. E.g. 'Sales' or FILTER('Sales', 'Sales'[Year] = 2024). DEFINE blocks are not supported.
+        order_by: str
+            Column reference to order the windows. It should be unique to get stable windows. E.g. 'Sales'[OrderLineId]
+        mode: str
+            "topnskip" runs TOPNSKIP windows concurrently. "keyset" runs TOPN windows filtering order_by greater than the last key, one after another. By default "topnskip".
+        window_size: int
+            Maximum rows per window. By default 100000.
+        max_workers: int
+            Maximum number of windows queried at the same time in "topnskip" mode. By default 4.
+        impersonatedUserName: str
+            The UPN of a user to be impersonated. If the model is not RLS enabled, this will be ignored. E.g. "someuser@mycompany.com"
+        output_path: str
+            Optional. Path of a parquet file where windows are written as they arrive instead of keeping them in memory. It requires the pyarrow package.
+        ### Returns
+        ----
+        A Pandas dataframe with all the rows or the output_path when it's specified.
+        """
+        expression = re.sub(r'^\s*EVALUATE\s+', '', table_expression, flags=re.IGNORECASE).strip()
+        if re.match(r'^DEFINE\b', expression, flags=re.IGNORECASE):
+            raise Exception("DEFINE blocks are not supported. Use a table expression like 'Sales' or FILTER('Sales', ...)")
+        if mode not in ("topnskip", "keyset"):
+            raise ValueError("mode must be topnskip or keyset")
+        if output_path != None:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("pyarrow is required to write parquet files. Install it with: pip install pyarrow")
+
+        def run(query):
+            return self.run_dax_query_in_group(workspace_id, dataset_id, query, impersonatedUserName)
+
+        def keyset_windows(window):
+            key = utils.dax_column_name(order_by)
+            last = None
+            while True:
+                source = expression if last is None else "FILTER({}, {} > {})".format(expression, order_by, utils.dax_literal(last))
+                df = run("EVALUATE TOPN({}, {}, {}, ASC) ORDER BY {}".format(window, source, order_by, order_by))
+                if df.empty:
+                    break
+                yield df
+                if len(df) < window:
+                    break
+                last = df[key if key in df.columns else order_by].iloc[-1]
+
+        count = run('EVALUATE ROW("Rows", COUNTROWS({}))'.format(expression)).iloc[0, 0]
+        total = int(count) if pd.notna(count) else 0
+        sample = run("EVALUATE TOPN(1, {})".format(expression))
+        window = max(1, min(window_size, 100000, 1000000 // max(len(sample.columns), 1)))
+        print("Extracting {} rows of {} columns in windows of {} rows".format(total, len(sample.columns), window))
+        if total == 0:
+            windows = iter([])
+        elif mode == "topnskip":
+            queries = ["EVALUATE TOPNSKIP({}, {}, {}, {}, ASC) ORDER BY {}".format(window, skip, expression, order_by, order_by) for skip in range(0, total, window)]
+            windows = utils.imap_ordered(run, queries, max_workers=max_workers)
+        else:
+            windows = keyset_windows(window)
+
+        frames = []
+        writer = None
+        rows = 0
+        try:
+            for df in windows:
+                rows = rows + len(df)
+                if output_path != None:
+                    if writer is None:
+                        table = pa.Table.from_pandas(df, preserve_index=False)
+                        writer = pq.ParquetWriter(output_path, table.schema)
+                    else:
+                        table = pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False)
+                    writer.write_table(table)
+                else:
+                    frames.append(df)
+        finally:
+            if writer is not None:
+                writer.close()
+        print("Extracted {} rows".format(rows))
+        if output_path != None:
+            return output_path
+        return pd.concat(frames, ignore_index=True) if frames else sample.iloc[0:0]
+
+    def execute_queries_fan_out(self, queries, max_workers=8, calls_per_minute=120):
+        """Executes DAX queries against many datasets concurrently and unions the results in a single dataframe.
+        Requests are kept under the executeQueries limit of 120 queries per minute per user.
+        ### Parameters
+        ----
+        queries: list
+            List of tuples (workspace_id, dataset_id, query, impersonatedUserName). impersonatedUserName is optional.
+            E.g. [("xxx-workspace", "yyy-dataset", "EVALUATE 'KPI'"), ("xxx-workspace", "zzz-dataset", "EVALUATE 'KPI'", "someuser@mycompany.com")]
+        max_workers: int
+            Maximum number of queries running at the same time. By default 8.
+        calls_per_minute: int
+            Maximum number of queries sent per minute. By default 120.
+        ### Returns
+        ----
+        Dict:
+            A dictionary with "data", a pandas dataframe of every result tagged with workspaceId, datasetId and impersonatedUserName columns,
+            and "errors", a pandas dataframe with the workspaceId, datasetId, impersonatedUserName and error of each failed query.
+        """
+        limiter = utils.RateLimiter(calls_per_minute, 60)
+
+        def run(item):
+            workspace_id, dataset_id, query = item[0], item[1], item[2]
+            user = item[3] if len(item) > 3 else None
+            limiter.acquire()
+            return self.run_dax_query_in_group(workspace_id, dataset_id, query, user)
+
+        frames = []
+        errors = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run, item): item for item in queries}
+            for future in as_completed(futures):
+                item = futures[future]
+                source = {"workspaceId": item[0], "datasetId": item[1], "impersonatedUserName": item[3] if len(item) > 3 else None}
+                try:
+                    df = future.result()
+                    frames.append(df.assign(**source)[list(source.keys()) + list(df.columns)])
+                except requests.exceptions.HTTPError as ex:
+                    errors.append(dict(source, error="{} {}".format(ex, ex.response.text)))
+                except Exception as e:
+                    errors.append(dict(source, error=str(e)))
+        print("Queries completed: {} succeeded, {} failed".format(len(frames), len(errors)))
+        data = pd.concat(frames, ignore_index=True, sort=False) if frames else pd.DataFrame()
+        return {"data": data, "errors": pd.DataFrame(errors, columns=["workspaceId", "datasetId", "impersonatedUserName", "error"])}
+
     def update_parameters(self, dataset_id, updateDetails):
         """Updates the parameters values for the specified dataset from My workspace.
         If you're using enhanced dataset metadata, refresh the dataset to apply the new parameter values.
@@ -1148,6 +1333,7 @@ class Datasets():
         ### Returns
         ----
         Response object from requests library. 202 OK
+        The refresh id to track the operation can be taken with utils.get_refresh_id(res)
         
         """
         try: 
@@ -2830,4 +3016,1160 @@ class Datasets():
                 else:   
                     return fina_html
             except Exception as ex:            
-                print("Error: ", ex, "\nThe is an error reading tables from the semantic model. Make sure you have checked the API limitations of the request at the description of the method." , "\nThere was an error generating the file. Please consider this is a preview feature. If you are not running a limitation, help us sending feedback on the specific dataset description you couldn't generate at https://www.ladataweb.com.ar/contacto.html")
\ No newline at end of file
+                print("Error: ", ex, "\nThe is an error reading tables from the semantic model. Make sure you have checked the API limitations of the request at the description of the method." , "\nThere was an error generating the file. Please consider this is a preview feature. If you are not running a limitation, help us sending feedback on the specific dataset description you couldn't generate at https://www.ladataweb.com.ar/contacto.html")
+
+class DatasetQueryCache():
+    """Disk cache of DAX query results that is invalidated when the dataset completes a new refresh.
+    """
+
+    def __init__(self, token, cache_dir, check_interval=300):
+        """Create a simplePBI query cache. Results are stored as parquet files, it requires the pyarrow package.
+        Args:
+            token: String
+                Bearer Token to use the Power Bi Rest API
+            cache_dir: String
+                Local folder to store the cached results. Like C:/Users/user/PbiCache
+            check_interval: int
+                Seconds between checks of the refresh history of a dataset. By default 300.
+        """
+        self.token = token
+        self.cache_dir = cache_dir
+        self.check_interval = check_interval
+        self.datasets = Datasets(token)
+        self.refreshes = {}
+        self.lock = threading.Lock()
+
+    def get_last_refresh_in_group(self, workspace_id, dataset_id):
+        """Returns the end time of the last completed refresh of the dataset. The refresh history is requested once every check_interval seconds.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL
+        ### Returns
+        ----
+        str:
+            The endTime of the last completed refresh or None if the dataset wasn't refreshed.
+        """
+        with self.lock:
+            known = self.refreshes.get(dataset_id)
+            if known != None and time.monotonic() - known["checked"] < self.check_interval:
+                return known["endTime"]
+        history = self.datasets.get_refresh_history_in_group(workspace_id, dataset_id, top=1)
+        end_time = known["endTime"] if known != None else None
+        if history is None:
+            print("Refresh history of dataset {} is not available, using the last known refresh.".format(dataset_id))
+        elif history.get("value"):
+            last = history["value"][0]
+            # A refresh in progress didn't change the data yet
+            if last.get("status") == "Completed":
+                end_time = last.get("endTime")
+        with self.lock:
+            self.refreshes[dataset_id] = {"checked": time.monotonic(), "endTime": end_time}
+        return end_time
+
+    def get_cache_key(self, dataset_id, query, impersonatedUserName=None):
+        """Returns the cache key of a query. Queries that only differ in whitespace or comments share the key.
+        ### Parameters
+        ----
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL
+        query: str
+            DAX query returning a Table. Starts with EVALUATE
+        impersonatedUserName: str
+            The UPN of the impersonated user.
+        ### Returns
+        ----
+        str:
+            A sha256 hex digest.
+        """
+        text = "\n".join([dataset_id, utils.normalize_dax_query(query), impersonatedUserName or ""])
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def execute_queries_in_group(self, workspace_id, dataset_id, query, impersonatedUserName=None):
+        """Executes a DAX query returning the cached result when the dataset wasn't refreshed since it was stored.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL
+        query: str
+            DAX query returning a Table. Starts with EVALUATE
+        impersonatedUserName: str
+            The UPN of a user to be impersonated. If the model is not RLS enabled, this will be ignored. E.g. "someuser@mycompany.com"
+        ### Returns
+        ----
+        A typed Pandas dataframe of the result. It raises the errors of the query.
+        """
+        key = self.get_cache_key(dataset_id, query, impersonatedUserName)
+        folder = os.path.join(self.cache_dir, dataset_id)
+        data_path = os.path.join(folder, key + ".parquet")
+        meta_path = os.path.join(folder, key + ".json")
+        last_refresh = self.get_last_refresh_in_group(workspace_id, dataset_id)
+        if os.path.exists(meta_path) and os.path.exists(data_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("refreshEndTime") == last_refresh:
+                return pd.read_parquet(data_path)
+        df = self.datasets.run_dax_query_in_group(workspace_id, dataset_id, query, impersonatedUserName)
+        os.makedirs(folder, exist_ok=True)
+        # Each writer uses its own temporary files and renames them so readers and other writers of the same key never see half written entries.
+        # The meta file goes last, so an entry is only valid once its data is in place.
+        suffix = ".{}.{}.tmp".format(os.getpid(), threading.get_ident())
+        df.to_parquet(data_path + suffix, index=False)
+        os.replace(data_path + suffix, data_path)
+        meta = {
+            "workspaceId": workspace_id,
+            "datasetId": dataset_id,
+            "query": query,
+            "impersonatedUserName": impersonatedUserName,
+            "refreshEndTime": last_refresh,
+            "rows": len(df)
+        }
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + suffix, meta_path)
+        return df
+
+    def clear(self, dataset_id=None):
+        """Deletes the cached results of a dataset or the whole cache.
+        ### Parameters
+        ----
+        dataset_id: str uuid
+            Optional. The Power Bi Dataset id. If it's not specified all the cache is deleted.
+        ### Returns
+        ----
+        None
+        """
+        folder = self.cache_dir if dataset_id is None else os.path.join(self.cache_dir, dataset_id)
+        if os.path.isdir(folder):
+            shutil.rmtree(folder)
+        with self.lock:
+            if dataset_id is None:
+                self.refreshes = {}
+            else:
+                self.refreshes.pop(dataset_id, None)
+
+class RefreshOrchestrator():
+    """Runs refreshes of many datasets limiting how many run at the same time in each capacity and tracking them until they finish.
+    """
+
+    def __init__(self, token, max_refreshes_per_capacity=2, min_poll_interval=10, max_poll_interval=120, timeout=18000, max_errors=10):
+        """Create a simplePBI refresh orchestrator. It uses enhanced refreshes so each refresh can be tracked by its id.
+        Args:
+            token: String
+                Bearer Token to use the Power Bi Rest API
+            max_refreshes_per_capacity: int
+                Maximum number of refreshes running at the same time in a capacity. By default 2.
+            min_poll_interval: float
+                Seconds before the first status check of a refresh. By default 10.
+            max_poll_interval: float
+                Maximum seconds between status checks of a long refresh. By default 120.
+            timeout: float
+                Seconds after which a refresh still in progress is considered failed. By default 18000 (5 hours, the limit of a refresh).
+            max_errors: int
+                Consecutive failed status checks of a refresh before it's considered failed. The refresh keeps its capacity slot until then. By default 10.
+        """
+        self.token = token
+        self.max_refreshes_per_capacity = max_refreshes_per_capacity
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.max_errors = max_errors
+        self.terminal_status = ["Completed", "Failed", "Cancelled", "Disabled", "TimedOut"]
+
+    def get_workspaces_capacity(self):
+        """Returns the capacity id of every workspace the user has access to. Workspaces in shared capacity get "Shared".
+        ### Returns
+        ----
+        Dict:
+            A dictionary of workspace id to capacity id.
+        """
+        res = groups.Groups(self.token).get_groups()
+        if res is None:
+            raise Exception("Workspaces could not be requested to find their capacities.")
+        return {w["id"]: w.get("capacityId") or "Shared" for w in res.get("value", [])}
+
+    def start_refresh(self, workspace_id, dataset_id, body):
+        """Starts an enhanced refresh of a dataset and returns its refresh id.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL
+        body: dict
+            The enhanced refresh request body. E.g. {"type": "full", "commitMode": "transactional", "objects": [{"table": "DimDate"}]}
+        ### Returns
+        ----
+        str:
+            The refresh id. It raises requests.exceptions.HTTPError when the refresh can't be started and an Exception when the response has no refresh id.
+        """
+        url = "https://api.powerbi.com/v1.0/myorg/groups/{}/datasets/{}/refreshes".format(workspace_id, dataset_id)
+        headers = {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)}
+        res = utils.request_with_retry("POST", url, data=json.dumps(body), headers=headers)
+        refresh_id = utils.get_refresh_id(res)
+        if refresh_id is None:
+            raise Exception("The refresh of dataset {} started but the response has no refresh id to track it.".format(dataset_id))
+        return refresh_id
+
+    def get_refresh_state(self, workspace_id, dataset_id, refresh_id):
+        """Returns the execution details of a refresh and the seconds the API asks to wait before the next check.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL
+        refresh_id: str uuid
+            The refresh id returned by start_refresh.
+        ### Returns
+        ----
+        Tuple:
+            The details dict and the Retry-After seconds or None.
+        """
+        url = "https://api.powerbi.com/v1.0/myorg/groups/{}/datasets/{}/refreshes/{}".format(workspace_id, dataset_id, refresh_id)
+        headers = {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)}
+        res = requests.get(url, headers=headers)
+        if res.status_code == 429:
+            return None, utils.get_retry_after(res, self.max_poll_interval)
+        res.raise_for_status()
+        return res.json(), utils.get_retry_after(res)
+
+    def build_event(self, job, details=None, error=None):
+        """Builds the completion event of a refresh job.
+        ### Parameters
+        ----
+        job: dict
+            The internal job of the orchestrator with workspaceId, datasetId, capacityId, refreshId and submittedAt.
+        details: dict
+            The refresh execution details.
+        error: str
+            Error message when the refresh couldn't be started or tracked.
+        ### Returns
+        ----
+        Dict:
+            The event with workspaceId, datasetId, capacityId, refreshId, status, extendedStatus, startTime, endTime, duration (seconds) and error.
+        """
+        details = details or {}
+        start = pd.to_datetime(details.get("startTime"), utc=True, errors="coerce")
+        end = pd.to_datetime(details.get("endTime"), utc=True, errors="coerce")
+        duration = (end - start).total_seconds() if pd.notna(start) and pd.notna(end) else time.time() - job["submittedAt"]
+        if error is None and details.get("status") != "Completed":
+            messages = details.get("messages") or []
+            error = " | ".join("{}: {}".format(m.get("code", ""), m.get("message", "")) for m in messages) or None
+        return {
+            "workspaceId": job["workspaceId"],
+            "datasetId": job["datasetId"],
+            "capacityId": job["capacityId"],
+            "refreshId": job.get("refreshId"),
+            "status": details.get("status", "Failed" if error else None),
+            "extendedStatus": details.get("extendedStatus"),
+            "startTime": start,
+            "endTime": end,
+            "duration": duration,
+            "error": error
+        }
+
+    def run(self, datasets, body=None, workspaces_capacity=None, on_event=None):
+        """Refreshes all the datasets keeping at most max_refreshes_per_capacity running in each capacity.
+        A new refresh starts in a capacity as soon as another one finishes. Status checks back off from min_poll_interval to max_poll_interval and respect Retry-After.
+        ### Parameters
+        ----
+        datasets: list
+            List of tuples (workspace_id, dataset_id) or (workspace_id, dataset_id, body) to override the refresh body of a dataset.
+        body: dict
+            The enhanced refresh request body for every dataset. By default {"type": "full"}
+        workspaces_capacity: dict
+            Optional. Workspace id to capacity id. If it's not specified it's requested with the workspaces of the user.
+        on_event: function
+            Optional. Function called with each completion event dict as soon as a refresh finishes.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with one completion event per dataset: workspaceId, datasetId, capacityId, refreshId, status, extendedStatus, startTime, endTime, duration and error.
+        """
+        if body is None:
+            body = {"type": "full"}
+        if workspaces_capacity is None:
+            workspaces_capacity = self.get_workspaces_capacity()
+        queues = {}
+        for item in datasets:
+            capacity = workspaces_capacity.get(item[0], "Shared")
+            queues.setdefault(capacity, collections.deque()).append({
+                "workspaceId": item[0],
+                "datasetId": item[1],
+                "body": item[2] if len(item) > 2 else body,
+                "capacityId": capacity
+            })
+        running = {capacity: [] for capacity in queues}
+        events = []
+
+        def finish(job, details=None, error=None):
+            event = self.build_event(job, details, error)
+            events.append(event)
+            print("Refresh of dataset {} finished with status {} in {:.0f}s".format(event["datasetId"], event["status"], event["duration"]))
+            if on_event != None:
+                on_event(event)
+
+        while any(queues.values()) or any(running.values()):
+            now = time.time()
+            # Fill every capacity up to its limit
+            for capacity, queue in queues.items():
+                while queue and len(running[capacity]) < self.max_refreshes_per_capacity:
+                    job = queue.popleft()
+                    job["submittedAt"] = time.time()
+                    try:
+                        job["refreshId"] = self.start_refresh(job["workspaceId"], job["datasetId"], job["body"])
+                        job["interval"] = self.min_poll_interval
+                        job["nextPoll"] = job["submittedAt"] + self.min_poll_interval
+                        job["errors"] = 0
+                        running[capacity].append(job)
+                    except requests.exceptions.HTTPError as ex:
+                        finish(job, error="{} {}".format(ex, ex.response.text))
+                    except Exception as e:
+                        finish(job, error=str(e))
+            # Check the refreshes that are due
+            for capacity, jobs in running.items():
+                for job in list(jobs):
+                    if job["nextPoll"] > now:
+                        continue
+                    try:
+                        details, retry_after = self.get_refresh_state(job["workspaceId"], job["datasetId"], job["refreshId"])
+                        job["errors"] = 0
+                    except requests.exceptions.RequestException as e:
+                        # The refresh may still be running in the service, so it keeps its slot until the error budget is spent
+                        job["errors"] = job["errors"] + 1
+                        if job["errors"] >= self.max_errors:
+                            jobs.remove(job)
+                            finish(job, error="Status check failed {} times: {}".format(job["errors"], e))
+                            continue
+                        details, retry_after = None, None
+                    if details != None and details.get("status") in self.terminal_status:
+                        jobs.remove(job)
+                        finish(job, details)
+                        continue
+                    if time.time() - job["submittedAt"] > self.timeout:
+                        jobs.remove(job)
+                        finish(job, error="The refresh didn't finish in {} seconds".format(self.timeout))
+                        continue
+                    job["interval"] = min(job["interval"] * 1.5, self.max_poll_interval)
+                    job["nextPoll"] = time.time() + max(job["interval"], retry_after or 0)
+            polls = [job["nextPoll"] for jobs in running.values() for job in jobs]
+            if polls and not any(len(running[c]) < self.max_refreshes_per_capacity and queues[c] for c in queues):
+                time.sleep(max(0, min(polls) - time.time()))
+        return pd.DataFrame(events, columns=["workspaceId", "datasetId", "capacityId", "refreshId", "status", "extendedStatus", "startTime", "endTime", "duration", "error"])
+
+class RefreshDag():
+    """Refreshes dataflows and datasets following their dependencies. Each item starts as soon as all its upstream items succeed.
+    """
+
+    def __init__(self, token, max_parallel=4, min_poll_interval=15, max_poll_interval=120, timeout=18000, max_errors=10):
+        """Create a simplePBI refresh DAG runner.
+        Args:
+            token: String
+                Bearer Token to use the Power Bi Rest API
+            max_parallel: int
+                Maximum number of refreshes running at the same time. By default 4.
+            min_poll_interval: float
+                Seconds before the first status check of a refresh. By default 15.
+            max_poll_interval: float
+                Maximum seconds between status checks of a long refresh. By default 120.
+            timeout: float
+                Seconds after which a refresh still in progress is considered failed. By default 18000 (5 hours, the limit of a refresh).
+            max_errors: int
+                Consecutive failed status checks of a refresh before it's considered failed. By default 10.
+        """
+        self.token = token
+        self.max_parallel = max_parallel
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.timeout = timeout
+        self.max_errors = max_errors
+        self.datasets = Datasets(token)
+        self.dataflows = dataflows.Dataflows(token)
+
+    def build_graph(self, workspace_ids, include_unlinked_datasets=False):
+        """Builds the dependency graph of the dataflows and datasets of the workspaces from the upstream dataflows and dataset to dataflow links.
+        ### Parameters
+        ----
+        workspace_ids: list
+            The Power Bi workspace ids. Like ['xxx-xxx-xxx-xxx', 'yyy-yyy-yyy-yyy']
+        include_unlinked_datasets: bool
+            If True datasets that don't use dataflows are added too. By default False.
+        ### Returns
+        ----
+        Dict:
+            A dictionary of node key ("dataflow:id" or "dataset:id") to a dict with type, workspaceId, id, name and upstream (set of node keys).
+        """
+        nodes = {}
+        for workspace_id in workspace_ids:
+            flows = self.dataflows.get_dataflows_in_group(workspace_id) or {}
+            for flow in flows.get("value", []):
+                nodes["dataflow:" + flow["objectId"]] = {"type": "dataflow", "workspaceId": workspace_id, "id": flow["objectId"], "name": flow.get("name"), "upstream": set()}
+            if include_unlinked_datasets:
+                sets = self.datasets.get_datasets_in_group(workspace_id) or {}
+                for dataset in sets.get("value", []):
+                    nodes["dataset:" + dataset["id"]] = {"type": "dataset", "workspaceId": workspace_id, "id": dataset["id"], "name": dataset.get("name"), "upstream": set()}
+            links = self.datasets.get_dataset_to_dataflows_links_in_group(workspace_id)
+            if not isinstance(links, dict):
+                continue
+            for link in links.get("value", []):
+                key = "dataset:" + link["datasetObjectId"]
+                if key not in nodes:
+                    nodes[key] = {"type": "dataset", "workspaceId": link.get("workspaceObjectId", workspace_id), "id": link["datasetObjectId"], "name": None, "upstream": set()}
+                nodes[key]["upstream"].add("dataflow:" + link["dataflowObjectId"])
+        # Upstream dataflows need one request per dataflow
+        flow_nodes = [node for node in nodes.values() if node["type"] == "dataflow"]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            upstreams = executor.map(lambda node: self.dataflows.get_upstream_dataflow_in_group(node["workspaceId"], node["id"]), flow_nodes)
+            for node, upstream in zip(flow_nodes, upstreams):
+                for flow in (upstream or {}).get("value", []):
+                    node["upstream"].add("dataflow:" + flow["targetDataflowId"])
+        # Items outside of the workspaces are not refreshed, they are taken as ready
+        for node in nodes.values():
+            node["upstream"] = set(key for key in node["upstream"] if key in nodes)
+        return nodes
+
+    def topological_order(self, nodes):
+        """Sorts the nodes so every item comes after its upstream items.
+        ### Parameters
+        ----
+        nodes: dict
+            The graph returned by build_graph.
+        ### Returns
+        ----
+        list:
+            The node keys sorted. It raises an Exception when the graph has a cycle.
+        """
+        pending = {key: len(node["upstream"]) for key, node in nodes.items()}
+        downstream = {key: [] for key in nodes}
+        for key, node in nodes.items():
+            for up in node["upstream"]:
+                downstream[up].append(key)
+        ready = collections.deque(sorted(key for key, count in pending.items() if count == 0))
+        order = []
+        while ready:
+            key = ready.popleft()
+            order.append(key)
+            for down in downstream[key]:
+                pending[down] = pending[down] - 1
+                if pending[down] == 0:
+                    ready.append(down)
+        if len(order) != len(nodes):
+            raise Exception("The refresh graph has a cycle between: {}".format(", ".join(k for k in nodes if k not in order)))
+        return order
+
+    def get_critical_path_lengths(self, nodes):
+        """Returns the length of the longest chain of downstream items of each node. Longer chains are started first.
+        ### Parameters
+        ----
+        nodes: dict
+            The graph returned by build_graph.
+        ### Returns
+        ----
+        Dict:
+            A dictionary of node key to number of items in its longest downstream chain, itself included.
+        """
+        lengths = {key: 1 for key in nodes}
+        for key in reversed(self.topological_order(nodes)):
+            for up in nodes[key]["upstream"]:
+                lengths[up] = max(lengths[up], lengths[key] + 1)
+        return lengths
+
+    def start_refresh(self, node, notifyOption):
+        """Starts the refresh of a node and returns the id used to track it.
+        ### Parameters
+        ----
+        node: dict
+            A node of the graph returned by build_graph.
+        notifyOption: str
+            Mail notification options. Options: { MailOnFailure, NoNotification }
+        ### Returns
+        ----
+        str:
+            The refresh id of a dataset or None for a dataflow, tracked by its newest transaction.
+        """
+        headers = {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)}
+        url = "https://api.powerbi.com/v1.0/myorg/groups/{}/{}s/{}/refreshes".format(node["workspaceId"], node["type"], node["id"])
+        res = utils.request_with_retry("POST", url, data=json.dumps({"notifyOption": notifyOption}), headers=headers)
+        if node["type"] != "dataset":
+            return None
+        refresh_id = utils.get_refresh_id(res)
+        if refresh_id is None:
+            raise Exception("The refresh response has no refresh id to track it.")
+        return refresh_id
+
+    def get_refresh_state(self, node, refresh_id, submitted_at):
+        """Returns the status of the refresh of a node. It's "InProgress", "Succeeded" or "Failed" with the error details.
+        ### Parameters
+        ----
+        node: dict
+            A node of the graph returned by build_graph.
+        refresh_id: str
+            The id returned by start_refresh.
+        submitted_at: float
+            Epoch seconds when the refresh was started, to find dataflow transactions of this run.
+        ### Returns
+        ----
+        Tuple:
+            The status and the error message or None. A refresh not listed in the history yet is InProgress. It raises an Exception when the status can't be requested.
+        """
+        if node["type"] == "dataset":
+            history = self.datasets.get_refresh_history_in_group(node["workspaceId"], node["id"], top=10)
+            if history is None:
+                raise Exception("The refresh history could not be requested.")
+            match = [e for e in history.get("value", []) if e.get("requestId") == refresh_id]
+            if not match or match[0].get("status") == "Unknown":
+                return "InProgress", None
+            if match[0].get("status") == "Completed":
+                return "Succeeded", None
+            return "Failed", match[0].get("serviceExceptionJson") or match[0].get("status")
+        transactions = self.dataflows.get_dataflow_transaction_in_group(node["workspaceId"], node["id"])
+        if transactions is None:
+            raise Exception("The dataflow transactions could not be requested.")
+        since = pd.Timestamp(submitted_at - 60, unit="s", tz="UTC")
+        runs = [t for t in transactions.get("value", []) if t.get("startTime") and pd.to_datetime(t["startTime"], utc=True) >= since]
+        if not runs:
+            return "InProgress", None
+        status = sorted(runs, key=lambda t: t.get("startTime"))[-1].get("status")
+        if status in ("InProgress", "NotStarted", "Unknown", None):
+            return "InProgress", None
+        if status in ("Success", "Succeeded", "Completed"):
+            return "Succeeded", None
+        return "Failed", status
+
+    def run(self, nodes=None, workspace_ids=None, notifyOption="NoNotification", on_event=None):
+        """Refreshes every node of the graph once all its upstream nodes succeeded. Independent branches run in parallel up to max_parallel.
+        When a refresh fails its downstream nodes are skipped.
+        ### Parameters
+        ----
+        nodes: dict
+            The graph returned by build_graph. If it's not specified it's built from workspace_ids.
+        workspace_ids: list
+            The Power Bi workspace ids to build the graph when nodes are not specified.
+        notifyOption: str
+            Mail notification options. Options: { MailOnFailure, NoNotification }. By default NoNotification
+        on_event: function
+            Optional. Function called with each finished node event dict.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with one row per node: type, workspaceId, id, name, status (Succeeded, Failed or Skipped), startTime, endTime, duration (seconds) and error.
+        """
+        if nodes is None:
+            nodes = self.build_graph(workspace_ids)
+        priority = self.get_critical_path_lengths(nodes)
+        order = sorted(self.topological_order(nodes), key=lambda k: -priority[k])
+        status = {}
+        running = {}
+        events = []
+
+        def finish(key, state, error=None, started=None):
+            node = nodes[key]
+            status[key] = state
+            end = time.time()
+            event = {
+                "type": node["type"], "workspaceId": node["workspaceId"], "id": node["id"], "name": node["name"], "status": state,
+                "startTime": pd.Timestamp(started, unit="s", tz="UTC") if started else pd.NaT,
+                "endTime": pd.Timestamp(end, unit="s", tz="UTC") if started else pd.NaT,
+                "duration": end - started if started else None, "error": error
+            }
+            events.append(event)
+            print("{} {} {}".format(node["type"].capitalize(), node["name"] or node["id"], state))
+            if on_event != None:
+                on_event(event)
+
+        while len(status) < len(nodes):
+            # Skip the nodes whose upstream failed, start the ones whose upstream succeeded
+            for key in order:
+                if key in status or key in running:
+                    continue
+                ups = [status.get(up) for up in nodes[key]["upstream"]]
+                if any(s in ("Failed", "Skipped") for s in ups):
+                    finish(key, "Skipped", "An upstream refresh didn't succeed")
+                elif all(s == "Succeeded" for s in ups) and len(running) < self.max_parallel:
+                    started = time.time()
+                    try:
+                        refresh_id = self.start_refresh(nodes[key], notifyOption)
+                        running[key] = {"refreshId": refresh_id, "started": started, "interval": self.min_poll_interval, "nextPoll": started + self.min_poll_interval, "errors": 0}
+                    except requests.exceptions.HTTPError as ex:
+                        finish(key, "Failed", "{} {}".format(ex, ex.response.text), started)
+                    except Exception as e:
+                        finish(key, "Failed", str(e), started)
+            if not running:
+                continue
+            wait = min(job["nextPoll"] for job in running.values()) - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            for key, job in list(running.items()):
+                if job["nextPoll"] > time.time():
+                    continue
+                try:
+                    state, error = self.get_refresh_state(nodes[key], job["refreshId"], job["started"])
+                    job["errors"] = 0
+                except Exception as e:
+                    job["errors"] = job["errors"] + 1
+                    state, error = ("Failed", "Status check failed {} times: {}".format(job["errors"], e)) if job["errors"] >= self.max_errors else ("InProgress", None)
+                if state == "InProgress" and time.time() - job["started"] > self.timeout:
+                    state, error = "Failed", "The refresh didn't finish in {} seconds".format(self.timeout)
+                if state == "InProgress":
+                    job["interval"] = min(job["interval"] * 1.5, self.max_poll_interval)
+                    job["nextPoll"] = time.time() + job["interval"]
+                else:
+                    del running[key]
+                    finish(key, state, error, job["started"])
+        return pd.DataFrame(events, columns=["type", "workspaceId", "id", "name", "status", "startTime", "endTime", "duration", "error"])
+
+class IncrementalRefreshPlanner():
+    """Plans enhanced refreshes that only process the tables and partitions that are stale for a staleness policy.
+    """
+
+    def __init__(self, token):
+        """Create a simplePBI incremental refresh planner.
+        Args:
+            token: String
+                Bearer Token to use the Power Bi Rest API
+        """
+        self.token = token
+        self.datasets = Datasets(token)
+        self.semantic_models = semanticmodels.SemanticModels(token)
+
+    def get_partitions(self, workspace_id, dataset_id, model=None):
+        """Returns the partitions of the semantic model from its TMDL definition.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL
+        model: object
+            TMDL model definition, if you already have it. Send None to request it.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with columns: table, partition, source_type, mode and has_refresh_policy.
+        """
+        if model is None:
+            model = self.semantic_models.get_semantic_model_definition(workspace_id, dataset_id, "TMDL")
+        tables = [base64.b64decode(i["payload"]).decode("utf-8") for i in model["definition"]["parts"] if i["path"].startswith("definition/tables/")]
+        return utils.parse_tmdl_partitions(tables)
+
+    def get_partition_refresh_times(self, workspace_id, dataset_id, partitions, top=60):
+        """Returns when each partition was last refreshed successfully according to the refresh history.
+        Scheduled and on demand refreshes process the whole model, enhanced refreshes only the objects in their execution details.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL
+        partitions: DataFrame
+            The partitions returned by get_partitions.
+        top: int
+            Number of refresh history entries to check. By default 60, the maximum Power BI keeps.
+        ### Returns
+        ----
+        DataFrame:
+            The partitions DataFrame with a last_refresh column (UTC) or NaT when it wasn't found in the history.
+        """
+        history = self.datasets.get_refresh_history_in_group(workspace_id, dataset_id, top=top) or {}
+        refreshed = []
+        for entry in history.get("value", []):
+            if entry.get("status") != "Completed" or not entry.get("endTime"):
+                continue
+            end = pd.to_datetime(entry["endTime"], utc=True)
+            objects = []
+            if entry.get("refreshType") == "ViaEnhancedApi":
+                details = self.datasets.get_refresh_execution_details_in_group(workspace_id, dataset_id, entry["requestId"]) or {}
+                objects = [o for o in details.get("objects") or [] if o.get("status") == "Completed"]
+            if not objects:
+                refreshed.append(partitions[["table", "partition"]].assign(last_refresh=end))
+                continue
+            done = pd.DataFrame(objects).reindex(columns=["table", "partition"])
+            # A table object covers all its partitions
+            whole = partitions.merge(done[done["partition"].isna()][["table"]], on="table")
+            single = partitions.merge(done.dropna(subset=["partition"]), on=["table", "partition"])
+            refreshed.append(pd.concat([whole, single])[["table", "partition"]].assign(last_refresh=end))
+        if not refreshed:
+            return partitions.assign(last_refresh=pd.NaT)
+        last = pd.concat(refreshed).groupby(["table", "partition"], as_index=False)["last_refresh"].max()
+        return partitions.merge(last, on=["table", "partition"], how="left")
+
+    def plan(self, workspace_id, dataset_id, staleness, model=None, refresh_times=None, now=None):
+        """Computes the minimal list of objects to refresh. A table is refreshed whole when all its partitions are stale, otherwise only its stale partitions.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL
+        staleness: dict
+            Maximum age in hours (or pandas Timedelta) per table name. The "*" key applies to the other tables and None means never refresh.
+            E.g. {"*": 24, "FactSales": 1, "DimDate": None}
+        model: object
+            TMDL model definition, if you already have it. Send None to request it.
+        refresh_times: DataFrame
+            Optional. A DataFrame with table, partition and last_refresh columns when you already know the refresh times (e.g. from XMLA).
+        now: Timestamp
+            Optional. Reference time for the ages. By default the current UTC time.
+        ### Returns
+        ----
+        Dict:
+            "partitions" a pandas DataFrame with table, partition, last_refresh, max_age and stale columns and "objects" the list for enhanced_refresh_dataset_in_group.
+        """
+        partitions = self.get_partitions(workspace_id, dataset_id, model)
+        if refresh_times is None:
+            partitions = self.get_partition_refresh_times(workspace_id, dataset_id, partitions)
+        else:
+            partitions = partitions.merge(refresh_times[["table", "partition", "last_refresh"]], on=["table", "partition"], how="left")
+            partitions["last_refresh"] = pd.to_datetime(partitions["last_refresh"], utc=True)
+        now = pd.Timestamp.now(tz="UTC") if now is None else pd.Timestamp(now)
+        ages = {k: (v if v is None or isinstance(v, pd.Timedelta) else pd.Timedelta(hours=v)) for k, v in staleness.items()}
+        default = ages.get("*")
+        partitions["max_age"] = pd.to_timedelta(partitions["table"].map(lambda t: ages.get(t, default)))
+        age = now - partitions["last_refresh"]
+        partitions["stale"] = partitions["max_age"].notna() & (partitions["last_refresh"].isna() | (age > partitions["max_age"]))
+        by_table = partitions.groupby("table")["stale"].agg(["all", "any"])
+        objects = [{"table": t} for t in by_table.index[by_table["all"]]]
+        partial = partitions[partitions["stale"] & partitions["table"].isin(by_table.index[by_table["any"] & ~by_table["all"]])]
+        objects.extend({"table": t, "partition": p} for t, p in zip(partial["table"], partial["partition"]))
+        return {"partitions": partitions, "objects": objects}
+
+    def refresh(self, workspace_id, dataset_id, staleness, max_parallelism=4, batch_size=None, typeProcessing="full", commitMode="transactional", retryCount=1, poll_interval=15, model=None, timeout=18000, max_errors=10):
+        """Plans and runs the refresh of the stale objects. Each batch is an enhanced refresh processing up to max_parallelism objects at the same time.
+        Batches run one after another through RefreshOrchestrator because a dataset accepts a single enhanced refresh at a time. It stops at the first batch that doesn't complete.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The Power Bi workspace id. You can take it from PBI Service URL
+        dataset_id: str uuid
+            The Power Bi Dataset id. You can take it from PBI Service URL
+        staleness: dict
+            Maximum age in hours per table name. Read plan method for details. E.g. {"*": 24, "FactSales": 1}
+        max_parallelism: int
+            The maxParallelism of each enhanced refresh. By default 4.
+        batch_size: int
+            Maximum number of objects per enhanced refresh. By default all objects go in a single refresh.
+        typeProcessing: str
+            The type of processing. By default full.
+        commitMode: str
+            transactional or partialBatch. By default transactional.
+        retryCount: int
+            Number of times the operation will retry before failing.
+        poll_interval: float
+            Seconds before the first status check of each batch. Later checks back off up to 120 seconds and respect Retry-After. By default 15.
+        model: object
+            TMDL model definition, if you already have it. Send None to request it.
+        timeout: float
+            Seconds after which a batch still in progress is considered failed. By default 18000.
+        max_errors: int
+            Consecutive failed status checks of a batch before it's considered failed. By default 10.
+        ### Returns
+        ----
+        Dict:
+            "plan" the result of the plan method and "batches" a list with the completion event of each enhanced refresh (refreshId, status, extendedStatus, startTime, endTime, duration and error).
+            A batch that couldn't be started or tracked is recorded with status Failed and its error.
+        """
+        plan = self.plan(workspace_id, dataset_id, staleness, model=model)
+        objects = plan["objects"]
+        if not objects:
+            print("Every partition is fresh, nothing to refresh.")
+            return {"plan": plan, "batches": []}
+        size = batch_size or len(objects)
+        orchestrator = RefreshOrchestrator(self.token, max_refreshes_per_capacity=1, min_poll_interval=poll_interval, max_poll_interval=max(poll_interval, 120), timeout=timeout, max_errors=max_errors)
+        batches = []
+        for start in range(0, len(objects), size):
+            batch = objects[start:start + size]
+            body = {"type": typeProcessing, "commitMode": commitMode, "maxParallelism": max_parallelism, "retryCount": retryCount, "objects": batch, "applyRefreshPolicy": True}
+            print("Refreshing {} objects".format(len(batch)))
+            events = orchestrator.run([(workspace_id, dataset_id, body)], workspaces_capacity={workspace_id: "Shared"})
+            event = events.to_dict("records")[0]
+            batches.append(event)
+            if event["status"] != "Completed":
+                break
+        return {"plan": plan, "batches": batches}
+
+class RefreshHistoryAnalytics():
+    """Collects the refresh history of many datasets concurrently and computes statistics to find slow and flaky models.
+    """
+
+    def __init__(self, token, max_workers=8):
+        """Create a simplePBI refresh history collector.
+        Args:
+            token: String
+                Bearer Token to use the Power Bi Rest API
+            max_workers: int
+                Maximum number of requests running at the same time. By default 8.
+        """
+        self.token = token
+        self.max_workers = max_workers
+        self.datasets = Datasets(token)
+
+    def get_refreshable_datasets(self, workspace_ids=None):
+        """Returns the refreshable datasets of the workspaces.
+        ### Parameters
+        ----
+        workspace_ids: list
+            List of workspace ids. By default every workspace the user has access to.
+        ### Returns
+        ----
+        List:
+            List of tuples (workspace_id, dataset_id).
+        """
+        if workspace_ids is None:
+            res = groups.Groups(self.token).get_groups()
+            if res is None:
+                raise Exception("Workspaces could not be requested to find their datasets.")
+            workspace_ids = [w["id"] for w in res.get("value", [])]
+        datasets = []
+        for workspace_id, res in zip(workspace_ids, utils.imap_ordered(self.datasets.get_datasets_in_group, workspace_ids, self.max_workers)):
+            if res is None:
+                print("Datasets of workspace {} could not be requested.".format(workspace_id))
+                continue
+            datasets.extend((workspace_id, d["id"]) for d in res.get("value", []) if d.get("isRefreshable", True))
+        return datasets
+
+    def collect(self, datasets=None, workspace_ids=None, top=None):
+        """Requests the refresh history of the datasets concurrently and normalizes it into a single DataFrame.
+        ### Parameters
+        ----
+        datasets: list
+            List of tuples (workspace_id, dataset_id). By default the refreshable datasets of workspace_ids.
+        workspace_ids: list
+            List of workspace ids used when datasets is None. By default every workspace the user has access to.
+        top: int
+            The requested number of entries in the refresh history of each dataset. By default all available entries.
+        ### Returns
+        ----
+        DataFrame:
+            The DataFrame returned by utils.refresh_history_to_pandas with one row per refresh.
+        """
+        if datasets is None:
+            datasets = self.get_refreshable_datasets(workspace_ids)
+
+        def run(item):
+            return self.datasets.get_refresh_history_in_group(item[0], item[1], top)
+
+        histories = [(item[0], item[1], history) for item, history in zip(datasets, utils.imap_ordered(run, datasets, self.max_workers))]
+        missing = sum(1 for h in histories if h[2] is None)
+        print("Refresh history requested for {} datasets, {} failed".format(len(histories), missing))
+        return utils.refresh_history_to_pandas(histories)
+
+    def analyze(self, df_history, percentiles=(0.5, 0.9, 0.95, 0.99), window=10, threshold=1.5, tz="UTC"):
+        """Computes every statistic of the refresh history.
+        ### Parameters
+        ----
+        df_history: DataFrame
+            The DataFrame returned by collect.
+        percentiles: tuple
+            The duration percentiles to compute between 0 and 1. By default (0.5, 0.9, 0.95, 0.99).
+        window: int
+            Number of previous completed refreshes in the baseline for regressions. By default 10.
+        threshold: float
+            Ratio over the baseline to flag a regression. By default 1.5.
+        tz: str
+            The time zone of the heatmaps. By default UTC.
+        ### Returns
+        ----
+        Dict:
+            "percentiles" and "failure_streaks" by dataset, "heatmap" and "failure_heatmap" by weekday and hour and "regressions" with the flagged refreshes.
+        """
+        regressions = utils.get_refresh_regressions(df_history, window=window, threshold=threshold)
+        return {
+            "percentiles": utils.get_refresh_duration_percentiles(df_history, percentiles),
+            "failure_streaks": utils.get_refresh_failure_streaks(df_history),
+            "heatmap": utils.get_refresh_heatmap(df_history, "refreshes", tz),
+            "failure_heatmap": utils.get_refresh_heatmap(df_history, "failureRate", tz),
+            "regressions": regressions[regressions["regression"]].reset_index(drop=True)
+        }
+
+class BulkDatasetUpdater():
+    """Updates parameters and datasources of many datasets sending requests only where the current values differ.
+    """
+
+    def __init__(self, token, max_workers=8):
+        """Create a simplePBI bulk dataset updater.
+        Args:
+            token: String
+                Bearer Token to use the Power Bi Rest API
+            max_workers: int
+                Maximum number of requests running at the same time. By default 8.
+        """
+        self.token = token
+        self.max_workers = max_workers
+        self.datasets = Datasets(token)
+
+    def get_current_state(self, datasets, parameters=True, datasources=True):
+        """Requests the current parameters and datasources of the datasets concurrently.
+        ### Parameters
+        ----
+        datasets: list
+            List of tuples (workspace_id, dataset_id).
+        parameters: bool
+            Request the parameters. By default True.
+        datasources: bool
+            Request the datasources. By default True.
+        ### Returns
+        ----
+        List:
+            List of dicts with workspaceId, datasetId, parameters and datasources. Lists are None when they couldn't be requested.
+        """
+        def run(item):
+            workspace_id, dataset_id = item
+            state = {"workspaceId": workspace_id, "datasetId": dataset_id, "parameters": [], "datasources": []}
+            if parameters:
+                res = self.datasets.get_parameters_in_group(workspace_id, dataset_id)
+                state["parameters"] = None if res is None else res.get("value", [])
+            if datasources:
+                res = self.datasets.get_datasources_in_group(workspace_id, dataset_id)
+                state["datasources"] = None if res is None else res.get("value", [])
+            return state
+
+        return list(utils.imap_ordered(run, datasets, self.max_workers))
+
+    def match_datasource(self, datasource, selector):
+        """Checks if a datasource of a dataset is selected by a datasourceSelector.
+        ### Parameters
+        ----
+        datasource: dict
+            A datasource returned by get_datasources_in_group.
+        selector: dict
+            A datasourceSelector with datasourceType and connectionDetails. E.g. {"datasourceType": "Sql", "connectionDetails": {"server": "My-Sql-Server"}}
+        ### Returns
+        ----
+        bool:
+            True when the type and every connection detail of the selector match. Values are compared case insensitive.
+        """
+        if str(datasource.get("datasourceType", "")).lower() != str(selector.get("datasourceType", "")).lower():
+            return False
+        details = {k.lower(): str(v).lower() for k, v in (datasource.get("connectionDetails") or {}).items()}
+        return all(details.get(k.lower()) == str(v).lower() for k, v in (selector.get("connectionDetails") or {}).items())
+
+    def plan(self, datasets, parameters=None, datasources=None):
+        """Compares the current values of the datasets with the target values and builds the updates needed.
+        ### Parameters
+        ----
+        datasets: list
+            List of tuples (workspace_id, dataset_id).
+        parameters: dict
+            Target values by parameter name. Datasets without the parameter are skipped. E.g. {"Server": "new-server.database.windows.net"}
+        datasources: list
+            Datasource updates like update_datasources_in_group_preview updateDetails. Only selected datasources with different connectionDetails are updated.
+            E.g. [{"datasourceSelector": {"datasourceType": "Sql", "connectionDetails": {"server": "old-server"}}, "connectionDetails": {"server": "new-server"}}]
+        ### Returns
+        ----
+        Dict:
+            "changes" a pandas DataFrame with one row per value to change, "updates" the request bodies by dataset and "errors" the datasets that couldn't be read.
+        """
+        parameters = parameters or {}
+        datasources = datasources or []
+        states = self.get_current_state(datasets, parameters=bool(parameters), datasources=bool(datasources))
+        changes = []
+        updates = []
+        errors = []
+        for state in states:
+            source = {"workspaceId": state["workspaceId"], "datasetId": state["datasetId"]}
+            if state["parameters"] is None or state["datasources"] is None:
+                errors.append(dict(source, error="Current parameters or datasources could not be requested."))
+                continue
+            parameter_updates = []
+            for p in state["parameters"]:
+                if p["name"] in parameters and str(p.get("currentValue")) != str(parameters[p["name"]]):
+                    parameter_updates.append({"name": p["name"], "newValue": parameters[p["name"]]})
+                    changes.append(dict(source, kind="parameter", name=p["name"], currentValue=p.get("currentValue"), newValue=parameters[p["name"]]))
+            datasource_updates = []
+            for d in state["datasources"]:
+                for update in datasources:
+                    if not self.match_datasource(d, update["datasourceSelector"]):
+                        continue
+                    current = d.get("connectionDetails") or {}
+                    target = dict(current, **update["connectionDetails"])
+                    if target != current:
+                        # The selector must identify the datasource by its current details
+                        selector = {"datasourceType": d["datasourceType"], "connectionDetails": current}
+                        datasource_updates.append({"datasourceSelector": selector, "connectionDetails": target})
+                        changes.append(dict(source, kind="datasource", name=d["datasourceType"], currentValue=json.dumps(current), newValue=json.dumps(target)))
+                    break
+            if parameter_updates or datasource_updates:
+                updates.append(dict(source, parameters=parameter_updates, datasources=datasource_updates))
+        print("Datasets checked: {}, to update: {}, unreadable: {}".format(len(states), len(updates), len(errors)))
+        return {
+            "changes": pd.DataFrame(changes, columns=["workspaceId", "datasetId", "kind", "name", "currentValue", "newValue"]),
+            "updates": updates,
+            "errors": pd.DataFrame(errors, columns=["workspaceId", "datasetId", "error"])
+        }
+
+    def apply(self, plan, refresh=False, notifyOption="NoNotification"):
+        """Sends the updates of a plan concurrently and optionally refreshes the updated datasets so the new values are applied.
+        ### Parameters
+        ----
+        plan: dict
+            The dictionary returned by plan.
+        refresh: bool
+            Trigger a refresh of each dataset updated successfully. By default False.
+        notifyOption: str
+            Mail notification option of the refreshes. Options: { MailOnCompletion, MailOnFailure, NoNotification }
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with workspaceId, datasetId, parametersUpdated, datasourcesUpdated, refreshId and error columns.
+        """
+        def run(update):
+            workspace_id, dataset_id = update["workspaceId"], update["datasetId"]
+            result = {"workspaceId": workspace_id, "datasetId": dataset_id, "parametersUpdated": 0, "datasourcesUpdated": 0, "refreshId": None, "error": None}
+            # The API accepts a maximum of 100 parameters per request
+            for start in range(0, len(update["parameters"]), 100):
+                batch = update["parameters"][start:start + 100]
+                if self.datasets.update_parameters_in_group(workspace_id, dataset_id, batch) is None:
+                    result["error"] = "Parameters update failed."
+                    return result
+                result["parametersUpdated"] += len(batch)
+            if update["datasources"]:
+                if self.datasets.update_datasources_in_group_preview(workspace_id, dataset_id, update["datasources"]) is None:
+                    result["error"] = "Datasources update failed."
+                    return result
+                result["datasourcesUpdated"] = len(update["datasources"])
+            if refresh:
+                res = self.datasets.refresh_dataset_in_group(workspace_id, dataset_id, notifyOption)
+                if res is None:
+                    result["error"] = "Refresh could not be started."
+                else:
+                    result["refreshId"] = utils.get_refresh_id(res)
+            return result
+
+        results = pd.DataFrame(list(utils.imap_ordered(run, plan["updates"], self.max_workers)), columns=["workspaceId", "datasetId", "parametersUpdated", "datasourcesUpdated", "refreshId", "error"])
+        print("Datasets updated: {}, failed: {}".format(int(results["error"].isna().sum()), int(results["error"].notna().sum())))
+        return results
+
+class QueryScaleOutSync():
+    """Synchronizes the read-only replicas of many datasets with query scale-out and waits until they serve the latest data.
+    """
+
+    def __init__(self, token, max_workers=8, poll_interval=10, timeout=1800):
+        """Create a simplePBI query scale-out synchronizer.
+        Args:
+            token: String
+                Bearer Token to use the Power Bi Rest API
+            max_workers: int
+                Maximum number of requests running at the same time. By default 8.
+            poll_interval: float
+                Seconds between status checks. By default 10.
+            timeout: float
+                Maximum seconds waiting for the replicas. By default 1800.
+        """
+        self.token = token
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.datasets = Datasets(token)
+
+    def is_synced(self, status):
+        """Checks if every read-only replica of a dataset serves the last committed version.
+        ### Parameters
+        ----
+        status: dict
+            The response of get_query_scaleout_sync_status_in_group.
+        ### Returns
+        ----
+        bool:
+            True when the replicas are in sync or the dataset doesn't use query scale-out.
+        """
+        if status.get("scaleOutStatus") != "Enabled":
+            return True
+        commit = status.get("commitVersion")
+        return commit is not None and (status.get("minActiveReadVersion") or 0) >= commit
+
+    def get_replica_lag(self, statuses):
+        """Builds one row per replica with its lag behind the read-write replica.
+        ### Parameters
+        ----
+        statuses: list
+            List of tuples (workspace_id, dataset_id, status) where status is the response of get_query_scaleout_sync_status_in_group.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with workspaceId, datasetId, scaleOutStatus, replicaId, replicaType, commitVersion, replicaVersion, versionLag and lagSeconds columns.
+        """
+        records = []
+        for workspace_id, dataset_id, status in statuses:
+            status = status or {}
+            base = {"workspaceId": workspace_id, "datasetId": dataset_id, "scaleOutStatus": status.get("scaleOutStatus"), "commitVersion": status.get("commitVersion"), "commitTimestamp": status.get("commitTimestamp"), "syncEndTime": status.get("syncEndTime")}
+            details = status.get("syncDetails") or [{}]
+            records.extend(dict(base, replicaId=d.get("replicaId"), replicaType=d.get("replicaType"), replicaVersion=d.get("replicaVersion"), replicaTimestamp=d.get("replicaTimestamp")) for d in details)
+        columns = ["workspaceId", "datasetId", "scaleOutStatus", "replicaId", "replicaType", "commitVersion", "replicaVersion", "commitTimestamp", "replicaTimestamp", "syncEndTime"]
+        df = pd.DataFrame(records, columns=columns)
+        for col in ["commitTimestamp", "replicaTimestamp", "syncEndTime"]:
+            df[col] = pd.to_datetime(df[col], utc=True, errors="coerce")
+        for col in ["commitVersion", "replicaVersion"]:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
+        df["versionLag"] = (df["commitVersion"] - df["replicaVersion"]).clip(lower=0)
+        df["lagSeconds"] = (df["commitTimestamp"] - df["replicaTimestamp"]).dt.total_seconds().clip(lower=0)
+        return df
+
+    def get_statuses(self, datasets):
+        """Requests the sync status of the datasets concurrently.
+        ### Parameters
+        ----
+        datasets: list
+            List of tuples (workspace_id, dataset_id).
+        ### Returns
+        ----
+        List:
+            List of tuples (workspace_id, dataset_id, status). Status is None when it couldn't be requested.
+        """
+        def run(item):
+            return self.datasets.get_query_scaleout_sync_status_in_group(item[0], item[1])
+
+        return [(item[0], item[1], status) for item, status in zip(datasets, utils.imap_ordered(run, datasets, self.max_workers))]
+
+    def sync(self, datasets, wait=True):
+        """Triggers the sync of the datasets concurrently and polls their statuses together until the replicas are in sync.
+        Use it after a refresh wave, e.g. with the completed rows of RefreshOrchestrator.run: list(zip(df.workspaceId, df.datasetId)).
+        ### Parameters
+        ----
+        datasets: list
+            List of tuples (workspace_id, dataset_id).
+        wait: bool
+            Wait until every replica is in sync or the timeout. By default True.
+        ### Returns
+        ----
+        DataFrame:
+            The replica lag DataFrame of get_replica_lag with triggered, synced and syncSeconds columns by dataset.
+        """
+        datasets = [(w, d) for w, d in datasets]
+
+        def run(item):
+            return self.datasets.trigger_query_scaleout_sync_in_group(item[0], item[1]) is not None
+
+        started = time.time()
+        triggered = dict(zip(datasets, utils.imap_ordered(run, datasets, self.max_workers)))
+        statuses = {}
+        synced = {}
+        pending = [k for k in datasets if triggered[k]]
+        while pending:
+            for workspace_id, dataset_id, status in self.get_statuses(pending):
+                if status is None:
+                    continue
+                statuses[(workspace_id, dataset_id)] = status
+                if self.is_synced(status):
+                    synced[(workspace_id, dataset_id)] = time.time() - started
+            pending = [k for k in pending if k not in synced]
+            if not wait or not pending:
+                break
+            if time.time() - started > self.timeout:
+                print("Timeout waiting for {} datasets to sync.".format(len(pending)))
+                break
+            time.sleep(self.poll_interval)
+        missing = [k for k in datasets if k not in statuses]
+        for workspace_id, dataset_id, status in self.get_statuses(missing):
+            statuses[(workspace_id, dataset_id)] = status
+        df = self.get_replica_lag([(k[0], k[1], statuses.get(k)) for k in datasets])
+        keys = list(zip(df["workspaceId"], df["datasetId"]))
+        df["triggered"] = [triggered[k] for k in keys]
+        df["synced"] = [k in synced for k in keys]
+        df["syncSeconds"] = [synced.get(k) for k in keys]
+        print("Datasets synced: {} of {}".format(len(synced), len(datasets)))
+        return df
@@ -96,15 +96,7 @@ class Items():
             if status != None:
                 url += "&status={}".format(status)
             url = url.replace("?&", "?")
-            res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-            res.raise_for_status()
-            data = res.json()
-            while 'continuationToken' in data and data['continuationToken'] != None:
-                url = "https://api.fabric.microsoft.com/v1/admin/items?continuationToken={}".format(data['continuationToken'])
-                res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-                res.raise_for_status()
-                data.update(res.json())
-                data.pop('continuationToken')
+            data = utils.get_all_pages(url, {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
             if return_pandas:
                 js = json.dumps(data['value'])
                 return pd.DataFrame(pd.read_json(io.StringIO(js)))
@@ -206,15 +198,7 @@ class Workspaces():
             if type != None:
                 url += "&type={}".format(type)
             url = url.replace("?&", "?")
-            res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-            res.raise_for_status()
-            data = res.json()
-            while 'continuationToken' in data and data['continuationToken'] != None:
-                url = "https://api.fabric.microsoft.com/v1/admin/workspaces?continuationToken={}".format(data['continuationToken'])
-                res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-                res.raise_for_status()
-                data.update(res.json())
-                data.pop('continuationToken')
+            data = utils.get_all_pages(url, {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
             if return_pandas:
                 js = json.dumps(data['value'])
                 return pd.DataFrame(pd.read_json(io.StringIO(js)))
@@ -277,15 +261,7 @@ class Users():
             url = "https://api.fabric.microsoft.com/v1/admin/users/{}/access".format(user_id)
             if type != None:
                 url += "?type={}".format(type)
-            res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-            res.raise_for_status()
-            data = res.json()
-            while 'continuationToken' in data and data['continuationToken'] != None:
-                url = "https://api.fabric.microsoft.com/v1/admin/users/{}/access?continuationToken={}".format(user_id, data['continuationToken'])
-                res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-                res.raise_for_status()
-                data.update(res.json())
-                data.pop('continuationToken')
+            data = utils.get_all_pages(url, {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
             if return_pandas:
                 js = json.dumps(data['value'])
                 return pd.DataFrame(pd.read_json(io.StringIO(js)))
@@ -22,6 +22,12 @@ import pandas as pd
 import os
 import io
 import base64
+import hashlib
+import threading
+import time
+import collections
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
 
 class Items():
     """Simple library to use the  api and obtain items from it.
@@ -81,17 +87,7 @@ class Items():
             url = "https://api.fabric.microsoft.com/v1/workspaces/{}/items".format(workspace_id)
             if type != None:
                 url += "?type={}".format(type)
-            res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-            res.raise_for_status()
-            data = res.json()
-            while 'continuationToken' in data and data['continuationToken'] != None:
-                url = "https://api.fabric.microsoft.com/v1/workspaces/{}/items?continuationToken={}".format(workspace_id, data['continuationToken'])
-                if type != None:
-                    url += "&type={}".format(type)
-                res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-                res.raise_for_status()
-                data.update(res.json())
-                data.pop('continuationToken')
+            data = utils.get_all_pages(url, {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
             if return_pandas:
                 js = json.dumps(data['value'])
                 return pd.DataFrame(pd.read_json(io.StringIO(js)))
@@ -155,10 +151,11 @@ To create a PowerBI item, the user must have the appropritate license. For more
             }
             if description != None:
                 body["description"]=description
-            if parts != None:
-                body["definition"]={ "Parts": parts }
             headers={'Content-Type': 'application/json; charset=utf-8', "Authorization": "Bearer {}".format(self.token)}
-            res = requests.post(url, data = json.dumps(body), headers = headers)
+            if parts != None:
+                res = requests.post(url, data = utils.build_definition_body(parts, properties=body), headers = headers)
+            else:
+                res = requests.post(url, data = json.dumps(body), headers = headers)
             res.raise_for_status()
             if res.status_code==202:
                 print("Request accepted, item provisioning in progress. Please wait. Operation id: ", res.headers['x-ms-operation-id'])
@@ -189,32 +186,19 @@ To create a PowerBI item, the user must have the appropritate license. For more
         """
         
         try: 
-            op = LongRunningOperations(self.token)
             url= "https://api.fabric.microsoft.com/v1/workspaces/{}/items/{}/getDefinition".format(workspace_id, item_id)
             if format != None:
                 url += "?format={}".format(format)
             headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)}            
             res = requests.post(url, headers = headers)
             res.raise_for_status()
-            if "x-ms-operation-id" in res.headers:
-                opid = res.headers["x-ms-operation-id"]
-                status="Running"
-                while status == "Running":
-                    try:                    
-                        ope = op.get_operation_state(opid)
-                        status = json.loads(ope)["status"]                    
-                    except Exception as e:
-                        print("Error while checking operation status: ", e)
-                        break
-                model = op.get_operation_result(opid)
-                print("Operation ", opid ," completed with status: ", status)
-                return json.loads(model)
-            else:
-                return res.json()
+            return LongRunningOperationsPoller.get_default().wait(res, self.token)
         except requests.exceptions.HTTPError as ex:
             print("HTTP Error: ", ex, "\nText: ", ex.response.text)
         except requests.exceptions.RequestException as e:
             print("Request exception: ", e)
+        except Exception as e:
+            print("Operation error: ", e)
             
     def update_item(self, workspace_id, item_id, displayName=None, description=None):
         """Updates the properties of the specified item.
@@ -271,15 +255,8 @@ To create a PowerBI item, the user must have the appropritate license. For more
         
         try: 
             url= "https://api.fabric.microsoft.com/v1/workspaces/{}/items/{}/updateDefinition".format(workspace_id, item_id)
-            body = {
-                "definition": {
-                    "Parts": parts
-                }
-            }
-            if format != None:
-                body["format"]=format
             headers={'Content-Type': 'application/json; charset=utf-8', "Authorization": "Bearer {}".format(self.token)}            
-            res = requests.post(url, data = json.dumps(body), headers = headers)
+            res = requests.post(url, data = utils.build_definition_body(parts, format), headers = headers)
             res.raise_for_status()            
             if res.status_code==202:
                 print("Request accepted, item provisioning in progress. Please wait. Operation id: ", res.headers['x-ms-operation-id'])
@@ -291,46 +268,203 @@ To create a PowerBI item, the user must have the appropritate license. For more
         except requests.exceptions.RequestException as e:
             print("Request exception: ", e)
 
-    def build_semantic_model_parts(self, item_path):
-        """Build the parts of semantic model for the specified item.
+    def get_definition_changes(self, workspace_id, item_id, parts, format=None):
+        """Compares the current definition of an item with new parts. Semantic models are compared object by object with utils.diff_semantic_models, other items part by part.
         #### Parameters
         ----
-        item_path: str 
-            The semantic model path until [name].Report folder like C:/Users/user/Desktop/[name].SemanticModel or .Dataset
+        workspace_id: str uuid
+            The workspace id. You can take it from Fabric URL
+        item_id: str uuid
+            The item id. You can take it from Fabric URL
+        parts: ItemDefinitionPart[]
+            A list of definition parts like build_semantic_model_parts or build_report_parts.
+        format: str
+            The format of the item definition. By default it's inferred from the parts with get_definition_format, so a model.bim is compared with the TMSL definition.
         ### Returns
         ----
-        Dict with parts of the semantic model
-        """ 
-        parts = []        
+        DataFrame:
+            A pandas DataFrame with the changes. Empty when the definition wouldn't change.
+        """
+        if format is None:
+            format = self.get_definition_format(parts)
+        current = self.get_item_definition(workspace_id, item_id, format)
+        if current is None:
+            raise Exception("The current definition of the item {} could not be requested.".format(item_id))
+        return self.compare_definition(current, parts)
 
-        # Iterate through the files in the item_path
-        for root, dirs, files in os.walk(item_path):
+    def compare_definition(self, current, parts):
+        """Compares a definition requested with get_item_definition with new parts. Semantic models are compared object by object with utils.diff_semantic_models,
+        other items part by part with get_part_content, so the service re-serializing json parts doesn't count as a change.
+        #### Parameters
+        ----
+        current: dict
+            The getDefinition response of the item.
+        parts: ItemDefinitionPart[]
+            A list of definition parts like build_semantic_model_parts or build_report_parts.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with change, object_type, table, name, new_name and properties. Empty when the definition wouldn't change.
+        """
+        paths = [p.get("path") or p.get("Path") for p in parts]
+        if any(p.endswith((".tmdl", "model.bim")) for p in paths):
+            return utils.diff_semantic_models(current, parts)
+        # The .platform files are metadata, only the content parts are compared
+        old = {p["path"]: self.get_part_content(p["path"], p.get("payload")) for p in current["definition"]["parts"] if not p["path"].endswith(".platform")}
+        new = {path: self.get_part_content(path, p.get("payload") or p.get("Payload")) for path, p in zip(paths, parts) if not path.endswith(".platform")}
+        changes = [{"change": "added" if k not in old else "removed" if k not in new else "modified", "object_type": "part", "table": None, "name": k, "new_name": None, "properties": []} for k in sorted(set(old) | set(new)) if old.get(k) != new.get(k)]
+        return pd.DataFrame(changes, columns=["change", "object_type", "table", "name", "new_name", "properties"])
+
+    def get_part_content(self, path, payload):
+        """Returns the content of a definition part to compare it. Json parts are parsed so their formatting is ignored and the datasetReference
+        of definition.pbir is dropped, because build_report_pbir rewrites it to a byConnection reference the service returns in its own shape.
+        #### Parameters
+        ----
+        path: str
+            The part path.
+        payload: str
+            The base64 payload of the part.
+        ### Returns
+        ----
+        object:
+            The parsed json of .json, .pbir and .pbism parts, otherwise the decoded bytes.
+        """
+        content = base64.b64decode(payload or "")
+        if not path.endswith((".json", ".pbir", ".pbism")):
+            return content
+        try:
+            content = json.loads(content.decode("utf-8-sig"))
+        except ValueError:
+            return content
+        if path.endswith("definition.pbir") and isinstance(content, dict):
+            content.pop("datasetReference", None)
+            content.pop("$schema", None)
+        return content
+
+    def get_definition_format(self, parts):
+        """Returns the format of semantic model definition parts.
+        #### Parameters
+        ----
+        parts: ItemDefinitionPart[]
+            A list of definition parts like build_semantic_model_parts.
+        ### Returns
+        ----
+        str:
+            TMSL when there is a model.bim, TMDL when there are .tmdl files, otherwise None.
+        """
+        paths = [p.get("path") or p.get("Path") for p in parts]
+        if any(p.endswith("model.bim") for p in paths):
+            return "TMSL"
+        if any(p.endswith(".tmdl") for p in paths):
+            return "TMDL"
+        return None
+
+    def update_item_definition_if_changed(self, workspace_id, item_id, parts, format=None):
+        """Overrides the definition of an item only when the new parts change it.
+        #### Parameters
+        ----
+        workspace_id: str uuid
+            The workspace id. You can take it from Fabric URL
+        item_id: str uuid
+            The item id. You can take it from Fabric URL
+        parts: ItemDefinitionPart[]
+            A list of definition parts like build_semantic_model_parts or build_report_parts.
+        format: str
+            The format of the item definition. When it's None the current definition is requested in the format of the parts.
+        ### Returns
+        ----
+        Dict:
+            "changes" the DataFrame of get_definition_changes and "response" the response of update_item_definition or None when nothing changed.
+        """
+        changes = self.get_definition_changes(workspace_id, item_id, parts, format)
+        if changes.empty:
+            print("The definition of the item {} has no changes. Update skipped.".format(item_id))
+            return {"changes": changes, "response": None}
+        print("Updating item {} with {} changes".format(item_id, len(changes)))
+        return {"changes": changes, "response": self.update_item_definition(workspace_id, item_id, parts, format)}
+
+    def get_definition_files(self, item_path, max_part_size=None, max_total_size=None):
+        """Lists the files of a PBIP item folder that are parts of its definition with their sizes, before reading them.
+        #### Parameters
+        ----
+        item_path: str 
+            The item path until [name].SemanticModel or [name].Report folder like C:/Users/user/Desktop/[name].SemanticModel
+        max_part_size: int
+            Optional. Maximum base64 size in bytes of a part. An Exception is raised before reading any file when a part is bigger.
+        max_total_size: int
+            Optional. Maximum base64 size in bytes of all the parts together. An Exception is raised before reading any file when the item is bigger.
+        ### Returns
+        ----
+        List:
+            List of dicts with path (relative to the item), file (full path), size and encoded_size in bytes.
+        """
+        files = []
+        for root, dirs, names in os.walk(item_path):
             if os.path.basename(root) == ".pbi":
                 continue
-            for file in files:
+            for file in names:
                 # Skip files with the name "item.*.json"
                 if file.startswith("item.") and file.endswith(".json"):
                     continue
                 if file == "cache.abf":
                     continue
+                full_path = os.path.join(root, file)
+                size = os.path.getsize(full_path)
+                files.append({"path": os.path.relpath(full_path, item_path).replace("\\","/"), "file": full_path, "size": size, "encoded_size": 4 * ((size + 2) // 3)})
+        total = sum(f["encoded_size"] for f in files)
+        print("{} parts, {:.2f} MB encoded".format(len(files), total / 1024 / 1024))
+        if max_part_size != None:
+            big = ["{} ({:.2f} MB)".format(f["path"], f["encoded_size"] / 1024 / 1024) for f in files if f["encoded_size"] > max_part_size]
+            if big != []:
+                raise Exception("Parts bigger than {} bytes: {}".format(max_part_size, ", ".join(big)))
+        if max_total_size != None and total > max_total_size:
+            biggest = sorted(files, key=lambda f: f["encoded_size"], reverse=True)[:5]
+            raise Exception("The definition has {} bytes encoded, more than {}. Biggest parts: {}".format(total, max_total_size, ", ".join(f["path"] for f in biggest)))
+        return files
 
-                # Get the file path relative to the project folder
-                file_path = os.path.relpath(os.path.join(root, file), item_path).replace("\\","/")
-
-                # Read the file contents
-                with open(os.path.join(root, file), "rb") as f:
-                    file_contents = f.read()
+    def encode_definition_files(self, files, contents=None, max_workers=8):
+        """Reads and base64 encodes files in parallel into definition parts.
+        #### Parameters
+        ----
+        files: list
+            The files of get_definition_files.
+        contents: dict
+            Optional. Bytes by relative path that replace the content of a file, like a rewritten definition.pbir.
+        max_workers: int
+            Maximum number of files read at the same time. By default 8.
+        ### Returns
+        ----
+        List:
+            The parts with Path, Payload and PayloadType in the order of the files.
+        """
+        contents = contents or {}
 
-                # Base64-encode the file contents
-                encoded_contents = base64.b64encode(file_contents).decode("utf-8")
+        def encode(f):
+            if f["path"] in contents:
+                payload = base64.b64encode(contents[f["path"]]).decode("utf-8")
+            else:
+                payload = utils.encode_file_base64(f["file"])
+            return {"Path": f["path"], "Payload": payload, "PayloadType": "InlineBase64"}
+        return list(utils.imap_ordered(encode, files, max_workers))
 
-                # Add the file to the Parts array
-                parts.append({
-                    "Path": file_path,
-                    "Payload": encoded_contents,
-                    "PayloadType": "InlineBase64"
-                })
-        return parts
+    def build_semantic_model_parts(self, item_path, max_part_size=None, max_total_size=None, max_workers=8):
+        """Build the parts of semantic model for the specified item.
+        #### Parameters
+        ----
+        item_path: str 
+            The semantic model path until [name].Report folder like C:/Users/user/Desktop/[name].SemanticModel or .Dataset
+        max_part_size: int
+            Optional. Maximum base64 size in bytes of a part, checked before reading the files.
+        max_total_size: int
+            Optional. Maximum base64 size in bytes of the definition, checked before reading the files.
+        max_workers: int
+            Maximum number of files read at the same time. By default 8.
+        ### Returns
+        ----
+        Dict with parts of the semantic model
+        """ 
+        files = self.get_definition_files(item_path, max_part_size, max_total_size)
+        return self.encode_definition_files(files, max_workers=max_workers)
 
     def simple_deploy_semantic_model(self, workspace_id, item_path):
         """Deploys the semantic model for the specified item.
@@ -369,7 +503,66 @@ To create a PowerBI item, the user must have the appropritate license. For more
         except requests.exceptions.RequestException as e:
             print("Request exception: ", e)
             
-    def build_report_parts(self, semantic_model_workspace_id, item_path):
+    def build_report_pbir(self, semantic_model_workspace_id, item_path, semantic_model_ids=None):
+        """Returns the definition.pbir of a report pointing byConnection to the semantic model id in the service.
+        #### Parameters
+        ----
+        semantic_model_workspace_id: str uuid
+            The workspace id of the semantic model of a report. You can take it from Fabric URL
+        item_path: str 
+            The semantic model path until [name].Report folder like C:/Users/user/Git/Folder/[name].Report
+        semantic_model_ids: dict
+            Optional. The semantic model ids by name of the semantic model workspace, so the byPath reference is resolved without listing the workspace items.
+        ### Returns
+        ----
+        bytes:
+            The utf-8 content of the definition.pbir
+        """
+        # Load the JSON file
+        with open(item_path +'/definition.pbir', 'r') as f:
+            pbir_json = json.load(f)
+            
+        # Remove the "byPath" item
+        if 'byPath' in pbir_json['datasetReference']:
+            semantic_model_name = pbir_json['datasetReference']['byPath']['path'].split("/")[-1].split(".")[0]                    
+            print("Looking for id of semantic model {} in workspace id {} related to the report".format(semantic_model_name, semantic_model_workspace_id))
+            try:
+                if semantic_model_ids != None and semantic_model_name in semantic_model_ids:
+                    model_array = [semantic_model_ids[semantic_model_name]]
+                else:
+                    it = self.list_items(semantic_model_workspace_id)
+                    model_array = [i['id'] for i in it['value'] if i['displayName']==semantic_model_name and i['type']=="SemanticModel" ]                            
+                if model_array == []:
+                    raise Exception("Semantic Model {} does not exist in the specified workspace.".format(semantic_model_name))
+                semantic_model_id = model_array[0]
+                print("Semantic model id found: {}".format(semantic_model_id))
+            except Exception as e:
+                print("Error: ", e)                        
+            del pbir_json['datasetReference']['byPath']
+        else:
+            if 'byConnection' in pbir_json['datasetReference']:
+                pairs = [item.strip() for item in pbir_json["datasetReference"]["byConnection"]["connectionString"].split(';') if item.strip()]
+                data_dict = dict(pair.split('=', 1) for pair in pairs)
+                semantic_model_name = data_dict["initial catalog"]
+                semantic_model_id = data_dict["semanticmodelid"]
+                print("Semantic model id found: {}".format(semantic_model_id))
+                
+        if '$schema' in pbir_json:
+            del pbir_json["$schema"]
+        
+        # Add a new JSON object to the "byConnection" property
+        pbir_json['datasetReference']['byConnection'] = {
+            "connectionString": None,
+            "pbiServiceModelId": None,
+            "pbiModelVirtualServerName": "sobe_wowvirtualserver",
+            "pbiModelDatabaseName": semantic_model_id,
+            "name": "EntityDataSource",
+            "connectionType": "pbiServiceXmlaStyleLive"
+        }
+        # Convert the PBIR JSON object to UTF-8 bytes
+        return json.dumps(pbir_json).encode('utf-8')
+
+    def build_report_parts(self, semantic_model_workspace_id, item_path, semantic_model_ids=None, max_part_size=None, max_total_size=None, max_workers=8):
         """Build the parts of report for the specified item.
         #### Parameters
         ----
@@ -377,87 +570,26 @@ To create a PowerBI item, the user must have the appropritate license. For more
             The workspace id of the semantic model of a report. You can take it from Fabric URL
         item_path: str 
             The semantic model path until [name].Report folder like C:/Users/user/Git/Folder/[name].Report
+        semantic_model_ids: dict
+            Optional. The semantic model ids by name of the semantic model workspace, so the byPath reference is resolved without listing the workspace items.
+        max_part_size: int
+            Optional. Maximum base64 size in bytes of a part, checked before reading the files.
+        max_total_size: int
+            Optional. Maximum base64 size in bytes of the definition, checked before reading the files.
+        max_workers: int
+            Maximum number of files read at the same time. By default 8.
         ### Returns
         ----
         Dict with parts of the report
         """     
-        
-        parts = []
-        
-        # Iterate through the files in the item_path
-        for root, dirs, files in os.walk(item_path):
-            # Skip folders with the name ".pbi"
-            if os.path.basename(root) == ".pbi":
-                continue
-
-            for file in files:
-                # Skip files with the name "item.*.json"
-                if file.startswith("item.") and file.endswith(".json"):
-                    continue
-                if file == "cache.abf":
-                    continue
-                if file.endswith(".pbir"):
-                    # Load the JSON file
-                    with open(item_path +'/definition.pbir', 'r') as f:
-                        pbir_json = json.load(f)
-                        
-                    # Remove the "byPath" item
-                    if 'byPath' in pbir_json['datasetReference']:
-                        semantic_model_name = pbir_json['datasetReference']['byPath']['path'].split("/")[-1].split(".")[0]                    
-                        print("Looking for id of semantic model {} in workspace id {} related to the report".format(semantic_model_name, semantic_model_workspace_id))
-                        try:
-                            it = self.list_items(semantic_model_workspace_id)
-                            model_array = [i['id'] for i in it['value'] if i['displayName']==semantic_model_name and i['type']=="SemanticModel" ]                            
-                            if model_array == []:
-                                raise Exception("Semantic Model {} does not exist in the specified workspace.".format(semantic_model_name))
-                            semantic_model_id = model_array[0]
-                            print("Semantic model id found: {}".format(semantic_model_id))
-                        except Exception as e:
-                            print("Error: ", e)                        
-                        del pbir_json['datasetReference']['byPath']
-                    else:
-                        if 'byConnection' in pbir_json['datasetReference']:
-                            pairs = [item.strip() for item in pbir_json["datasetReference"]["byConnection"]["connectionString"].split(';') if item.strip()]
-                            data_dict = dict(pair.split('=', 1) for pair in pairs)
-                            semantic_model_name = data_dict["initial catalog"]
-                            semantic_model_id = data_dict["semanticmodelid"]
-                            print("Semantic model id found: {}".format(semantic_model_id))
-                            
-                    if '$schema' in pbir_json:
-                        del pbir_json["$schema"]
-                    
-                    # Add a new JSON object to the "byConnection" property
-                    pbir_json['datasetReference']['byConnection'] = {
-                        "connectionString": None,
-                        "pbiServiceModelId": None,
-                        "pbiModelVirtualServerName": "sobe_wowvirtualserver",
-                        "pbiModelDatabaseName": semantic_model_id,
-                        "name": "EntityDataSource",
-                        "connectionType": "pbiServiceXmlaStyleLive"
-                    }
-                    # Convert the PBIR JSON object to a string
-                    pbir_json_str = json.dumps(pbir_json)
-                    
-                    # Convert the string to UTF-8 bytes
-                    file_contents = pbir_json_str.encode('utf-8')
-                else:            
-                    # Read the file contents
-                    with open(os.path.join(root, file), "rb") as f:
-                        file_contents = f.read()
-                
-                # Get the file path relative to the project folder
-                file_path = os.path.relpath(os.path.join(root, file), item_path).replace("\\","/")
-            
-                # Base64-encode the file contents
-                encoded_contents = base64.b64encode(file_contents).decode("utf-8")
+        files = self.get_definition_files(item_path, max_part_size, max_total_size)
+        contents = {}
+        pbir = [f["path"] for f in files if f["path"].endswith(".pbir")]
+        if pbir != []:
+            content = self.build_report_pbir(semantic_model_workspace_id, item_path, semantic_model_ids)
+            contents = {path: content for path in pbir}
+        return self.encode_definition_files(files, contents, max_workers)
 
-                # Add the file to the Parts array
-                parts.append({
-                    "Path": file_path,
-                    "Payload": encoded_contents,
-                    "PayloadType": "InlineBase64"
-                })
-        return parts
 
     def simple_deploy_report(self, report_workspace_id, semantic_model_workspace_id, item_path):
         """Deploys the semantic model for the specified item.
@@ -997,15 +1129,7 @@ class Workspaces():
             url = "https://api.fabric.microsoft.com/v1/workspaces"
             if roles != None:
                 url = "https://api.fabric.microsoft.com/v1/workspaces?role={}".format(roles)
-            res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-            res.raise_for_status()
-            data = res.json()
-            while 'continuationToken' in data and data['continuationToken'] != None:
-                url = "https://api.fabric.microsoft.com/v1/workspaces?role={}&continuationToken={}".format(roles, data['continuationToken'])
-                res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-                res.raise_for_status()
-                data.update(res.json())
-                data.pop('continuationToken')
+            data = utils.get_all_pages(url, {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
             if return_pandas:
                 js = json.dumps(data['value'])
                 return pd.DataFrame(pd.read_json(io.StringIO(js)))
@@ -1228,15 +1352,7 @@ class Onelake():
         """
         try:
             url = "https://api.fabric.microsoft.com/v1/workspaces/{}/items/{}/dataAccessRoles".format(workspace_id, item_id)
-            res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-            res.raise_for_status()
-            data = res.json()
-            while 'continuationToken' in data and data['continuationToken'] != None:
-                url = "https://api.fabric.microsoft.com/v1/workspaces/{}/items/{}/dataAccessRoles?continuationToken={}".format(workspace_id, item_id, data['continuationToken'])
-                res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-                res.raise_for_status()
-                data.update(res.json())
-                data.pop('continuationToken')
+            data = utils.get_all_pages(url, {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
             if return_pandas:
                 js = json.dumps(data['value'])
                 return pd.DataFrame(pd.read_json(io.StringIO(js)))
@@ -1288,6 +1404,191 @@ class LongRunningOperations():
         res = requests.get("https://api.fabric.microsoft.com/v1/operations/{}/result".format(operation_id), headers=headers)
         return res.text
     
+class LongRunningOperationsPoller():
+    """Tracks many Fabric long running operations from a single background thread. Each operation is checked when its Retry-After
+    time is due, NotStarted and Running are pending states and a future is resolved with the result or the error of the operation.
+    """
+    default = None
+    default_lock = threading.Lock()
+
+    def __init__(self, poll_interval=2, max_workers=8, max_errors=5, timeout=3600):
+        """Create a poller of long running operations. Use LongRunningOperationsPoller.get_default() to share one poller.
+        Args:
+            poll_interval: float
+                Seconds between checks of an operation when the API doesn't send Retry-After. By default 2.
+            max_workers: int
+                Maximum number of concurrent status requests. By default 8.
+            max_errors: int
+                Consecutive request errors of an operation before its future fails. By default 5.
+            timeout: float
+                Default maximum seconds wait() waits for an operation. By default 3600.
+        """
+        self.poll_interval = poll_interval
+        self.max_workers = max_workers
+        self.max_errors = max_errors
+        self.timeout = timeout
+        self.operations = {}
+        self.condition = threading.Condition()
+        self.thread = None
+
+    @classmethod
+    def get_default(cls):
+        """Returns the poller shared by the whole process, so operations started by different methods are polled together.
+        ### Returns
+        ----
+        LongRunningOperationsPoller:
+            The shared poller.
+        """
+        with cls.default_lock:
+            if cls.default is None:
+                cls.default = cls()
+            return cls.default
+
+    def submit(self, res, token, result=True):
+        """Tracks the operation started by a response.
+        ### Parameters
+        ----
+        res: Response
+            Response object from requests library of the request that started the operation. A 200 or 201 response is resolved at once with its body.
+        token: str
+            Bearer Token to check the operation.
+        result: bool
+            Request the result of the operation when it succeeds, like getDefinition. Use False for operations without result like updateDefinition. By default True.
+        ### Returns
+        ----
+        Future:
+            A concurrent.futures.Future with the result dict, the final state dict when result is False, or the exception of a failed operation.
+        """
+        future = Future()
+        if res.status_code != 202:
+            future.set_result(res.json() if res.content else None)
+            return future
+        operation_id = res.headers.get("x-ms-operation-id")
+        url = res.headers.get("Location")
+        if url is None and operation_id is None:
+            future.set_exception(Exception("The response has no x-ms-operation-id nor Location header to track the operation."))
+            return future
+        if url is None:
+            url = "https://api.fabric.microsoft.com/v1/operations/{}".format(operation_id)
+        operation = {"id": operation_id, "url": url, "key": operation_id or url, "token": token, "result": result, "future": future, "errors": 0,
+                     "check_at": time.monotonic() + utils.get_retry_after(res, self.poll_interval)}
+        with self.condition:
+            self.operations[operation["key"]] = operation
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name="LongRunningOperationsPoller", daemon=True)
+                self.thread.start()
+            self.condition.notify()
+        return future
+
+    def wait(self, res, token, result=True, timeout=None):
+        """Tracks the operation started by a response and waits for it.
+        ### Parameters
+        ----
+        res: Response
+            Response object from requests library of the request that started the operation.
+        token: str
+            Bearer Token to check the operation.
+        result: bool
+            Request the result of the operation when it succeeds. By default True.
+        timeout: float
+            Maximum seconds to wait. By default the timeout of the poller.
+        ### Returns
+        ----
+        Dict:
+            The result of the operation. It raises an Exception when the operation fails or the timeout expires.
+        """
+        future = self.submit(res, token, result)
+        try:
+            return future.result(timeout if timeout is not None else self.timeout)
+        except FutureTimeoutError:
+            # Stop polling an operation nobody waits for
+            future.cancel()
+            raise Exception("The operation didn't finish in {} seconds.".format(timeout if timeout is not None else self.timeout))
+
+    def run(self):
+        """Loop of the background thread. It sleeps until the next operation is due and checks every due operation concurrently.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                with self.condition:
+                    for key in [k for k, o in self.operations.items() if o["future"].cancelled()]:
+                        del self.operations[key]
+                    if not self.operations:
+                        # Keep the thread alive for a while in case other operations start
+                        if not self.condition.wait(60) and not self.operations:
+                            self.thread = None
+                            return
+                        continue
+                    wait = min(o["check_at"] for o in self.operations.values()) - time.monotonic()
+                    if wait > 0:
+                        self.condition.wait(wait)
+                        continue
+                    now = time.monotonic()
+                    due = [o for o in self.operations.values() if o["check_at"] <= now]
+                list(executor.map(self.check, due))
+
+    def check(self, operation):
+        """Requests the state of an operation and resolves its future when it ends.
+        ### Parameters
+        ----
+        operation: dict
+            The operation tracked by submit.
+        """
+        headers = {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(operation["token"])}
+        try:
+            res = requests.get(operation["url"], headers=headers)
+            if res.status_code == 429:
+                operation["check_at"] = time.monotonic() + utils.get_retry_after(res, self.poll_interval * 5)
+                return
+            res.raise_for_status()
+            state = res.json()
+            status = state.get("status")
+            if status in ("NotStarted", "Running"):
+                operation["errors"] = 0
+                operation["check_at"] = time.monotonic() + utils.get_retry_after(res, self.poll_interval)
+                return
+            if status == "Succeeded":
+                if operation["result"]:
+                    url = res.headers.get("Location")
+                    if url is None:
+                        url = "https://api.fabric.microsoft.com/v1/operations/{}/result".format(operation["id"]) if operation["id"] else operation["url"].rstrip("/") + "/result"
+                    value = utils.request_with_retry("GET", url, headers=headers).json()
+                else:
+                    value = state
+                self.finish(operation, value)
+            else:
+                error = state.get("error") or {}
+                self.finish(operation, exception=Exception("Operation {} ended with status {}: {}".format(operation["key"], status, error.get("message", error))))
+        except requests.exceptions.RequestException as e:
+            operation["errors"] = operation["errors"] + 1
+            if operation["errors"] >= self.max_errors:
+                self.finish(operation, exception=e)
+            else:
+                operation["check_at"] = time.monotonic() + self.poll_interval
+        except Exception as e:
+            # Any other error fails this operation only, the thread keeps polling the rest
+            self.finish(operation, exception=e)
+
+    def finish(self, operation, value=None, exception=None):
+        """Stops tracking an operation and resolves its future.
+        ### Parameters
+        ----
+        operation: dict
+            The operation tracked by submit.
+        value: dict
+            The result of the operation.
+        exception: Exception
+            The error of the operation.
+        """
+        with self.condition:
+            self.operations.pop(operation["key"], None)
+        if not operation["future"].set_running_or_notify_cancel():
+            return
+        if exception is not None:
+            operation["future"].set_exception(exception)
+        else:
+            operation["future"].set_result(value)
+
 class Folders():
     """Simple library to use the Folders api and obtain folder information from it.
     """
@@ -1384,15 +1685,7 @@ class Folders():
         """
         try:
             url = "https://api.fabric.microsoft.com/v1/workspaces/{}/folders".format(workspace_id)
-            res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-            res.raise_for_status()
-            data = res.json()
-            while 'continuationToken' in data and data['continuationToken'] != None:
-                url = "https://api.fabric.microsoft.com/v1/workspaces/{}/folders?continuationToken={}".format(workspace_id, data['continuationToken'])
-                res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-                res.raise_for_status()
-                data.update(res.json())
-                data.pop('continuationToken')
+            data = utils.get_all_pages(url, {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
             return data
         except requests.exceptions.HTTPError as ex:
             print("HTTP Error: ", ex, "\nText: ", ex.response.text)
@@ -1542,17 +1835,8 @@ class Connections():
         """
         try:
             url = "https://api.fabric.microsoft.com/v1/connections"
-            res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-            res.raise_for_status()
-            data = res.json()
-            while 'continuationToken' in data and data['continuationToken'] != None:
-                url = "https://api.fabric.microsoft.com/v1/connections?continuationToken={}".format(data['continuationToken'])
-                res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
-                res.raise_for_status()
-                data.update(res.json())
-                data.pop('continuationToken')
-
-            return res.json()
+            data = utils.get_all_pages(url, {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
+            return data
         except requests.exceptions.HTTPError as ex:
             print("HTTP Error: ", ex, "\nText: ", ex.response.text)
         except requests.exceptions.RequestException as e:
@@ -1631,15 +1915,7 @@ class Connections():
         try:
             url = "https://api.fabric.microsoft.com/v1/connections/{}/roleAssignments".format(connection_id)
             headers = {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)}
-            res = requests.get(url, headers=headers)
-            res.raise_for_status()
-            data = res.json()
-            while 'continuationToken' in data and data['continuationToken'] != None:
-                url = "https://api.fabric.microsoft.com/v1/connections/{}/roleAssignments?continuationToken={}".format(connection_id, data['continuationToken'])
-                res = requests.get(url, headers=headers)
-                res.raise_for_status()
-                data.update(res.json())
-                data.pop('continuationToken')
+            data = utils.get_all_pages(url, headers)
             return data
         except requests.exceptions.HTTPError as ex:
             print("HTTP Error: ", ex, "\nText: ", ex.response.text)
@@ -1719,4 +1995,802 @@ class Connections():
         except requests.exceptions.HTTPError as ex:
             print("HTTP Error: ", ex, "\nText: ", ex.response.text)
         except requests.exceptions.RequestException as e:
-            print("Request exception: ", e)
\ No newline at end of file
+            print("Request exception: ", e)
+
+class DefinitionCache():
+    """Keeps item definitions on the local disk so unchanged items don't run the getDefinition long running operation again.
+    Entries are keyed by workspace, item and format and validated against the item last modified date.
+    """
+
+    def __init__(self, token, cache_dir, max_size_mb=512, last_modified_ttl=60):
+        """Create a simplePBI definition cache. Validation needs the last modified dates: either a token with Fabric admin permissions
+        (Tenant.Read.All) or dates loaded from a tenant scan with load_last_modified. Without them nothing is cached.
+        Args:
+            token: String
+                Bearer Token to use the Rest API. The last modified dates are requested with the Fabric admin API unless they are loaded with load_last_modified.
+            cache_dir: str
+                Folder where the definitions are stored.
+            max_size_mb: float
+                Maximum size of the folder in MB. The least recently used definitions are removed over it. By default 512.
+            last_modified_ttl: float
+                Seconds a last modified date is trusted before it's requested again. Use 0 to request it on every get_item_definition. By default 60.
+        """
+        self.token = token
+        self.cache_dir = cache_dir
+        self.max_size = max_size_mb * 1024 * 1024
+        self.last_modified_ttl = last_modified_ttl
+        self.last_modified = {}
+        self.admin_api = True
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def load_last_modified(self, items):
+        """Loads the last modified dates of many items at once, e.g. from a tenant scan, so validation doesn't request each item during last_modified_ttl.
+        ### Parameters
+        ----
+        items: dict or list
+            The response of simplepbi.fabric.adminfab.Items.list_items or its "value" list. Items need id and lastUpdatedDate.
+        ### Returns
+        ----
+        None
+        """
+        if isinstance(items, dict):
+            items = items.get("value", [])
+        for item in items:
+            if item.get("lastUpdatedDate") != None:
+                self.last_modified[item["id"]] = (item["lastUpdatedDate"], time.monotonic())
+
+    def invalidate(self, item_id=None):
+        """Forgets the last modified date of an item, or of every item, so it's requested again.
+        ### Parameters
+        ----
+        item_id: str uuid
+            The item id. By default every item.
+        """
+        if item_id is None:
+            self.last_modified.clear()
+        else:
+            self.last_modified.pop(item_id, None)
+
+    def get_last_modified(self, workspace_id, item_id, type):
+        """Returns the last modified date of an item from the dates loaded or requested less than last_modified_ttl seconds ago, otherwise from the Fabric admin API.
+        When the token has no admin permissions a warning is printed once and the admin API isn't requested again, only loaded dates are used.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The workspace id. You can take it from Fabric URL
+        item_id: str uuid
+            The item id. You can take it from Fabric URL
+        type: str
+            The item type, e.g. SemanticModel or Report.
+        ### Returns
+        ----
+        str:
+            The lastUpdatedDate of the item or None when it is unknown.
+        """
+        entry = self.last_modified.get(item_id)
+        if entry is not None and time.monotonic() - entry[1] < self.last_modified_ttl:
+            return entry[0]
+        if not self.admin_api:
+            return entry[0] if entry is not None else None
+        try:
+            url = "https://api.fabric.microsoft.com/v1/admin/workspaces/{}/items/{}?type={}".format(workspace_id, item_id, type)
+            res = requests.get(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
+            if res.status_code in (401, 403):
+                self.admin_api = False
+                print("Warning: the token can't read item metadata with the Fabric admin API (HTTP {}), definitions won't be cached. "
+                      "Use a token with Fabric admin permissions or load the last modified dates of a tenant scan with load_last_modified.".format(res.status_code))
+                return entry[0] if entry is not None else None
+            res.raise_for_status()
+            item = res.json()
+        except requests.exceptions.HTTPError as ex:
+            print("HTTP Error: ", ex, "\nText: ", ex.response.text)
+            item = None
+        except requests.exceptions.RequestException as e:
+            print("Request exception: ", e)
+            item = None
+        if item is None or item.get("lastUpdatedDate") is None:
+            self.last_modified.pop(item_id, None)
+            return None
+        self.last_modified[item_id] = (item["lastUpdatedDate"], time.monotonic())
+        return item["lastUpdatedDate"]
+
+    def get_path(self, workspace_id, item_id, format=None):
+        """Returns the cache file of a definition.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The workspace id. You can take it from Fabric URL
+        item_id: str uuid
+            The item id. You can take it from Fabric URL
+        format: str
+            The format of the item definition.
+        ### Returns
+        ----
+        str:
+            The path of the json file.
+        """
+        key = hashlib.sha256("{}|{}|{}".format(workspace_id, item_id, format or "").encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def get_item_definition(self, workspace_id, item_id, type, format=None):
+        """Returns the definition of an item from the disk when it wasn't modified after it was cached, otherwise requests and caches it.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The workspace id. You can take it from Fabric URL
+        item_id: str uuid
+            The item id. You can take it from Fabric URL
+        type: str
+            The item type, e.g. SemanticModel or Report.
+        format: str
+            The format of the item definition, e.g. TMDL or TMSL for semantic models.
+        ### Returns
+        ----
+        Dict:
+            A dictionary containing the definition of the item.
+        """
+        path = self.get_path(workspace_id, item_id, format)
+        modified = self.get_last_modified(workspace_id, item_id, type)
+        if modified != None and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+                if entry["lastModified"] == modified:
+                    # Access time drives the eviction order
+                    os.utime(path)
+                    return entry["definition"]
+            except (OSError, ValueError, KeyError) as e:
+                print("Ignoring corrupted cache entry {}: {}".format(path, e))
+        definition = Items(self.token).get_item_definition(workspace_id, item_id, format)
+        if definition is None:
+            return None
+        if modified != None:
+            entry = {"workspaceId": workspace_id, "itemId": item_id, "format": format, "lastModified": modified, "definition": definition}
+            temp = "{}.{}.tmp".format(path, threading.get_ident())
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(temp, path)
+            self.evict()
+        return definition
+
+    def evict(self):
+        """Removes the least recently used definitions until the folder is under the maximum size.
+        ### Returns
+        ----
+        int:
+            Number of removed definitions.
+        """
+        with self.lock:
+            files = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                    files.append((stat.st_mtime, stat.st_size, name))
+            total = sum(f[1] for f in files)
+            removed = 0
+            for mtime, size, name in sorted(files):
+                if total <= self.max_size:
+                    break
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            return removed
+
+    def clear(self):
+        """Removes every cached definition.
+        ### Returns
+        ----
+        None
+        """
+        with self.lock:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+class DefinitionExporter():
+    """Exports the definitions of many items to a local repository layout: path/workspace/item.Type/files.
+    getDefinition operations run concurrently, they are polled together by the shared LongRunningOperationsPoller and only files whose content changed are rewritten.
+    """
+
+    def __init__(self, token, path, max_operations=8, max_workers=8, poller=None):
+        """Create a simplePBI definition exporter
+        Args:
+            token: String
+                Bearer Token to use the Rest API
+            path: str
+                The local folder of the repository. Like C:/Users/user/Repository
+            max_operations: int
+                Maximum number of getDefinition operations running at the same time. By default 8.
+            max_workers: int
+                Maximum number of threads to list the items. By default 8.
+            poller: LongRunningOperationsPoller
+                The poller of the getDefinition operations. By default the shared poller.
+        """
+        self.token = token
+        self.path = path
+        self.max_operations = max_operations
+        self.max_workers = max_workers
+        self.poller = poller or LongRunningOperationsPoller.get_default()
+        self.headers = {'Content-Type': 'application/json', "Authorization": "Bearer {}".format(token)}
+
+    def list_items(self, workspace_ids=None, types=("SemanticModel", "Report")):
+        """Lists the items to export from the workspaces concurrently.
+        ### Parameters
+        ----
+        workspace_ids: list
+            List of workspace ids. By default every workspace the user has access to.
+        types: tuple
+            The item types to export. By default ("SemanticModel", "Report").
+        ### Returns
+        ----
+        List:
+            List of dicts with workspaceId, workspaceName, id, displayName and type.
+        """
+        res = Workspaces(self.token).list_workspaces()
+        if res is None:
+            raise Exception("Workspaces could not be requested.")
+        names = {w["id"]: w["displayName"] for w in res.get("value", [])}
+        if workspace_ids is None:
+            workspace_ids = list(names.keys())
+        requests_list = [(w, t) for w in workspace_ids for t in types]
+
+        def run(item):
+            return Items(self.token).list_items(item[0], type=item[1])
+
+        items = []
+        for (workspace_id, type), res in zip(requests_list, utils.imap_ordered(run, requests_list, self.max_workers)):
+            if res is None:
+                print("{} items of workspace {} could not be requested.".format(type, workspace_id))
+                continue
+            items.extend({"workspaceId": workspace_id, "workspaceName": names.get(workspace_id, workspace_id), "id": i["id"], "displayName": i["displayName"], "type": i["type"]} for i in res.get("value", []))
+        return items
+
+    def get_definition(self, item):
+        """Requests the definition of an item. The operation is tracked by the shared LongRunningOperationsPoller.
+        ### Parameters
+        ----
+        item: dict
+            An item of list_items.
+        ### Returns
+        ----
+        Dict:
+            The getDefinition result. It raises an Exception when the request or the operation fails.
+        """
+        url = "https://api.fabric.microsoft.com/v1/workspaces/{}/items/{}/getDefinition".format(item["workspaceId"], item["id"])
+        res = utils.request_with_retry("POST", url, headers=self.headers)
+        return self.poller.wait(res, self.token)
+
+    def get_item_folder(self, item):
+        """Returns the local folder of an item.
+        ### Parameters
+        ----
+        item: dict
+            An item of list_items.
+        ### Returns
+        ----
+        str:
+            path/workspace name/item name.Type
+        """
+        return os.path.join(self.path, item["workspaceName"], "{}.{}".format(item["displayName"], item["type"]))
+
+    def write_item(self, item, definition, report_connection=None, prune=False):
+        """Writes the parts of an item definition, skipping the files that already have the same content.
+        ### Parameters
+        ----
+        item: dict
+            An item of list_items.
+        definition: dict
+            The getDefinition result.
+        report_connection: str
+            For reports, 'Import' points the definition.pbir to the local semantic model folder like save_report_definition_local.
+        prune: bool
+            Remove local files of the item that are no longer in the definition. By default False.
+        ### Returns
+        ----
+        Dict:
+            The item with status, written, unchanged and removed file counts.
+        """
+        folder = self.get_item_folder(item)
+        written = unchanged = removed = 0
+        paths = set()
+        for part in definition.get("definition", {}).get("parts", []):
+            content = base64.b64decode(part["payload"])
+            if report_connection == "Import" and part["path"] == "definition.pbir":
+                pbir = json.loads(content)
+                pbir['datasetReference']['byPath'] = {"path": "../" + item["displayName"] + ".SemanticModel"}
+                pbir['datasetReference'].pop('byConnection', None)
+                content = json.dumps(pbir).encode()
+            full_path = os.path.normpath(os.path.join(folder, part["path"]))
+            paths.add(full_path)
+            if utils.write_file_if_changed(full_path, content):
+                written += 1
+            else:
+                unchanged += 1
+        if prune and os.path.isdir(folder):
+            for root, dirs, files in os.walk(folder):
+                for file in files:
+                    full_path = os.path.normpath(os.path.join(root, file))
+                    if full_path not in paths:
+                        os.remove(full_path)
+                        removed += 1
+        return dict(item, status="exported", written=written, unchanged=unchanged, removed=removed, error=None)
+
+    def export_item(self, item, report_connection=None, prune=False):
+        """Requests the definition of an item and writes it.
+        ### Parameters
+        ----
+        item: dict
+            An item of list_items.
+        report_connection: str
+            Read write_item.
+        prune: bool
+            Read write_item.
+        ### Returns
+        ----
+        Dict:
+            The item with status (exported or failed), written, unchanged and removed file counts and error.
+        """
+        try:
+            return self.write_item(item, self.get_definition(item), report_connection, prune)
+        except requests.exceptions.HTTPError as ex:
+            return dict(item, status="failed", written=0, unchanged=0, removed=0, error="{} {}".format(ex, ex.response.text))
+        except Exception as e:
+            return dict(item, status="failed", written=0, unchanged=0, removed=0, error=str(e))
+
+    def export(self, items=None, workspace_ids=None, types=("SemanticModel", "Report"), report_connection=None, prune=False):
+        """Exports the definitions of the items keeping up to max_operations getDefinition operations running.
+        The operations are polled together by the shared LongRunningOperationsPoller honoring Retry-After.
+        ### Parameters
+        ----
+        items: list
+            Optional. The items to export as returned by list_items. By default the items of workspace_ids.
+        workspace_ids: list
+            List of workspace ids used when items is None. By default every workspace the user has access to.
+        types: tuple
+            The item types to export when items is None. By default ("SemanticModel", "Report").
+        report_connection: str
+            For reports, 'Import' points the definition.pbir to the local semantic model folder. By default the live connection is kept.
+        prune: bool
+            Remove local files of the items that are no longer in their definitions. By default False.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with workspaceId, workspaceName, id, displayName, type, status, written, unchanged, removed and error by item.
+        """
+        if items is None:
+            items = self.list_items(workspace_ids, types)
+        results = list(utils.imap_ordered(lambda item: self.export_item(item, report_connection, prune), items, self.max_operations))
+        df = pd.DataFrame(results, columns=["workspaceId", "workspaceName", "id", "displayName", "type", "status", "written", "unchanged", "removed", "error"])
+        print("Items exported: {}, failed: {}, files written: {}".format(int((df["status"] == "exported").sum()), int((df["status"] == "failed").sum()), int(df["written"].sum())))
+        return df
+
+class RepositoryDeployer():
+    """Deploys every .SemanticModel and .Report item of a PBIP repository folder to a workspace.
+    Item ids are resolved from one cached listing by workspace, semantic models are deployed before the reports that reference them and independent items run concurrently.
+    """
+
+    def __init__(self, token, workspace_id, semantic_model_workspace_id=None, max_workers=4, poller=None, manifest_path=None, max_part_size=None, max_total_size=None):
+        """Create a simplePBI repository deployer
+        Args:
+            token: String
+                Bearer Token to use the Rest API
+            workspace_id: str uuid
+                The destination workspace id. You can take it from Fabric URL
+            semantic_model_workspace_id: str uuid
+                The workspace id of the semantic models used by byPath references of reports that are not in the repository. By default workspace_id.
+            max_workers: int
+                Maximum number of items deployed at the same time. By default 4.
+            poller: LongRunningOperationsPoller
+                The poller of the create and update operations. By default the shared poller.
+            manifest_path: str
+                Optional. Json file with the part hashes of the deployed items for incremental deployments. Like C:/Users/user/Git/Folder/.deployment.json
+            max_part_size: int
+                Optional. Maximum base64 size in bytes of a part. Items with bigger parts fail before reading their files.
+            max_total_size: int
+                Optional. Maximum base64 size in bytes of an item definition. Bigger items fail before reading their files.
+        """
+        self.token = token
+        self.workspace_id = workspace_id
+        self.semantic_model_workspace_id = semantic_model_workspace_id or workspace_id
+        self.max_workers = max_workers
+        self.poller = poller or LongRunningOperationsPoller.get_default()
+        self.items = Items(token)
+        self.item_ids = {}
+        self.deployed_models = {}
+        self.lock = threading.Lock()
+        self.workspace_locks = {}
+        self.manifest_path = manifest_path
+        self.max_part_size = max_part_size
+        self.max_total_size = max_total_size
+        self.manifest = {}
+        if manifest_path != None and os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    def find_items(self, path):
+        """Returns the items of a repository folder.
+        ### Parameters
+        ----
+        path: str
+            The repository folder like C:/Users/user/Git/Folder
+        ### Returns
+        ----
+        List:
+            List of dicts with name, type (SemanticModel or Report), path and model, the semantic model name of a byPath report reference.
+        """
+        found = []
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d != ".pbi" and not d.startswith(".git")]
+            name, extension = os.path.splitext(os.path.basename(root))
+            if extension in (".SemanticModel", ".Dataset"):
+                found.append({"name": name, "type": "SemanticModel", "path": root, "model": None})
+                dirs[:] = []
+            elif extension == ".Report":
+                model = None
+                pbir_path = os.path.join(root, "definition.pbir")
+                if os.path.exists(pbir_path):
+                    with open(pbir_path, "r", encoding="utf-8-sig") as f:
+                        reference = json.load(f).get("datasetReference", {})
+                    if "byPath" in reference:
+                        model = os.path.splitext(os.path.basename(reference["byPath"]["path"].replace("\\", "/").rstrip("/")))[0]
+                found.append({"name": name, "type": "Report", "path": root, "model": model})
+                dirs[:] = []
+        return sorted(found, key=lambda i: (i["type"] != "SemanticModel", i["name"]))
+
+    def get_item_ids(self, workspace_id, type, refresh=False):
+        """Returns the item ids by display name of a type in a workspace. The workspace is listed once and cached.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The workspace id. You can take it from Fabric URL
+        type: str
+            The item type like SemanticModel or Report.
+        refresh: bool
+            List the workspace again. By default False.
+        ### Returns
+        ----
+        Dict:
+            The item ids by display name.
+        """
+        with self.lock:
+            workspace_lock = self.workspace_locks.setdefault(workspace_id, threading.Lock())
+        # Only the threads that need the same workspace wait for its listing
+        with workspace_lock:
+            if refresh or workspace_id not in self.item_ids:
+                res = self.items.list_items(workspace_id)
+                if res is None:
+                    raise Exception("The items of the workspace {} could not be listed.".format(workspace_id))
+                ids = {}
+                for i in res.get("value", []):
+                    ids.setdefault(i["type"], {})[i["displayName"]] = i["id"]
+                with self.lock:
+                    self.item_ids[workspace_id] = ids
+        with self.lock:
+            return self.item_ids[workspace_id].setdefault(type, {})
+
+    def get_parts_hashes(self, parts):
+        """Returns the hash of every part. The .platform metadata is ignored because the service rewrites it.
+        ### Parameters
+        ----
+        parts: list
+            Parts like build_semantic_model_parts or the parts of a getDefinition result.
+        ### Returns
+        ----
+        Dict:
+            The sha256 of the payload by part path.
+        """
+        hashes = {}
+        for part in parts:
+            path = part.get("Path") or part.get("path")
+            if not path.endswith(".platform"):
+                hashes[path] = hashlib.sha256((part["Payload"] if "Payload" in part else part["payload"]).encode("utf-8")).hexdigest()
+        return hashes
+
+    def get_changed_parts(self, item, item_id, hashes, parts):
+        """Compares the part hashes of an item with the manifest or, when the item isn't in the manifest, its parts with its remote definition
+        through Items.compare_definition, the same comparison of Items.update_item_definition_if_changed.
+        ### Parameters
+        ----
+        item: dict
+            An item of find_items.
+        item_id: str uuid
+            The id of the item in the workspace.
+        hashes: dict
+            The local hashes of get_parts_hashes.
+        parts: list
+            The local parts of the item.
+        ### Returns
+        ----
+        List:
+            The paths of the added, removed or modified parts or, for a semantic model without manifest entry, its changed objects like "measure Sales/Total".
+        """
+        entry = self.manifest.get("{}/{}/{}".format(self.workspace_id, item["type"], item["name"]))
+        if entry is not None and entry.get("id") == item_id:
+            remote = entry["parts"]
+            return sorted(k for k in set(hashes) | set(remote) if hashes.get(k) != remote.get(k))
+        # Request the remote definition in the format of the local parts, e.g. TMSL for a model.bim
+        definition = self.items.get_item_definition(self.workspace_id, item_id, self.items.get_definition_format(parts))
+        if definition is None:
+            return sorted(hashes)
+        changes = self.items.compare_definition(definition, parts)
+        return sorted({c["name"] if c["object_type"] == "part" else "{} {}".format(c["object_type"], "/".join(n for n in (c["table"], c["name"]) if isinstance(n, str))) for c in changes.to_dict("records")})
+
+    def deploy_item(self, item, incremental=False):
+        """Creates or updates an item and waits for its operation.
+        ### Parameters
+        ----
+        item: dict
+            An item of find_items.
+        incremental: bool
+            Skip the update when no part changed. Read get_changed_parts. By default False.
+        ### Returns
+        ----
+        Dict:
+            The item with id, action (created, updated or unchanged), status (deployed or failed), changed parts and error.
+        """
+        try:
+            ids = self.get_item_ids(self.workspace_id, item["type"])
+            if item["type"] == "SemanticModel":
+                parts = self.items.build_semantic_model_parts(item["path"], self.max_part_size, self.max_total_size)
+            else:
+                parts = self.items.build_report_parts(self.semantic_model_workspace_id, item["path"], self.get_semantic_model_ids(item), self.max_part_size, self.max_total_size)
+            item_id = ids.get(item["name"])
+            hashes = self.get_parts_hashes(parts)
+            changed = sorted(hashes)
+            if incremental and item_id is not None:
+                changed = self.get_changed_parts(item, item_id, hashes, parts)
+                if changed == []:
+                    print("{} {} has no changes. Update skipped.".format(item["type"], item["name"]))
+                    self.update_manifest(item, item_id, hashes)
+                    return dict(item, id=item_id, action="unchanged", status="deployed", changed=changed, error=None)
+                print("{} {} changed parts: {}".format(item["type"], item["name"], ", ".join(changed)))
+            if item_id is None:
+                res = self.items.create_item(self.workspace_id, item["name"], item["type"], None, parts)
+                action = "created"
+            else:
+                res = self.items.update_item_definition(self.workspace_id, item_id, parts)
+                action = "updated"
+            if res is None:
+                raise Exception("The {} request failed.".format("create" if item_id is None else "update"))
+            result = self.poller.wait(res, self.token, result=item_id is None)
+            if item_id is None:
+                item_id = result["id"]
+                with self.lock:
+                    ids[item["name"]] = item_id
+            self.update_manifest(item, item_id, hashes)
+            return dict(item, id=item_id, action=action, status="deployed", changed=changed, error=None)
+        except Exception as e:
+            return dict(item, id=None, action=None, status="failed", changed=None, error=str(e))
+
+    def update_manifest(self, item, item_id, hashes):
+        """Records the part hashes of a deployed item in the manifest.
+        ### Parameters
+        ----
+        item: dict
+            An item of find_items.
+        item_id: str uuid
+            The id of the item in the workspace.
+        hashes: dict
+            The hashes of get_parts_hashes.
+        """
+        with self.lock:
+            self.manifest["{}/{}/{}".format(self.workspace_id, item["type"], item["name"])] = {"id": item_id, "parts": hashes}
+
+    def save_manifest(self):
+        """Writes the manifest to manifest_path when it's specified.
+        """
+        if self.manifest_path != None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+            with open(self.manifest_path, "w", encoding="utf-8") as f:
+                json.dump(self.manifest, f, indent=2, sort_keys=True)
+
+    def get_semantic_model_ids(self, item):
+        """Returns the semantic model ids to resolve the byPath reference of a report. Models of the repository are deployed to workspace_id.
+        ### Parameters
+        ----
+        item: dict
+            A report of find_items.
+        ### Returns
+        ----
+        Dict:
+            The semantic model ids by name.
+        """
+        ids = dict(self.get_item_ids(self.semantic_model_workspace_id, "SemanticModel"))
+        if item["model"] in self.deployed_models:
+            ids[item["model"]] = self.deployed_models[item["model"]]
+        return ids
+
+    def deploy(self, path, items=None, incremental=False):
+        """Deploys the items of a repository. Semantic models and reports without a repository model run first, then the reports of the deployed models.
+        Reports of a semantic model that failed are skipped.
+        ### Parameters
+        ----
+        path: str
+            The repository folder like C:/Users/user/Git/Folder
+        items: list
+            Optional. Names of the items to deploy. By default all the items of the folder.
+        incremental: bool
+            Only update the items whose parts changed since the manifest or, without manifest entry, since their remote definition. By default False.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with name, type, path, model, id, action, status, changed parts and error by item.
+        """
+        found = self.find_items(path)
+        if items is not None:
+            found = [i for i in found if i["name"] in items]
+        repository_models = {i["name"] for i in found if i["type"] == "SemanticModel"}
+        first = [i for i in found if i["type"] == "SemanticModel" or i["model"] not in repository_models]
+        second = [i for i in found if i not in first]
+        self.deployed_models = {}
+
+        def deploy_item(item):
+            return self.deploy_item(item, incremental)
+
+        results = list(utils.imap_ordered(deploy_item, first, self.max_workers))
+        self.deployed_models = {r["name"]: r["id"] for r in results if r["type"] == "SemanticModel" and r["status"] == "deployed"}
+        ready = [i for i in second if i["model"] in self.deployed_models]
+        results.extend(dict(i, id=None, action=None, status="skipped", changed=None, error="Semantic model {} was not deployed.".format(i["model"])) for i in second if i not in ready)
+        results.extend(utils.imap_ordered(deploy_item, ready, self.max_workers))
+        self.save_manifest()
+        df = pd.DataFrame(results, columns=["name", "type", "path", "model", "id", "action", "status", "changed", "error"])
+        print("Items deployed: {}, unchanged: {}, failed: {}, skipped: {}".format(int(((df["status"] == "deployed") & (df["action"] != "unchanged")).sum()), int((df["action"] == "unchanged").sum()), int((df["status"] == "failed").sum()), int((df["status"] == "skipped").sum())))
+        return df
+
+class ItemCatalog():
+    """Catalog of the Fabric items of every workspace the user has access to, stored locally and indexed by id and by name,
+    so item lookups don't need API calls.
+    """
+
+    def __init__(self, token, path=None, max_workers=8):
+        """Create a simplePBI item catalog
+        Args:
+            token: String
+                Bearer Token to use the Rest API
+            path: str
+                Optional. Json file to save and load the catalog. Like C:/Users/user/catalog.json
+            max_workers: int
+                Maximum number of workspaces listed at the same time. By default 8.
+        """
+        self.token = token
+        self.path = path
+        self.max_workers = max_workers
+        self.items = []
+        self.created = None
+        self.by_id = {}
+        self.by_name = {}
+        if path != None and os.path.exists(path):
+            self.load()
+
+    def list_workspace(self, workspace):
+        """Lists the items and folders of a workspace.
+        ### Parameters
+        ----
+        workspace: dict
+            A workspace of Workspaces.list_workspaces.
+        ### Returns
+        ----
+        List:
+            List of dicts with id, type, displayName, description, workspaceId, workspaceName, folderId and folderPath.
+        """
+        items = Items(self.token).list_items(workspace["id"])
+        if items is None:
+            raise Exception("The items of the workspace {} could not be listed.".format(workspace["displayName"]))
+        folders = Folders(self.token).list_folders(workspace["id"]) or {}
+        folders = {f["id"]: f for f in folders.get("value", [])}
+
+        def folder_path(folder_id):
+            names = []
+            while folder_id in folders and len(names) <= len(folders):
+                names.insert(0, folders[folder_id]["displayName"])
+                folder_id = folders[folder_id].get("parentFolderId")
+            return "/".join(names)
+        return [{"id": i["id"], "type": i["type"], "displayName": i["displayName"], "description": i.get("description") or "",
+                 "workspaceId": workspace["id"], "workspaceName": workspace["displayName"], "folderId": i.get("folderId"), "folderPath": folder_path(i.get("folderId"))}
+                for i in items.get("value", [])]
+
+    def build(self, workspace_ids=None):
+        """Lists the items of the workspaces concurrently, indexes them and saves the catalog when path is specified.
+        ### Parameters
+        ----
+        workspace_ids: list
+            Optional. The workspace ids to catalog. By default every workspace the user has access to.
+        ### Returns
+        ----
+        DataFrame:
+            The catalog. Read to_pandas.
+        """
+        res = Workspaces(self.token).list_workspaces()
+        if res is None:
+            raise Exception("Workspaces could not be requested.")
+        workspaces = res.get("value", [])
+        if workspace_ids is not None:
+            workspaces = [w for w in workspaces if w["id"] in workspace_ids]
+
+        def run(workspace):
+            try:
+                return self.list_workspace(workspace)
+            except Exception as e:
+                print("Error while listing workspace {}: {}".format(workspace["displayName"], e))
+                return []
+        self.items = [i for items in utils.imap_ordered(run, workspaces, self.max_workers) for i in items]
+        self.created = datetime.now(timezone.utc).isoformat()
+        self.index()
+        print("Catalog with {} items of {} workspaces".format(len(self.items), len(workspaces)))
+        if self.path != None:
+            self.save()
+        return self.to_pandas()
+
+    def index(self):
+        """Builds the indexes by id and by (workspace, type, name). Workspaces are indexed by id and by name, names are case insensitive.
+        """
+        self.by_id = {i["id"]: i for i in self.items}
+        self.by_name = collections.defaultdict(list)
+        for i in self.items:
+            for workspace in (i["workspaceId"], i["workspaceName"].lower()):
+                self.by_name[(workspace, i["type"], i["displayName"].lower())].append(i)
+
+    def save(self):
+        """Saves the catalog to path.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"created": self.created, "items": self.items}, f)
+
+    def load(self):
+        """Loads the catalog from path.
+        """
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.created = data.get("created")
+        self.items = data.get("items", [])
+        self.index()
+
+    def get_item(self, item_id):
+        """Returns an item by id.
+        ### Parameters
+        ----
+        item_id: str uuid
+            The item id.
+        ### Returns
+        ----
+        Dict:
+            The item or None when it isn't in the catalog.
+        """
+        return self.by_id.get(item_id)
+
+    def find_item(self, workspace, type, name):
+        """Returns the item of a type with a name in a workspace, e.g. find_item("Sales", "SemanticModel", "Sales Model").
+        ### Parameters
+        ----
+        workspace: str
+            The workspace id or name.
+        type: str
+            The item type like SemanticModel, Report or Lakehouse.
+        name: str
+            The item display name. Case insensitive.
+        ### Returns
+        ----
+        Dict:
+            The item or None when it isn't in the catalog. An Exception is raised when the workspace name is ambiguous.
+        """
+        found = self.by_name.get((workspace, type, name.lower())) or self.by_name.get((workspace.lower(), type, name.lower()), [])
+        if len({i["workspaceId"] for i in found}) > 1:
+            raise Exception("There are many workspaces named {}. Use the workspace id.".format(workspace))
+        return found[0] if found else None
+
+    def to_pandas(self):
+        """Returns the catalog as a DataFrame with categorical type and workspace columns.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with id, type, displayName, description, workspaceId, workspaceName, folderId and folderPath indexed by id.
+        """
+        df = pd.DataFrame(self.items, columns=["id", "type", "displayName", "description", "workspaceId", "workspaceName", "folderId", "folderPath"])
+        for column in ("type", "workspaceId", "workspaceName"):
+            df[column] = df[column].astype("category")
+        return df.set_index("id", drop=False)
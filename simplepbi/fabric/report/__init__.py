@@ -16,11 +16,10 @@ r'''.
 @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 '''
 
-import json
 import requests
 from simplepbi import utils
 import pandas as pd
-from simplepbi.fabric.core import LongRunningOperations
+from simplepbi.fabric.core import LongRunningOperationsPoller
 class Report():
     """Simple library to use the api and obtain reports item from it.
     """
@@ -99,7 +98,7 @@ class Report():
             print("HTTP Error: ", ex, "\nText: ", ex.response.text)
         except requests.exceptions.RequestException as e:
             print("Request exception: ", e)    
-    def get_report_definition(self, workspace_id, report_id):
+    def get_report_definition(self, workspace_id, report_id, cache=None):
         """Returns the definition of the specified report.
         ### Parameters
         ----
@@ -107,32 +106,26 @@ class Report():
             The workspace id. You can take it from PBI Service URL
         report_id: str uuid
             The report id. You can take it from PBI Service URL
+        cache: DefinitionCache
+            Optional. A simplepbi.fabric.core.DefinitionCache to read the definition from disk when the report wasn't modified.
         ### Returns
         ----
         Dict:
             A dictionary containing the definition of the report.
         """
+        if cache != None:
+            return cache.get_item_definition(workspace_id, report_id, "Report")
         try:
-            op = LongRunningOperations(self.token)
             url = "https://api.fabric.microsoft.com/v1/workspaces/{}/reports/{}/getDefinition".format(workspace_id, report_id)
             res = requests.post(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
             res.raise_for_status()
-            opid = res.headers["x-ms-operation-id"]
-            status="Running"
-            while status == "Running":
-                try:                    
-                    ope = op.get_operation_state(opid)
-                    status = json.loads(ope)["status"]                    
-                except Exception as e:
-                    print("Error while checking operation status: ", e)
-                    break
-            model = op.get_operation_result(opid)
-            print("Operation completed with status: ", status)
-            return json.loads(model)
+            return LongRunningOperationsPoller.get_default().wait(res, self.token)
         except requests.exceptions.HTTPError as ex:
             print("HTTP Error: ", ex, "\nText: ", ex.response.text)
         except requests.exceptions.RequestException as e:
             print("Request exception: ", e)
+        except Exception as e:
+            print("Operation error: ", e)
 
     def save_report_definition_local(self, workspace_id, report_id, path, report_connection=None):
         """Saves the report files consistency to the local filesystem. Specify if pbir should read live connection or import
@@ -20,9 +20,13 @@ import json
 import requests
 from simplepbi import utils
 import pandas as pd
-from simplepbi.fabric.core import LongRunningOperations
+from simplepbi.fabric.core import LongRunningOperationsPoller, Workspaces
 import re
 import base64
+import os
+import hashlib
+import html
+from datetime import datetime, timezone
 class SemanticModels():
     """Simple library to use the api and obtain semantic models item from it.
     """
@@ -141,7 +145,7 @@ class SemanticModels():
         except requests.exceptions.RequestException as e:
             print("Request exception: ", e)
 
-    def get_semantic_model_definition(self, workspace_id, semantic_model_id, format=None):
+    def get_semantic_model_definition(self, workspace_id, semantic_model_id, format=None, cache=None):
         """Returns the definition of the specified semantic model.
         ### Parameters
         ----
@@ -151,34 +155,48 @@ class SemanticModels():
             The semantic model id. You can take it from PBI Service URL
         format: str
             The format of the semantic model definition. Can be 'TMDL' or 'TMSL'.
+        cache: DefinitionCache
+            Optional. A simplepbi.fabric.core.DefinitionCache to read the definition from disk when the model wasn't modified.
         ### Returns
         ----
         Dict:
             A dictionary containing the definition of the semantic model.
         """
+        if cache != None:
+            return cache.get_item_definition(workspace_id, semantic_model_id, "SemanticModel", format)
         try:
-            op = LongRunningOperations(self.token)
             url = "https://api.fabric.microsoft.com/v1/workspaces/{}/semanticModels/{}/getDefinition".format(workspace_id, semantic_model_id)
             if format != None:
                 url += "?format={}".format(format)
             res = requests.post(url, headers={'Content-Type': 'application/json', "Authorization": "Bearer {}".format(self.token)})
             res.raise_for_status()
-            opid = res.headers["x-ms-operation-id"]
-            status="Running"
-            while status == "Running":
-                try:                    
-                    ope = op.get_operation_state(opid)
-                    status = json.loads(ope)["status"]                    
-                except Exception as e:
-                    print("Error while checking operation status: ", e)
-                    break
-            model = op.get_operation_result(opid)
-            print("Operation completed with status: ", status)
-            return json.loads(model)
+            return LongRunningOperationsPoller.get_default().wait(res, self.token)
         except requests.exceptions.HTTPError as ex:
             print("HTTP Error: ", ex, "\nText: ", ex.response.text)
         except requests.exceptions.RequestException as e:
             print("Request exception: ", e)
+        except Exception as e:
+            print("Operation error: ", e)
+
+    def get_definition_object(self, workspace_id, semantic_model_id, model=None):
+        """Returns a SemanticModelDefinition that requests the TMDL definition once and memoizes its parsed views.
+        Pass it as model to the list and get methods of the semantic model to reuse it.
+        ### Parameters
+        ----
+        workspace_id: str uuid
+            The workspace id. You can take it from PBI Service URL
+        semantic_model_id: str uuid
+            The semantic model id. You can take it from PBI Service URL
+        model: object
+            TMDL model definition or SemanticModelDefinition, if you already have it.
+        ### Returns
+        ----
+        SemanticModelDefinition:
+            The definition object. Its definition is requested on first use.
+        """
+        if isinstance(model, SemanticModelDefinition):
+            return model
+        return SemanticModelDefinition(self.token, workspace_id, semantic_model_id, model)
 
     def list_roles_from_semantic_model(self, workspace_id, semantic_model_id, model=None):
         """Returns the roles of the specified semantic model.
@@ -189,24 +207,14 @@ class SemanticModels():
         semantic_model_id: str uuid
             The semantic model id. You can take it from PBI Service URL
         model: object
-            TMDL model definition, if you already have it, you don't need to specify workspace_id and semantic_model_id. Send empty instead.
+            TMDL model definition or SemanticModelDefinition, if you already have it, you don't need to specify workspace_id and semantic_model_id. Send empty instead.
         ### Returns
         ----
         DataFrame:
             A list containing the roles of the semantic model.
         """
         try:
-            if model is None:
-                model = self.get_semantic_model_definition(workspace_id, semantic_model_id,"TMDL")
-            for i in model["definition"]["parts"]:
-                if "model.tmdl" in i["path"]:
-                    metad = i["payload"]
-            decoded_contents = base64.b64decode(metad.encode("utf-8"))
-            decoded_str = decoded_contents.decode("utf-8")
-            roles = [role.strip().strip("'\"") for role in re.findall(r'^\s*ref role (.+)$', decoded_str, re.MULTILINE)]
-            if roles == []:
-                print("No roles found in the semantic model.")
-            return roles
+            return self.get_definition_object(workspace_id, semantic_model_id, model).list_roles()
         except Exception as e:
             print("Error while getting roles: ", e)
     def list_tables_from_semantic_model(self, workspace_id, semantic_model_id, model=None):
@@ -218,24 +226,14 @@ class SemanticModels():
         semantic_model_id: str uuid
             The semantic model id. You can take it from PBI Service URL
         model: object
-            TMDL model definition, if you already have it, you don't need to specify workspace_id and semantic_model_id. Send empty instead.
+            TMDL model definition or SemanticModelDefinition, if you already have it, you don't need to specify workspace_id and semantic_model_id. Send empty instead.
         ### Returns
         ----
         DataFrame:
             A list containing the tables of the semantic model.
         """
         try:
-            if model is None:
-                model = self.get_semantic_model_definition(workspace_id, semantic_model_id,"TMDL")
-            for i in model["definition"]["parts"]:
-                if "model.tmdl" in i["path"]:
-                    metad = i["payload"]
-            decoded_contents = base64.b64decode(metad.encode("utf-8"))
-            decoded_str = decoded_contents.decode("utf-8")
-            tablas = [tabla.strip().strip("'\"") for tabla in re.findall(r'^\s*ref table (.+)$', decoded_str, re.MULTILINE)]
-            if tablas == []:
-                print("No tables found in the semantic model.")
-            return tablas
+            return self.get_definition_object(workspace_id, semantic_model_id, model).list_tables()
         except Exception as e:
             print("Error while getting tables: ", e)
     
@@ -248,19 +246,14 @@ class SemanticModels():
         semantic_model_id: str uuid
             The semantic model id. You can take it from PBI Service URL
         model: object
-            TMDL model definition, if you already have it, you don't need to specify workspace_id and semantic_model_id. Send empty instead.
+            TMDL model definition or SemanticModelDefinition, if you already have it, you don't need to specify workspace_id and semantic_model_id. Send empty instead.
         ### Returns
         ----
         DataFrame:
             A pandas DataFrame containing the tables of the semantic model.
         """
         try:
-            if model is None:
-                model = self.get_semantic_model_definition(workspace_id, semantic_model_id, "TMDL")
-            tables = [base64.b64decode(i["payload"].encode("utf-8")).decode("utf-8") for i in model["definition"]["parts"] if "tables" in i["path"]]
-            # Append all tables into a single string
-            decoded_str = "\n".join(tables)
-            return utils.parse_tmdl_structure(decoded_str)
+            return self.get_definition_object(workspace_id, semantic_model_id, model).get_tables_schema()
         except Exception as e:
             print("Error while getting tables: ", e)
 
@@ -273,35 +266,14 @@ class SemanticModels():
         semantic_model_id: str uuid
             The semantic model id. You can take it from PBI Service URL
         model: object
-            TMDL model definition, if you already have it, you don't need to specify workspace_id and semantic_model_id. Send empty instead.
+            TMDL model definition or SemanticModelDefinition, if you already have it, you don't need to specify workspace_id and semantic_model_id. Send empty instead.
         ### Returns
         ----
         DataFrame:
             A pandas DataFrame containing the tables of the semantic model.
         """
         try:
-            if model is None:
-                model = self.get_semantic_model_definition(workspace_id, semantic_model_id, "TMDL")
-            tables = [base64.b64decode(i["payload"].encode("utf-8")).decode("utf-8") for i in model["definition"]["parts"] if "tables" in i["path"]]
-            # Append all tables into a single string
-            decoded_str = "\n".join(tables)             
-            # Find all tables and their partitions with M code
-            table_blocks = re.findall(
-                r'table\s+([^\s]+)(.*?)partition\s+\1-[\w-]+.*?=\s*m\s+.*?source\s*=\s*(let\s+.*?in\s+.*?)(?=\n\t*annotation|\n\s*$)',
-                decoded_str,
-                flags=re.DOTALL,
-            )
-
-            # Build list of dicts
-            records = []
-            for table_name, _, m_code in table_blocks:
-                records.append({
-                    "table_name": table_name.strip(),
-                    "m_code": m_code.strip()
-                })
-            df = pd.DataFrame(records)
-            df.rename(columns={"table_name": "table", "m_code": "query_definition"}, inplace=True)
-            return df
+            return self.get_definition_object(workspace_id, semantic_model_id, model).get_tables_partitions()
         except Exception as e:
             print("Error while getting tables: ", e)
     
@@ -314,20 +286,14 @@ class SemanticModels():
         semantic_model_id: str uuid
             The semantic model id. You can take it from PBI Service URL
         model: object
-            TMDL model definition, if you already have it, you don't need to specify workspace_id and semantic_model_id. Send empty instead.
+            TMDL model definition or SemanticModelDefinition, if you already have it, you don't need to specify workspace_id and semantic_model_id. Send empty instead.
         ### Returns
         ----
         DataFrame:
             A pandas DataFrame containing the relationships of the semantic model.
         """
         try:
-            if model is None:
-                model = self.get_semantic_model_definition(workspace_id, semantic_model_id, "TMDL")
-            for i in model["definition"]["parts"]:
-                if "relationships.tmdl" in i["path"]:
-                    relations = i["payload"]
-            relationships = base64.b64decode(relations.encode("utf-8")).decode("utf-8")
-            return utils.extract_relationships(relationships)
+            return self.get_definition_object(workspace_id, semantic_model_id, model).get_relationships()
         except Exception as e:
             print("Error while getting relationships: ", e)
 
@@ -354,7 +320,7 @@ class SemanticModels():
         except Exception as e:
             print("Error while getting bim file: ", e)
 
-    def create_html_semantic_model_documentation(self, workspace_id, semantic_model_id, output_html_path):
+    def create_html_semantic_model_documentation(self, workspace_id, semantic_model_id, output_html_path, split_tables=False):
         """Generates an HTML documentation for the specified semantic model.
         ### Parameters
         ----
@@ -365,6 +331,8 @@ class SemanticModels():
         output_html_path: str
             The path where the HTML documentation will be saved.
             E.g: C:\\Users\\user\\Desktop\\semantic_model_documentation.html
+        split_tables: bool
+            Write each table to its own page in a folder next to the output file. Recommended for very large models. By default False.
         ### Returns
         ----
         None
@@ -373,7 +341,7 @@ class SemanticModels():
             print("Getting semantic model info...")
             bim = self.get_semantic_model_bim(workspace_id, semantic_model_id)            
             print("Generating file...")
-            utils.generate_bim_documentation(json.dumps(bim), output_html_path)            
+            utils.generate_bim_documentation(bim, output_html_path, split_tables)            
             print("Documentation generated successfully at: ", output_html_path)
         except Exception as e:
             print("Error while generating HTML documentation: ", e)
@@ -395,4 +363,388 @@ class SemanticModels():
         smodel = self.get_semantic_model(workspace_id, semantic_model_id)
         semantic_model_name = smodel["displayName"]
         parts = self.get_semantic_model_definition(workspace_id, semantic_model_id)
-        utils.save_files_from_api_response(parts, path, semantic_model_name, "semanticmodel")
\ No newline at end of file
+        utils.save_files_from_api_response(parts, path, semantic_model_name, "semanticmodel")
+
+class SemanticModelDefinition():
+    """A TMDL semantic model definition requested once. Parts are decoded on first access and every parsed view is memoized,
+    so the tables, roles, schema, partitions and relationships of a model cost a single getDefinition operation.
+    """
+
+    def __init__(self, token, workspace_id=None, semantic_model_id=None, definition=None, cache=None):
+        """Create a simplePBI semantic model definition. The definition is requested on first use when it isn't provided.
+        Args:
+            token: String
+                Bearer Token to use the Rest API
+            workspace_id: str uuid
+                The workspace id. You can take it from PBI Service URL
+            semantic_model_id: str uuid
+                The semantic model id. You can take it from PBI Service URL
+            definition: dict
+                TMDL model definition returned by get_semantic_model_definition, if you already have it.
+            cache: DefinitionCache
+                Optional. A simplepbi.fabric.core.DefinitionCache to read the definition from disk when the model wasn't modified.
+        """
+        self.token = token
+        self.workspace_id = workspace_id
+        self.semantic_model_id = semantic_model_id
+        self.definition = definition
+        self.definition_cache = cache
+        self.decoded = {}
+        self.parsed = {}
+
+    def get_definition(self):
+        """Returns the raw definition, requesting it the first time.
+        ### Returns
+        ----
+        Dict:
+            A dictionary containing the TMDL definition of the semantic model.
+        """
+        if self.definition is None:
+            if self.definition_cache is None:
+                self.definition = SemanticModels(self.token).get_semantic_model_definition(self.workspace_id, self.semantic_model_id, "TMDL")
+            else:
+                self.definition = self.definition_cache.get_item_definition(self.workspace_id, self.semantic_model_id, "SemanticModel", "TMDL")
+            if self.definition is None:
+                raise Exception("The definition of the semantic model {} could not be requested.".format(self.semantic_model_id))
+        return self.definition
+
+    def get_paths(self):
+        """Returns the paths of the definition parts.
+        ### Returns
+        ----
+        List:
+            The part paths, e.g. definition/model.tmdl
+        """
+        return [i["path"] for i in self.get_definition()["definition"]["parts"]]
+
+    def get_part(self, path):
+        """Returns the decoded content of a part. It is decoded only the first time.
+        ### Parameters
+        ----
+        path: str
+            The part path or its end, e.g. model.tmdl or definition/tables/Sales.tmdl
+        ### Returns
+        ----
+        str:
+            The part content or None when the definition has no such part.
+        """
+        for i in self.get_definition()["definition"]["parts"]:
+            if i["path"] == path or i["path"].endswith("/" + path):
+                if i["path"] not in self.decoded:
+                    self.decoded[i["path"]] = base64.b64decode(i["payload"].encode("utf-8")).decode("utf-8")
+                return self.decoded[i["path"]]
+        return None
+
+    def get_folder(self, folder):
+        """Returns the decoded content of every part in a folder of the definition.
+        ### Parameters
+        ----
+        folder: str
+            The folder name, e.g. tables or roles
+        ### Returns
+        ----
+        List:
+            The contents of the parts in path order.
+        """
+        return [self.get_part(p) for p in self.get_paths() if "/{}/".format(folder) in "/" + p]
+
+    def memoize(self, key, func):
+        """Returns the cached result of a parsed view, computing it the first time.
+        ### Parameters
+        ----
+        key: str
+            The name of the view.
+        func: function
+            Function without arguments that computes the view.
+        ### Returns
+        ----
+            The result of func.
+        """
+        if key not in self.parsed:
+            self.parsed[key] = func()
+        return self.parsed[key]
+
+    def get_model(self):
+        """Returns the whole model parsed with utils.parse_tmdl.
+        ### Returns
+        ----
+        Dict:
+            A dictionary shaped like a model.bim with the database properties and "model".
+        """
+        return self.memoize("model", lambda: utils.parse_tmdl([self.get_part(p) for p in self.get_paths() if p.endswith(".tmdl")]))
+
+    def get_dependency_graph(self, cache_dir=None):
+        """Returns the DAX dependency graph of the model to query dependencies, impact and unused measures or columns.
+        ### Parameters
+        ----
+        cache_dir: str
+            Optional. Folder to store the graphs by model hash. Read utils.get_dax_dependency_graph
+        ### Returns
+        ----
+        DaxDependencyGraph:
+            The dependency graph of the model.
+        """
+        return self.memoize("dependencies", lambda: utils.get_dax_dependency_graph(self.get_model(), cache_dir))
+
+    def get_best_practice_violations(self, rules=None):
+        """Evaluates best practice rules over the model, like unused columns, bidirectional relationships or measures without format string.
+        ### Parameters
+        ----
+        rules: list
+            The rules to evaluate. By default utils.get_default_model_rules
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with model, rule, severity, object_type, table, name and description by violation.
+        """
+        frames = self.memoize("rule_frames", lambda: utils.get_model_rule_frames(self.get_model(), self.semantic_model_id, self.get_dependency_graph()))
+        frames = dict(frames, column=frames["column"].assign(cardinality=float("nan")))
+        return utils.evaluate_model_rules(frames, rules)
+
+    def list_roles(self):
+        """Returns the roles referenced in model.tmdl.
+        ### Returns
+        ----
+        List:
+            A list containing the roles of the semantic model.
+        """
+        def parse():
+            roles = [role.strip().strip("'\"") for role in re.findall(r'^\s*ref role (.+)$', self.get_part("model.tmdl"), re.MULTILINE)]
+            if roles == []:
+                print("No roles found in the semantic model.")
+            return roles
+        return self.memoize("roles", parse)
+
+    def list_tables(self):
+        """Returns the tables referenced in model.tmdl.
+        ### Returns
+        ----
+        List:
+            A list containing the tables of the semantic model.
+        """
+        def parse():
+            tablas = [tabla.strip().strip("'\"") for tabla in re.findall(r'^\s*ref table (.+)$', self.get_part("model.tmdl"), re.MULTILINE)]
+            if tablas == []:
+                print("No tables found in the semantic model.")
+            return tablas
+        return self.memoize("tables", parse)
+
+    def get_tables_schema(self):
+        """Returns the columns and measures of the tables.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with columns: table, name, type, data_type, expression.
+        """
+        return self.memoize("schema", lambda: utils.parse_tmdl_structure("\n".join(self.get_folder("tables"))))
+
+    def get_tables_partitions(self):
+        """Returns the M query of the import partitions of the tables.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with columns: table, query_definition.
+        """
+        def parse():
+            records = []
+            for table in self.get_model()["model"].get("tables", []):
+                for partition in table.get("partitions", []):
+                    if partition["source"].get("type") == "m":
+                        records.append({"table": table["name"], "query_definition": partition["source"].get("expression", "").strip()})
+            return pd.DataFrame(records, columns=["table", "query_definition"])
+        return self.memoize("partitions", parse)
+
+    def get_relationships(self):
+        """Returns the relationships of relationships.tmdl.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with columns: fromTable, fromColumn, toTable, toColumn.
+        """
+        return self.memoize("relationships", lambda: utils.extract_relationships(self.get_part("relationships.tmdl")))
+
+
+class SemanticModelsDocumentation():
+    """Generates the HTML documentation of many semantic models in a folder with a shared index page.
+    Only models whose definition changed since the last build are rendered again.
+    """
+
+    def __init__(self, token, output_dir, max_workers=4, cache=None):
+        """Create a simplePBI bulk documentation generator
+        Args:
+            token: String
+                Bearer Token to use the Rest API
+            output_dir: str
+                Folder where the HTML files, the index.html page and the index.json manifest are stored.
+            max_workers: int
+                Maximum number of definitions requested at the same time. By default 4.
+            cache: DefinitionCache
+                Optional. A simplepbi.fabric.core.DefinitionCache to read the definitions of unmodified models from disk.
+        """
+        self.token = token
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.manifest_path = os.path.join(output_dir, "index.json")
+        self.cache = cache
+        self.semantic_models = SemanticModels(token)
+
+    def load_manifest(self):
+        """Returns the manifest of the last build with the definition hash and file of each documented model.
+        ### Returns
+        ----
+        Dict:
+            A dictionary by semantic model id. Empty when there is no previous build.
+        """
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_definition_hash(self, definition):
+        """Returns a hash of the definition parts that doesn't depend on their order.
+        ### Parameters
+        ----
+        definition: dict
+            The response of get_semantic_model_definition.
+        ### Returns
+        ----
+        str:
+            The sha256 hex digest of the paths and payloads of the parts.
+        """
+        digest = hashlib.sha256()
+        for part in sorted(definition["definition"]["parts"], key=lambda p: p["path"]):
+            digest.update(part["path"].encode("utf-8"))
+            digest.update(part["payload"].encode("utf-8"))
+        return digest.hexdigest()
+
+    def list_models(self, workspace_ids=None):
+        """Lists the semantic models of the workspaces concurrently.
+        ### Parameters
+        ----
+        workspace_ids: list
+            List of workspace ids. By default every workspace the user has access to.
+        ### Returns
+        ----
+        List:
+            List of dicts with workspaceId, id and displayName.
+        """
+        if workspace_ids is None:
+            res = Workspaces(self.token).list_workspaces()
+            if res is None:
+                raise Exception("Workspaces could not be requested to find their semantic models.")
+            workspace_ids = [w["id"] for w in res.get("value", [])]
+        models = []
+        for workspace_id, res in zip(workspace_ids, utils.imap_ordered(self.semantic_models.list_semantic_models, workspace_ids, self.max_workers)):
+            if res is None:
+                print("Semantic models of workspace {} could not be requested.".format(workspace_id))
+                continue
+            models.extend({"workspaceId": workspace_id, "id": m["id"], "displayName": m["displayName"]} for m in res.get("value", []))
+        return models
+
+    def write_index(self, manifest):
+        """Writes the index.html page linking the documentation of every model.
+        ### Parameters
+        ----
+        manifest: dict
+            The manifest with the documented models.
+        ### Returns
+        ----
+        None
+        """
+        entries = sorted(manifest.values(), key=lambda m: (m["workspaceId"], m["displayName"].lower()))
+        rows = "".join(
+            "<tr><td>{}</td><td><a href=\"{}\">{}</a></td><td>{}</td><td>{}</td></tr>".format(
+                html.escape(m["workspaceId"]), html.escape(m["file"]), html.escape(m["displayName"]), m["tables"], m["generatedAt"]
+            ) for m in entries
+        )
+        page = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Semantic models documentation</title>
+<style>
+body { font-family: Segoe UI, Arial, sans-serif; margin: 24px; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border: 1px solid #ddd; padding: 6px 10px; text-align: left; }
+th { background: #f3f2f1; }
+</style>
+</head>
+<body>
+<h1>Semantic models documentation</h1>
+<table>
+<tr><th>Workspace</th><th>Semantic model</th><th>Tables</th><th>Generated</th></tr>
+""" + rows + """
+</table>
+</body>
+</html>
+"""
+        with open(os.path.join(self.output_dir, "index.html"), "w", encoding="utf-8") as f:
+            f.write(page)
+
+    def build(self, workspace_ids=None, models=None, force=False):
+        """Requests the definitions concurrently and renders the documentation of the new and changed models.
+        Models removed from the documented workspaces are dropped from the index.
+        ### Parameters
+        ----
+        workspace_ids: list
+            List of workspace ids. By default every workspace the user has access to.
+        models: list
+            Optional. List of dicts with workspaceId, id and displayName to document instead of listing the workspaces.
+        force: bool
+            Render every model even if its definition didn't change. By default False.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with workspaceId, id, displayName and status (generated, unchanged or failed) by model.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        if models is None:
+            models = self.list_models(workspace_ids)
+        manifest = self.load_manifest()
+
+        def run(model):
+            result = dict(model, status="failed")
+            try:
+                if self.cache is None:
+                    definition = self.semantic_models.get_semantic_model_definition(model["workspaceId"], model["id"], "TMSL")
+                else:
+                    definition = self.cache.get_item_definition(model["workspaceId"], model["id"], "SemanticModel", "TMSL")
+                digest = self.get_definition_hash(definition)
+                previous = manifest.get(model["id"])
+                if not force and previous is not None and previous["hash"] == digest and os.path.exists(os.path.join(self.output_dir, previous["file"])):
+                    return dict(result, status="unchanged")
+                bim_part = [p for p in definition["definition"]["parts"] if "model.bim" in p["path"]][0]
+                bim_text = base64.b64decode(bim_part["payload"].encode("utf-8")).decode("utf-8")
+                file_name = "{}.html".format(model["id"])
+                utils.generate_bim_documentation(bim_text, os.path.join(self.output_dir, file_name))
+                entry = {
+                    "workspaceId": model["workspaceId"],
+                    "displayName": model["displayName"],
+                    "hash": digest,
+                    "file": file_name,
+                    "tables": len(json.loads(bim_text)["model"].get("tables", [])),
+                    "generatedAt": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+                }
+                return dict(result, status="generated", entry=entry)
+            except Exception as e:
+                print("Error while documenting {}: {}".format(model["displayName"], e))
+                return result
+
+        results = list(utils.imap_ordered(run, models, self.max_workers))
+        for r in results:
+            if r["status"] == "generated":
+                manifest[r["id"]] = r.pop("entry")
+            elif r["id"] in manifest:
+                manifest[r["id"]]["displayName"] = r["displayName"]
+        documented = set(m["workspaceId"] for m in models)
+        current = set(m["id"] for m in models)
+        for model_id in [k for k, v in manifest.items() if v["workspaceId"] in documented and k not in current]:
+            path = os.path.join(self.output_dir, manifest.pop(model_id)["file"])
+            if os.path.exists(path):
+                os.remove(path)
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        self.write_index(manifest)
+        df = pd.DataFrame(results, columns=["workspaceId", "id", "displayName", "status"])
+        print("Documentation built: {}".format(df["status"].value_counts().to_dict()))
+        return df
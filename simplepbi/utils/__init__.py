@@ -18,10 +18,19 @@ r'''.
 
 import json
 import pandas as pd
+import numpy as np
 import io
 import re
 import os
 import base64
+import time
+import requests
+import collections
+import itertools
+import threading
+import hashlib
+import html
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from typing import Dict, Any
 
 '''
@@ -169,91 +178,22 @@ def parse_tmdl_structure(table_definition):
     DataFrame:
         A pandas DataFrame with columns: table, name, type, data_type, expression.
     """
-    current_table = None
     records = []
-    lines = table_definition.splitlines()
-    i = 0
-
-    while i < len(lines):
-        line = lines[i].strip()
-
-        # Detect table
-        table_match = re.match(r'^table\s+(.+)', line)
-        if table_match:
-            current_table = table_match.group(1).strip()
-            i += 1
+    # Only columns and measures are read, the other objects of the tables are skipped line by line
+    skip = {"partition", "hierarchy", "calculationGroup", "refreshPolicy", "annotation", "extendedProperty"}
+    for table in parse_tmdl_tree(table_definition, skip):
+        if table["objectType"] != "table":
             continue
-
-        # Detect measure
-        measure_match = re.match(r"^measure\s+'?([^']+)'?\s*=\s*(.*)", line)
-        if measure_match:
-            measure_name = measure_match.group(1).strip()
-            dax_expr = measure_match.group(2).strip()
-
-            
-            # If expression starts with triple backticks
-            if dax_expr.startswith("```"):
-                dax_lines = []
-                i += 1
-                while i < len(lines):
-                    next_line = lines[i].strip()
-                    if next_line == "```":
-                        break
-                    dax_lines.append(next_line)
-                    i += 1
-                dax_expr = "\n".join(dax_lines)
-                i += 1  # Skip closing ```
-            else:
-                # Collect until next metadata or definition
-                while i + 1 < len(lines):
-                    peek = lines[i + 1].strip()
-                    if peek.startswith(("formatString", "lineageTag", "annotation", "measure", "column", "table")):
-                        break
-                    i += 1
-                    dax_expr += " " + lines[i].strip()
-
-
-            records.append({
-                'table': current_table,
-                'name': measure_name,
-                'type': 'measure',
-                'data_type': None,
-                'expression': dax_expr
-            })
-            i += 1
-            continue
-
-        # Detect column
-        column_match = re.match(r"^column\s+'?([^'=]+?)'?(?:\s*=\s*(.+))?$", line)
-        if column_match:
-            col_name = column_match.group(1).strip()
-            expression = column_match.group(2).strip() if column_match.group(2) else None
-            data_type = None
-
-            i += 1
-            # Look ahead for dataType and other metadata
-            while i < len(lines):
-                next_line = lines[i].strip()
-                if next_line.startswith("dataType:"):
-                    data_type = next_line.replace("dataType:", "").strip()
-                elif next_line.startswith(("lineageTag:", "formatString", "summarizeBy", "annotation", "dataCategory", "sourceColumn:")):
-                    pass  # Ignore other metadata for now
-                elif next_line.startswith(("column", "measure", "partition", "table")):
-                    break
-                i += 1
-
-            records.append({
-                'table': current_table,
-                'name': col_name,
-                'type': 'column',
-                'data_type': data_type,
-                'expression': expression
-            })
-            continue
-
-        i += 1
-
-    return pd.DataFrame(records)
+        for child in table["children"]:
+            if child["objectType"] in ("measure", "column"):
+                records.append({
+                    'table': table["name"],
+                    'name': child["name"],
+                    'type': child["objectType"],
+                    'data_type': child["properties"].get("dataType"),
+                    'expression': child["value"]
+                })
+    return pd.DataFrame(records, columns=['table', 'name', 'type', 'data_type', 'expression'])
 
 def parse_measure(measure: Dict[str, Any]) -> str:
     """    Parses a measure definition into an HTML representation.
@@ -455,7 +395,7 @@ def generate_index_of_tables(tables) -> str:
     </nav>
     """
 
-def generate_cytoscape_diagram(tables, relationships):
+def generate_cytoscape_diagram(tables, relationships, collapsed=False):
     """    Generates an HTML representation of a data model diagram using Cytoscape.js.
     ### Parameters
     ----
@@ -463,6 +403,8 @@ def generate_cytoscape_diagram(tables, relationships):
         A list of dictionaries, each representing a table with a 'name' key.
     relationships: list
         A list of dictionaries, each representing a relationship with keys like 'fromTable', 'fromColumn', 'toTable', 'toColumn', and 'cardinality'.
+    collapsed: bool
+        Render the diagram closed and only draw it when it is opened. Recommended for big models. By default False.
     ### Returns
     ----
         str: An HTML representation of the data model diagram, including nodes for tables and edges for relationships.
@@ -488,12 +430,26 @@ def generate_cytoscape_diagram(tables, relationships):
         })
     js_nodes = json.dumps(cytoscape_nodes)
     js_edges = json.dumps(cytoscape_edges)
-    return f"""
+    if collapsed:
+        opening = f"""
+    <details class="diagram-section" id="model-diagram-section">
+      <summary><h2 style='display:inline'>Data Model Diagram ({len(tables)} tables)</h2></summary>"""
+        closing = "</details>"
+        # Drawing hundreds of nodes is expensive, wait until the user opens the diagram
+        start = "document.getElementById('model-diagram-section').addEventListener('toggle', function drawDiagram() { this.removeEventListener('toggle', drawDiagram);"
+        end = "});"
+    else:
+        opening = """
     <section class="diagram-section">
-      <h2>Data Model Diagram</h2>
+      <h2>Data Model Diagram</h2>"""
+        closing = "</section>"
+        start = ""
+        end = ""
+    return opening + f"""
       <div id="model-diagram" style="width:100%;min-height:350px;height:470px;border:1px solid #e0e5ea;border-radius:8px;background:#fafcff;"></div>
       <script src="https://unpkg.com/cytoscape/dist/cytoscape.min.js"></script>
       <script>
+        {start}
         var cy = cytoscape({{
           container: document.getElementById('model-diagram'),
           elements: {{
@@ -542,59 +498,29 @@ def generate_cytoscape_diagram(tables, relationships):
             padding: 30
           }}
         }});
+        {end}
       </script>
       <p style="font-size:0.95em;color:#666;">(Drag nodes to rearrange. Relationships are labeled with key columns and cardinality.)</p>
-    </section>
-    """
+    """ + closing
 
-def generate_bim_documentation(bim_json_text: str, output_html_path: str):
-    """    Generates an HTML documentation for a Business Intelligence Model (BIM) based on its JSON representation.
+def get_bim_documentation_head(title="Power BI Model Documentation") -> str:
+    """    Returns the start of the documentation HTML page until the body: scripts and styles.
     ### Parameters
     ----
-    bim_json_text: str
-        A string containing the JSON representation of the BIM, typically loaded from a .bim file.
-    output_html_path: str
-        The path where the HTML documentation will be saved.
+    title: str
+        The title of the page.
     ### Returns
     ----
-        None: The function writes the generated HTML to the specified output path.
+        str: The doctype, html and head tags.
     """
-    bim = json.loads(bim_json_text)
-    model = bim['model']
-    tables = model.get("tables", [])
-    tables = sorted(tables, key=lambda t: (t.get("name") or "").lower())
-
-    relationships = model.get("relationships", [])
-    roles = model.get("roles", [])
-
-    config_html = parse_config(model, bim)
-    diagram_html = generate_cytoscape_diagram(tables, relationships)
-    relationships_html = "".join([parse_relationship(r) for r in relationships])
-    # COLLAPSED BY DEFAULT
-    relationships_section = f"""
-    <details class="relationships-section">
-      <summary><h2 style='display:inline'>Relationships</h2></summary>
-      <ul>{relationships_html or "<li>No relationships</li>"}</ul>
-    </details>
-    """
-    roles_html = "".join([parse_role(r) for r in roles])
-    roles_section = f"""
-    <section class="roles-section">
-      <h2>Roles / RLS</h2>
-      {roles_html or "<em>No roles defined</em>"}
-    </section>
-    """
-    tables_index_html = generate_index_of_tables(tables)
-    tables_html = "".join([parse_table(t) for t in tables])
-
-    html = f"""
+    return f"""
     <!DOCTYPE html>
     <html lang="en">
     <head>
       <meta charset="UTF-8">
       <link href="https://cdnjs.cloudflare.com/ajax/libs/prism/1.29.0/themes/prism.min.css" rel="stylesheet" />
       <script src="https://cdnjs.cloudflare.com/ajax/libs/prism/1.29.0/prism.min.js"></script>
-      <title>Power BI Model Documentation</title>
+      <title>{html.escape(title)}</title>
       <meta name="viewport" content="width=device-width, initial-scale=1">
       <style>
         html,body {{
@@ -784,22 +710,110 @@ def generate_bim_documentation(bim_json_text: str, output_html_path: str):
         }}
       </style>
     </head>
+    """
+
+def write_bim_documentation(bim, f, split_tables_dir=None, diagram_max_tables=150):
+    """    Writes the HTML documentation of a BIM to a file handle section by section instead of building the page as one string.
+    The BIM dict itself is fully loaded, so memory still grows with the size of the model.
+    ### Parameters
+    ----
+    bim: dict
+        The BIM as a dictionary, typically loaded from a .bim file or get_semantic_model_bim.
+    f: file object
+        An open text file handle to write the documentation page.
+    split_tables_dir: str
+        Optional. Folder where each table is written to its own page. The main page then links to them instead of containing them.
+        Use a folder next to the main page, the links are relative to it.
+    diagram_max_tables: int
+        Models with more tables get the diagram collapsed and only drawn when it is opened. By default 150.
+    ### Returns
+    ----
+        None: The function writes the generated HTML to the file handle.
+    """
+    model = bim['model']
+    tables = sorted(model.get("tables", []), key=lambda t: (t.get("name") or "").lower())
+    relationships = model.get("relationships", [])
+    roles = model.get("roles", [])
+    head = get_bim_documentation_head()
+    f.write(head)
+    f.write("""
     <body>
       <header>
         <h1>Power BI Semantic Model Documentation</h1>
       </header>
-      {config_html}
-      {diagram_html}
-      {relationships_section}
-      {roles_section}
-      {tables_index_html}
-      {tables_html}
+    """)
+    f.write(parse_config(model, bim))
+    f.write(generate_cytoscape_diagram(tables, relationships, collapsed=len(tables) > diagram_max_tables))
+    # COLLAPSED BY DEFAULT
+    f.write("""
+    <details class="relationships-section">
+      <summary><h2 style='display:inline'>Relationships</h2></summary>
+      <ul>""")
+    for r in relationships:
+        f.write(parse_relationship(r))
+    if not relationships:
+        f.write("<li>No relationships</li>")
+    f.write("""</ul>
+    </details>
+    <section class="roles-section">
+      <h2>Roles / RLS</h2>
+      """)
+    for r in roles:
+        f.write(parse_role(r))
+    if not roles:
+        f.write("<em>No roles defined</em>")
+    f.write("""
+    </section>
+    """)
+    if split_tables_dir is None:
+        f.write(generate_index_of_tables(tables))
+        for t in tables:
+            f.write(parse_table(t))
+    else:
+        os.makedirs(split_tables_dir, exist_ok=True)
+        folder = os.path.basename(os.path.normpath(split_tables_dir))
+        f.write("""
+    <nav class="table-index">
+      <h2>Tables Index</h2>
+      <ul>
+        """)
+        for n, t in enumerate(tables):
+            file_name = "{}-{}.html".format(n, re.sub(r"[^\w\-]+", "_", t.get("name") or ""))
+            f.write('<li><a href="{}/{}">{}</a></li>'.format(html.escape(folder), file_name, html.escape(t.get("name") or "")))
+            with open(os.path.join(split_tables_dir, file_name), "w", encoding="utf-8") as tf:
+                tf.write(head)
+                tf.write('<body><p><a href="../{}">&#8592; Model</a></p>'.format(html.escape(os.path.basename(getattr(f, "name", "index.html")))))
+                tf.write(parse_table(t))
+                tf.write("</body></html>")
+        f.write("""
+      </ul>
+    </nav>
+    """)
+    f.write("""
     </body>
     </html>
-    """
+    """)
 
+def generate_bim_documentation(bim_json_text, output_html_path: str, split_tables=False, diagram_max_tables=150):
+    """    Generates an HTML documentation for a Business Intelligence Model (BIM) based on its JSON representation.
+    ### Parameters
+    ----
+    bim_json_text: str or dict
+        A string containing the JSON representation of the BIM, typically loaded from a .bim file, or the BIM already parsed as a dictionary.
+    output_html_path: str
+        The path where the HTML documentation will be saved.
+    split_tables: bool
+        Write each table to its own page in a folder named like the output file with _tables. Recommended for very large models. By default False.
+    diagram_max_tables: int
+        Models with more tables get the diagram collapsed and only drawn when it is opened. By default 150.
+    ### Returns
+    ----
+        None: The function writes the generated HTML to the specified output path.
+    """
+    bim = bim_json_text if isinstance(bim_json_text, dict) else json.loads(bim_json_text)
+    split_tables_dir = os.path.splitext(output_html_path)[0] + "_tables" if split_tables else None
     with open(output_html_path, "w", encoding="utf-8") as f:
-        f.write(html)
+        write_bim_documentation(bim, f, split_tables_dir, diagram_max_tables)
 
 def load_bim_file_as_string(filepath: str) -> str:
     """    Loads a BIM file and returns its contents as a string.
@@ -890,3 +904,1551 @@ def save_files_from_api_response(response_json, output_dir, item_name, item_type
             print(f"Saved: {full_path}")
         except Exception as e:
             print(f"Failed to write {file_path}: {e}")
+
+def write_file_if_changed(path, content):
+    """Writes bytes to a file only when its current content is different, so unchanged files keep their timestamps.
+    ### Parameters
+    ----
+    path: str
+        The file path. Missing folders are created.
+    content: bytes
+        The new content.
+    ### Returns
+    ----
+    bool:
+        True when the file was written, False when it already had the content.
+    """
+    if os.path.exists(path) and os.path.getsize(path) == len(content):
+        with open(path, "rb") as f:
+            if hashlib.sha256(f.read()).digest() == hashlib.sha256(content).digest():
+                return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return True
+
+def encode_file_base64(path, chunk_size=3 * 1024 * 1024):
+    """Returns the base64 text of a file reading and encoding it in 3 MB chunks. The returned text still holds the whole encoded file,
+    the chunks only avoid a second full-size bytes copy of the raw file next to it.
+    ### Parameters
+    ----
+    path: str
+        The file path.
+    chunk_size: int
+        Bytes read by chunk. It is rounded down to a multiple of 3 so the encoded chunks can be joined. By default 3 MB.
+    ### Returns
+    ----
+    str:
+        The base64 content of the file.
+    """
+    chunk_size = max(3, chunk_size - chunk_size % 3)
+    chunks = []
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            chunks.append(base64.b64encode(chunk).decode("ascii"))
+    return "".join(chunks)
+
+def build_definition_body(parts, format=None, properties=None):
+    """Builds the json body of a create or update definition request piece by piece. Payloads are base64 text that needs no escaping,
+    so they are copied once into the body instead of being scanned by json.dumps. The body is not streamed, it is one bytes object sent in a single request.
+    ### Parameters
+    ----
+    parts: list
+        The definition parts with Path, Payload and PayloadType.
+    format: str
+        Optional. The format of the definition.
+    properties: dict
+        Optional. Other properties of the body like displayName and type.
+    ### Returns
+    ----
+    bytes:
+        The utf-8 json body.
+    """
+    pieces = [b"{"]
+    for key, value in (properties or {}).items():
+        pieces.append("{}: {}, ".format(json.dumps(key), json.dumps(value)).encode("utf-8"))
+    pieces.append(b'"definition": {"Parts": [')
+    for i, part in enumerate(parts):
+        pieces.append('{}{{"Path": {}, "Payload": "'.format(", " if i else "", json.dumps(part.get("Path") or part.get("path"))).encode("utf-8"))
+        pieces.append((part["Payload"] if "Payload" in part else part["payload"]).encode("ascii"))
+        pieces.append('", "PayloadType": {}}}'.format(json.dumps(part.get("PayloadType") or part.get("payloadType") or "InlineBase64")).encode("utf-8"))
+    pieces.append(b"]}")
+    if format != None:
+        pieces.append(', "format": {}'.format(json.dumps(format)).encode("utf-8"))
+    pieces.append(b"}")
+    return b"".join(pieces)
+
+def refreshables_to_pandas(refreshables):
+    """Normalizes a list of refreshables (ideally requested with expand=capacity,group) into a typed DataFrame.
+    ### Parameters
+    ----
+    refreshables: list or dict
+        The refreshables list or the response dict with the "value" key from get_refreshables requests.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with one row per refreshable. Durations are in seconds and times are UTC.
+    """
+    if isinstance(refreshables, dict):
+        refreshables = refreshables.get("value", [])
+    columns = {
+        "id": "id",
+        "name": "name",
+        "kind": "kind",
+        "capacity.id": "capacityId",
+        "capacity.displayName": "capacityName",
+        "capacity.sku": "capacitySku",
+        "group.id": "workspaceId",
+        "group.name": "workspaceName",
+        "startTime": "startTime",
+        "endTime": "endTime",
+        "refreshCount": "refreshCount",
+        "refreshFailures": "refreshFailures",
+        "averageDuration": "averageDuration",
+        "medianDuration": "medianDuration",
+        "refreshesPerDay": "refreshesPerDay",
+        "lastRefresh.refreshType": "lastRefreshType",
+        "lastRefresh.status": "lastRefreshStatus",
+        "lastRefresh.startTime": "lastRefreshStartTime",
+        "lastRefresh.endTime": "lastRefreshEndTime",
+        "refreshSchedule.enabled": "scheduleEnabled",
+        "refreshSchedule.days": "scheduleDays",
+        "refreshSchedule.times": "scheduleTimes",
+        "refreshSchedule.localTimeZoneId": "scheduleTimeZone"
+    }
+    df = pd.json_normalize(refreshables)
+    df = df.reindex(columns=list(columns.keys())).rename(columns=columns)
+    for col in ["startTime", "endTime", "lastRefreshStartTime", "lastRefreshEndTime"]:
+        df[col] = pd.to_datetime(df[col], utc=True, errors="coerce")
+    for col in ["refreshCount", "refreshFailures", "refreshesPerDay"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype("int64")
+    for col in ["averageDuration", "medianDuration"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    df["lastRefreshDuration"] = (df["lastRefreshEndTime"] - df["lastRefreshStartTime"]).dt.total_seconds()
+    df["scheduleEnabled"] = df["scheduleEnabled"].astype("boolean").fillna(False)
+    for col in ["scheduleDays", "scheduleTimes"]:
+        df[col] = df[col].apply(lambda v: v if isinstance(v, list) else [])
+    for col in ["id", "name", "kind", "capacityId", "capacityName", "capacitySku", "workspaceId", "workspaceName", "lastRefreshType", "lastRefreshStatus", "scheduleTimeZone"]:
+        df[col] = df[col].astype("string")
+    return df
+
+def get_refreshables_time_slots(df_refreshables, slot_minutes=30):
+    """Computes how many scheduled refreshes overlap in each time slot of the week per capacity.
+    Each scheduled time occupies the slots covered by the refreshable average duration.
+    Schedule times are compared as configured, in the local time zone of each refresh schedule.
+    ### Parameters
+    ----
+    df_refreshables: DataFrame
+        The DataFrame returned by refreshables_to_pandas.
+    slot_minutes: int
+        The size of the time slot in minutes. By default 30.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with columns capacityId, capacityName, weekday, slotStart, concurrentRefreshes and refreshables.
+    """
+    columns = ["capacityId", "capacityName", "weekday", "slotStart", "concurrentRefreshes", "refreshables"]
+    weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    sched = df_refreshables.loc[df_refreshables["scheduleEnabled"], ["id", "name", "capacityId", "capacityName", "scheduleDays", "scheduleTimes", "averageDuration"]]
+    sched = sched.explode("scheduleDays").explode("scheduleTimes").dropna(subset=["scheduleDays", "scheduleTimes"])
+    if sched.empty:
+        return pd.DataFrame(columns=columns)
+    day = sched["scheduleDays"].map({d: i for i, d in enumerate(weekdays)})
+    hhmm = sched["scheduleTimes"].str.split(":", n=1, expand=True).astype("int64")
+    start = (day * 1440 + hhmm[0] * 60 + hhmm[1]).to_numpy(dtype="int64")
+    # Refreshables without history take a single slot
+    duration = (sched["averageDuration"].fillna(0) / 60).to_numpy(dtype="float64")
+    first_slot = start // slot_minutes
+    last_slot = np.maximum(first_slot, (np.ceil(start + duration).astype("int64") - 1) // slot_minutes)
+    spans = last_slot - first_slot + 1
+    # Expand every scheduled refresh into one row per occupied slot
+    positions = np.repeat(np.arange(len(sched)), spans)
+    offsets = np.arange(spans.sum()) - np.repeat(np.cumsum(spans) - spans, spans)
+    slots_per_week = 7 * 1440 // slot_minutes
+    occupied = pd.DataFrame({
+        "capacityId": sched["capacityId"].to_numpy()[positions],
+        "capacityName": sched["capacityName"].to_numpy()[positions],
+        "name": sched["name"].to_numpy()[positions],
+        "id": sched["id"].to_numpy()[positions],
+        "slot": (first_slot[positions] + offsets) % slots_per_week
+    })
+    slots = occupied.groupby(["capacityId", "capacityName", "slot"], dropna=False).agg(
+        concurrentRefreshes=("id", "nunique"),
+        refreshables=("name", lambda s: sorted(set(s)))
+    ).reset_index()
+    minutes = slots["slot"] * slot_minutes
+    slots["weekday"] = pd.Categorical.from_codes((minutes // 1440).to_numpy(), categories=weekdays, ordered=True)
+    slots["slotStart"] = ((minutes % 1440) // 60).map("{:02d}".format) + ":" + (minutes % 60).map("{:02d}".format)
+    return slots.sort_values(["capacityId", "slot"]).reset_index(drop=True)[columns]
+
+def get_refreshables_capacity_stats(df_refreshables, df_time_slots=None):
+    """Aggregates refreshables statistics by capacity: durations, failure rates and schedule contention.
+    ### Parameters
+    ----
+    df_refreshables: DataFrame
+        The DataFrame returned by refreshables_to_pandas.
+    df_time_slots: DataFrame
+        Optional. The DataFrame returned by get_refreshables_time_slots to add peak concurrency columns.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with one row per capacity. Durations are in seconds.
+    """
+    df = df_refreshables.assign(
+        totalDuration=df_refreshables["averageDuration"].fillna(0) * df_refreshables["refreshCount"],
+        lastRefreshFailed=df_refreshables["lastRefreshStatus"].eq("Failed").fillna(False)
+    )
+    stats = df.groupby(["capacityId", "capacityName"], dropna=False).agg(
+        refreshables=("id", "nunique"),
+        refreshCount=("refreshCount", "sum"),
+        refreshFailures=("refreshFailures", "sum"),
+        refreshesPerDay=("refreshesPerDay", "sum"),
+        totalDuration=("totalDuration", "sum"),
+        maxAverageDuration=("averageDuration", "max"),
+        maxMedianDuration=("medianDuration", "max"),
+        maxLastRefreshDuration=("lastRefreshDuration", "max"),
+        lastRefreshFailures=("lastRefreshFailed", "sum")
+    ).reset_index()
+    # Weighted by number of refreshes so busy models count more than idle ones
+    runs = stats["refreshCount"].where(stats["refreshCount"] > 0)
+    stats["averageDuration"] = stats["totalDuration"] / runs
+    stats["failureRate"] = stats["refreshFailures"] / runs
+    stats = stats.drop(columns="totalDuration")
+    if df_time_slots is not None:
+        contention = df_time_slots.groupby(["capacityId", "capacityName"], dropna=False).agg(
+            peakConcurrency=("concurrentRefreshes", "max"),
+            averageConcurrency=("concurrentRefreshes", "mean"),
+            overlappingSlots=("concurrentRefreshes", lambda s: int((s > 1).sum()))
+        ).reset_index()
+        stats = stats.merge(contention, on=["capacityId", "capacityName"], how="left")
+        stats[["peakConcurrency", "overlappingSlots"]] = stats[["peakConcurrency", "overlappingSlots"]].fillna(0).astype("int64")
+    return stats.sort_values("failureRate", ascending=False, na_position="last").reset_index(drop=True)
+
+def parse_dax_response(content):
+    """Parses the body of an executeQueries response in a single pass.
+    ### Parameters
+    ----
+    content: bytes or str
+        The raw body of the response (res.content). It may start with an UTF-8 BOM.
+    ### Returns
+    ----
+    Dict:
+        The executeQueries response as a dictionary.
+    """
+    if isinstance(content, (bytes, bytearray)):
+        content = content.decode("utf-8-sig")
+    elif content.startswith("\ufeff"):
+        content = content[1:]
+    return json.loads(content)
+
+def get_dax_result_rows(dax_result):
+    """Returns the rows of the first table of an executeQueries response raising the DAX error if there is one.
+    ### Parameters
+    ----
+    dax_result: dict
+        The executeQueries response parsed with parse_dax_response.
+    ### Returns
+    ----
+    list:
+        The list of row dicts with keys like 'Table[Column]' or '[Measure]'.
+    """
+    if "error" in dax_result:
+        raise Exception("DAX query failed: {}".format(json.dumps(dax_result["error"])))
+    result = dax_result["results"][0]
+    if "error" in result:
+        raise Exception("DAX query failed: {}".format(json.dumps(result["error"])))
+    table = result["tables"][0]
+    if "error" in table:
+        raise Exception("DAX query failed: {}".format(json.dumps(table["error"])))
+    return table.get("rows", [])
+
+def dax_column_name(key):
+    """Returns the column name of a DAX result key. 'Sales[Amount]' or '[Amount]' becomes 'Amount'.
+    ### Parameters
+    ----
+    key: str
+        The key of a row in the executeQueries response.
+    ### Returns
+    ----
+    str:
+        The name of the column without the table name and brackets.
+    """
+    if key.endswith("]") and "[" in key:
+        return key[key.index("[") + 1:-1]
+    return key
+
+def dax_values_to_series(values, name=None):
+    """Converts the values of a DAX result column into a pandas Series with a proper dtype.
+    Integers become int64 (Int64 with blanks), decimals and currency float64, booleans boolean, dates datetime64 and text string.
+    ### Parameters
+    ----
+    values: list
+        The values of the column as returned by the JSON response.
+    name: str
+        The name of the Series.
+    ### Returns
+    ----
+    Series:
+        A typed pandas Series.
+    """
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == "integer":
+        if any(v is None for v in values):
+            return pd.Series(pd.array(values, dtype="Int64"), name=name)
+        return pd.Series(np.asarray(values, dtype="int64"), name=name)
+    if kind in ("floating", "mixed-integer-float", "decimal"):
+        return pd.Series(np.asarray(values, dtype="float64"), name=name)
+    if kind == "boolean":
+        return pd.Series(pd.array(values, dtype="boolean"), name=name)
+    if kind == "string":
+        first = next((v for v in values if v is not None), None)
+        if first is not None and re.match(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}", first):
+            try:
+                return pd.Series(pd.to_datetime(values, errors="raise"), name=name)
+            except (ValueError, TypeError):
+                pass
+        return pd.Series(pd.array(values, dtype="string"), name=name)
+    return pd.Series(values, name=name, dtype="object")
+
+def dax_result_to_pandas(dax_result, dtypes=None, full_column_names=False):
+    """Builds a typed DataFrame from an executeQueries response column by column.
+    ### Parameters
+    ----
+    dax_result: dict or bytes
+        The executeQueries response parsed with parse_dax_response or its raw body.
+    dtypes: dict
+        Optional. Column name to dtype to override the inferred type of specific columns.
+    full_column_names: bool
+        If True keeps names like 'Table[Column]'. By default only the column name is kept unless it's duplicated.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with every row of the result.
+    """
+    if not isinstance(dax_result, dict):
+        dax_result = parse_dax_response(dax_result)
+    rows = get_dax_result_rows(dax_result)
+    if not rows:
+        return pd.DataFrame()
+    keys = list(rows[0].keys())
+    if full_column_names:
+        names = keys
+    else:
+        short = [dax_column_name(k) for k in keys]
+        names = [s if short.count(s) == 1 else k for s, k in zip(short, keys)]
+    columns = {}
+    for key, name in zip(keys, names):
+        values = [row.get(key) for row in rows]
+        columns[name] = dax_values_to_series(values, name)
+    df = pd.DataFrame(columns)
+    if dtypes:
+        df = df.astype(dtypes)
+    return df
+
+def dax_result_to_arrow(dax_result, dtypes=None, full_column_names=False):
+    """Builds a pyarrow Table from an executeQueries response. It requires the pyarrow package.
+    ### Parameters
+    ----
+    dax_result: dict or bytes
+        The executeQueries response parsed with parse_dax_response or its raw body.
+    dtypes: dict
+        Optional. Column name to dtype to override the inferred type of specific columns.
+    full_column_names: bool
+        If True keeps names like 'Table[Column]'. By default only the column name is kept unless it's duplicated.
+    ### Returns
+    ----
+    pyarrow.Table:
+        A typed arrow table with every row of the result.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("pyarrow is required to return arrow tables. Install it with: pip install pyarrow")
+    df = dax_result_to_pandas(dax_result, dtypes=dtypes, full_column_names=full_column_names)
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+def get_retry_after(res, default=None):
+    """Returns the seconds to wait from the Retry-After header of a response.
+    ### Parameters
+    ----
+    res: Response
+        Response object from requests library.
+    default: float
+        Value returned when the header is missing or it isn't a number of seconds.
+    ### Returns
+    ----
+    float:
+        The seconds to wait before calling the API again.
+    """
+    try:
+        return float(res.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return default
+
+def request_with_retry(method, url, max_retries=5, backoff=2, **kwargs):
+    """Sends a request retrying throttled (429) or unavailable (503) responses. It waits the Retry-After header seconds or an exponential backoff.
+    ### Parameters
+    ----
+    method: str
+        The HTTP method like "GET" or "POST".
+    url: str
+        The url of the request.
+    max_retries: int
+        Maximum number of retries. By default 5.
+    backoff: float
+        Base of the exponential wait in seconds when there is no Retry-After header. By default 2.
+    kwargs:
+        Any other argument for requests.request like headers or data.
+    ### Returns
+    ----
+    Response object from requests library. It raises requests.exceptions.HTTPError for error status codes.
+    """
+    attempt = 0
+    while True:
+        res = requests.request(method, url, **kwargs)
+        if res.status_code in (429, 503) and attempt < max_retries:
+            time.sleep(get_retry_after(res, backoff ** attempt))
+            attempt = attempt + 1
+            continue
+        res.raise_for_status()
+        return res
+
+def get_all_pages(url, headers):
+    """Requests every page of a Fabric list API following continuationUri or continuationToken and appends the lists of the pages, like value or the itemEntities of admin APIs.
+    ### Parameters
+    ----
+    url: str
+        The url of the first page with its filters.
+    headers: dict
+        The headers of the requests.
+    ### Returns
+    ----
+    Dict:
+        The first page with the lists of every page. It raises requests.exceptions.HTTPError for error status codes.
+    """
+    data = request_with_retry("GET", url, headers=headers).json()
+    page = data
+    while page.get("continuationToken") != None:
+        next_url = page.get("continuationUri") or "{}{}continuationToken={}".format(url, "&" if "?" in url else "?", requests.utils.quote(page["continuationToken"], safe=""))
+        page = request_with_retry("GET", next_url, headers=headers).json()
+        for key, values in page.items():
+            if isinstance(values, list):
+                data.setdefault(key, []).extend(values)
+    data.pop("continuationToken", None)
+    data.pop("continuationUri", None)
+    return data
+
+def dax_literal(value):
+    """Returns the DAX literal of a python value to build filters in queries.
+    ### Parameters
+    ----
+    value: any
+        A number, string, bool, date or datetime value.
+    ### Returns
+    ----
+    str:
+        The value written as a DAX expression. E.g. a datetime becomes (DATE(2024, 1, 31) + TIME(0, 0, 0)) and text is quoted escaping double quotes.
+    """
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return "BLANK()"
+    if isinstance(value, (bool, np.bool_)):
+        return "TRUE()" if value else "FALSE()"
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return repr(value.item() if hasattr(value, "item") else value)
+    if hasattr(value, "year") and hasattr(value, "hour"):
+        return "(DATE({}, {}, {}) + TIME({}, {}, {}))".format(value.year, value.month, value.day, value.hour, value.minute, value.second)
+    if hasattr(value, "year"):
+        return "DATE({}, {}, {})".format(value.year, value.month, value.day)
+    return '"{}"'.format(str(value).replace('"', '""'))
+
+def imap_ordered(func, items, max_workers=4):
+    """Runs a function over items in a thread pool yielding the results in the same order of the items.
+    Only a bounded number of calls is in flight so results don't pile up in memory when the consumer is slower.
+    ### Parameters
+    ----
+    func: function
+        The function to run with each item as its single argument.
+    items: iterable
+        The arguments for each call.
+    max_workers: int
+        Maximum number of concurrent calls. By default 4.
+    ### Returns
+    ----
+    Generator:
+        The results of each call in the order of the items. Exceptions are raised when their result is reached.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = collections.deque(executor.submit(func, item) for item in itertools.islice(items, max_workers * 2))
+        while pending:
+            result = pending.popleft().result()
+            for item in itertools.islice(items, 1):
+                pending.append(executor.submit(func, item))
+            yield result
+
+class RateLimiter():
+    """Thread safe sliding window limiter to keep concurrent requests under an API rate limit.
+    """
+
+    def __init__(self, max_calls, period=60):
+        """Create a limiter allowing max_calls every period seconds.
+        Args:
+            max_calls: int
+                Maximum number of calls in the period. E.g. 120 for executeQueries per user.
+            period: float
+                Length of the window in seconds. By default 60.
+        """
+        self.max_calls = max_calls
+        self.period = period
+        self.calls = collections.deque()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a call is allowed by the limit and registers it.
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                while self.calls and now - self.calls[0] >= self.period:
+                    self.calls.popleft()
+                if len(self.calls) < self.max_calls:
+                    self.calls.append(now)
+                    return
+                wait = self.period - (now - self.calls[0])
+            time.sleep(wait)
+
+def normalize_dax_query(query):
+    """Normalizes a DAX query to compare queries that only differ in whitespace or comments. String literals and names are kept as they are.
+    ### Parameters
+    ----
+    query: str
+        The DAX query.
+    ### Returns
+    ----
+    str:
+        The query with comments removed and whitespace collapsed outside of quoted text.
+    """
+    tokens = re.findall(r'"(?:[^"]|"")*"|\'(?:[^\']|\'\')*\'|\[[^\]]*\]|//[^\n]*|--[^\n]*|/\*.*?\*/|\s+|[^"\'\[/\-\s]+|.', query, flags=re.DOTALL)
+    out = []
+    for token in tokens:
+        if token.startswith(("//", "--", "/*")):
+            token = " "
+        if token.isspace():
+            if out and out[-1] != " ":
+                out.append(" ")
+        else:
+            out.append(token)
+    return "".join(out).strip()
+
+def get_refresh_id(res):
+    """Returns the refresh id of a dataset refresh response to track it with get_refresh_execution_details_in_group.
+    ### Parameters
+    ----
+    res: Response
+        Response object of refresh_dataset_in_group or enhanced_refresh_dataset_in_group.
+    ### Returns
+    ----
+    str:
+        The refresh id from the Location header, or the x-ms-request-id header, which is the requestId of the refresh history, when there is no Location. None when there is neither.
+    """
+    location = res.headers.get("Location")
+    if location:
+        return location.rstrip("/").split("/")[-1]
+    return res.headers.get("x-ms-request-id")
+
+def unquote_tmdl_name(name):
+    """Removes the single quotes of a TMDL object name. 'My Table' becomes My Table and '' becomes a single quote.
+    ### Parameters
+    ----
+    name: str
+        The name as written in the TMDL file.
+    ### Returns
+    ----
+    str:
+        The object name.
+    """
+    name = name.strip()
+    if len(name) > 1 and name.startswith("'") and name.endswith("'"):
+        return name[1:-1].replace("''", "'")
+    return name
+
+def parse_tmdl_partitions(tables_definition):
+    """Parses the partitions of TMDL table definitions with parse_tmdl_tree, skipping columns, measures and the other objects of the tables.
+    ### Parameters
+    ----
+    tables_definition: str or list
+        The TMDL-formatted string containing table definitions or the list of table documents.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with columns: table, partition, source_type, mode and has_refresh_policy (table level incremental refresh policy).
+    """
+    if isinstance(tables_definition, str):
+        tables_definition = [tables_definition]
+    skip = {"column", "measure", "hierarchy", "calculationGroup", "annotation", "extendedProperty"}
+    records = []
+    for document in tables_definition:
+        for table in parse_tmdl_tree(document, skip):
+            if table["objectType"] != "table":
+                continue
+            has_refresh_policy = any(child["objectType"] == "refreshPolicy" for child in table["children"])
+            for partition in table["children"]:
+                if partition["objectType"] == "partition":
+                    records.append({
+                        "table": table["name"],
+                        "partition": partition["name"],
+                        "source_type": partition["value"],
+                        "mode": partition["properties"].get("mode"),
+                        "has_refresh_policy": has_refresh_policy
+                    })
+    return pd.DataFrame(records, columns=["table", "partition", "source_type", "mode", "has_refresh_policy"])
+
+def split_tmdl_name(text):
+    """Splits the object name from the rest of a TMDL declaration. 'My ''Table''' = x returns My 'Table' and = x.
+    ### Parameters
+    ----
+    text: str
+        The declaration after the object type.
+    ### Returns
+    ----
+    Tuple:
+        The unquoted name and the rest of the text, starting with = when the object has a default value.
+    """
+    text = text.lstrip()
+    if text.startswith("'"):
+        i = text.find("'", 1)
+        # A doubled quote is an escaped quote inside the name
+        while i >= 0 and text[i + 1:i + 2] == "'":
+            i = text.find("'", i + 2)
+        if i < 0:
+            i = len(text)
+        return text[1:i].replace("''", "'"), text[i + 1:].lstrip()
+    i = text.find("=")
+    if i < 0:
+        return text.strip(), ""
+    return text[:i].strip(), text[i:]
+
+def split_tmdl_reference(text):
+    """Splits a TMDL column reference like 'Sales Table'.Amount into table and column names.
+    ### Parameters
+    ----
+    text: str
+        The reference as written in the TMDL file.
+    ### Returns
+    ----
+    Tuple:
+        The table and column names. The table is None when the reference has no table.
+    """
+    text = text.strip()
+    if text.startswith("'"):
+        table, rest = split_tmdl_name(text)
+        if rest.startswith("."):
+            return table, unquote_tmdl_name(rest[1:])
+        return None, table
+    table, dot, column = text.partition(".")
+    if not dot:
+        return None, unquote_tmdl_name(table)
+    return table, unquote_tmdl_name(column)
+
+TMDL_OBJECT_TYPES = frozenset({
+    "database", "model", "table", "column", "measure", "partition", "hierarchy", "level", "calculationGroup",
+    "calculationItem", "relationship", "role", "tablePermission", "columnPermission", "member", "expression",
+    "annotation", "extendedProperty", "culture", "linguisticMetadata", "perspective", "perspectiveTable",
+    "perspectiveColumn", "perspectiveMeasure", "perspectiveHierarchy", "dataSource", "queryGroup", "refreshPolicy",
+    "function", "calendar", "ref"
+})
+
+TMDL_COLLECTIONS = {
+    "table": "tables", "column": "columns", "measure": "measures", "partition": "partitions",
+    "hierarchy": "hierarchies", "level": "levels", "calculationItem": "calculationItems",
+    "relationship": "relationships", "role": "roles", "tablePermission": "tablePermissions",
+    "columnPermission": "columnPermissions", "member": "members", "expression": "expressions",
+    "annotation": "annotations", "extendedProperty": "extendedProperties", "culture": "cultures",
+    "perspective": "perspectives", "perspectiveTable": "tables", "perspectiveColumn": "columns",
+    "perspectiveMeasure": "measures", "perspectiveHierarchy": "hierarchies", "dataSource": "dataSources",
+    "queryGroup": "queryGroups", "function": "functions", "calendar": "calendars", "ref": "references"
+}
+
+TMDL_DEFAULT_KEYS = {
+    "measure": "expression", "column": "expression", "calculationItem": "expression", "expression": "expression",
+    "function": "expression", "tablePermission": "filterExpression", "annotation": "value", "extendedProperty": "value",
+    "partition": "sourceType"
+}
+
+TMDL_WORD_PATTERN = re.compile(r"\w*")
+
+def tmdl_collection_name(object_type):
+    """Returns the TMSL collection name of a TMDL object type, e.g. measures for measure.
+    ### Parameters
+    ----
+    object_type: str
+        The TMDL object type.
+    ### Returns
+    ----
+    str:
+        The collection name or None when the object is a single child like calculationGroup or refreshPolicy.
+    """
+    return TMDL_COLLECTIONS.get(object_type)
+
+def parse_tmdl_tree(text, skip=None):
+    """Parses a TMDL document in a single pass into a tree of declarations. Each node keeps its object type, name, properties,
+    default value (the text after =) and children. Multi-line expressions are the lines indented two levels deeper than their declaration or a ``` block.
+    ### Parameters
+    ----
+    text: str
+        The TMDL document.
+    skip: set
+        Optional. Object types left out of the tree with all their lines, e.g. {"annotation"}. Skipped lines are only checked for their indentation.
+    ### Returns
+    ----
+    List:
+        The root nodes as dicts with objectType, name, description, value, properties and children keys.
+    """
+    skip = skip or ()
+    roots = []
+    stack = []
+    description = []
+    # Expression being read: [target dict, key, minimum indent, lines, fenced]
+    pending = None
+    # Indentation of the lines that belong to a skipped object
+    skipping = None
+
+    def close(pending):
+        lines = pending[3]
+        while lines and not lines[-1].strip():
+            lines.pop()
+        if pending[4]:
+            margin = min((len(l) - len(l.lstrip()) for l in lines if l.strip()), default=0)
+        else:
+            margin = pending[2]
+        pending[0][pending[1]] = "\n".join(l[margin:] for l in lines)
+
+    def start(target, key, value, indent):
+        if value == "```":
+            return [target, key, indent + 1, [], True]
+        if value == "":
+            return [target, key, indent + 2, [], False]
+        target[key] = value
+        return None
+
+    for line in text.splitlines():
+        if skipping is not None:
+            if line.startswith(skipping) or not line.strip():
+                continue
+            skipping = None
+        if not line and pending is None:
+            continue
+        body = line.lstrip("\t")
+        indent = len(line) - len(body)
+        stripped = body.strip()
+        if pending is not None:
+            if pending[4]:
+                if stripped == "```":
+                    close(pending)
+                    pending = None
+                else:
+                    pending[3].append(line)
+                continue
+            if not stripped or indent >= pending[2]:
+                pending[3].append(line)
+                continue
+            close(pending)
+            pending = None
+        if not stripped:
+            continue
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1] if stack else None
+        key, colon, value = stripped.partition(":")
+        if colon and key.isidentifier():
+            # Fast path of the most common line, a key: value property
+            if description:
+                description = []
+            if parent is not None:
+                properties = parent["properties"]
+                value = value.strip()
+                if key in properties:
+                    previous = properties[key]
+                    properties[key] = (previous if isinstance(previous, list) else [previous]) + [value]
+                else:
+                    properties[key] = value
+            continue
+        if stripped.startswith("///"):
+            description.append(stripped[3:].strip())
+            continue
+        end = TMDL_WORD_PATTERN.match(stripped).end()
+        word = stripped[:end]
+        rest = stripped[end:].lstrip()
+        if word in TMDL_OBJECT_TYPES and not rest.startswith((":", "=")):
+            if word in skip:
+                description = []
+                skipping = "\t" * (indent + 1)
+                if stripped.endswith("```"):
+                    # A fenced expression can be less indented, it's read and dropped
+                    pending = [{}, "value", indent + 1, [], True]
+                    skipping = None
+                continue
+            node = {"objectType": word, "name": None, "description": "\n".join(description) or None, "value": None, "properties": {}, "children": []}
+            description = []
+            if word == "ref":
+                kind, _, target = rest.partition(" ")
+                node["properties"]["refType"] = kind
+                node["name"] = unquote_tmdl_name(target)
+            elif rest:
+                node["name"], rest = split_tmdl_name(rest)
+                if rest.startswith("="):
+                    pending = start(node, "value", rest[1:].strip(), indent)
+            (parent["children"] if parent is not None else roots).append(node)
+            stack.append((indent, node))
+            continue
+        description = []
+        if parent is None:
+            continue
+        properties = parent["properties"]
+        if rest.startswith(":"):
+            key, value = word, rest[1:].strip()
+        elif rest.startswith("="):
+            pending = start(properties, word, rest[1:].strip(), indent)
+            continue
+        else:
+            key, value = stripped, True
+        # Repeated properties like changedProperty are kept as lists
+        if key in properties:
+            previous = properties[key]
+            properties[key] = (previous if isinstance(previous, list) else [previous]) + [value]
+        else:
+            properties[key] = value
+    if pending is not None:
+        close(pending)
+    return roots
+
+def tmdl_node_to_dict(node):
+    """Converts a node of parse_tmdl_tree into a dict with the TMSL (model.bim) property names.
+    ### Parameters
+    ----
+    node: dict
+        A node returned by parse_tmdl_tree.
+    ### Returns
+    ----
+    Dict:
+        The object with its properties and child collections, e.g. a table with columns, measures and partitions.
+    """
+    object_type = node["objectType"]
+    result = {} if node["name"] is None else {"name": node["name"]}
+    if node["description"] is not None:
+        result["description"] = node["description"]
+    for key, value in node["properties"].items():
+        if value in ("true", "false"):
+            value = value == "true"
+        elif isinstance(value, str) and key != "formatString" and value.isdigit():
+            value = int(value)
+        result[key] = value
+    if node["value"] is not None:
+        result[TMDL_DEFAULT_KEYS.get(object_type, "value")] = node["value"]
+    for child in node["children"]:
+        collection = TMDL_COLLECTIONS.get(child["objectType"])
+        if collection is None:
+            result[child["objectType"]] = tmdl_node_to_dict(child)
+        else:
+            result.setdefault(collection, []).append(tmdl_node_to_dict(child))
+    if object_type == "partition":
+        source = {"type": result.pop("sourceType", None)}
+        if "source" in result:
+            source["expression"] = result.pop("source")
+        result["source"] = source
+    elif object_type == "column" and "expression" in result:
+        result["type"] = "calculated"
+    elif object_type == "relationship":
+        for side in ("from", "to"):
+            if isinstance(result.get(side + "Column"), str):
+                result[side + "Table"], result[side + "Column"] = split_tmdl_reference(result[side + "Column"])
+    return result
+
+def parse_tmdl(documents):
+    """Parses TMDL documents into a database dict shaped like a model.bim (TMSL) so the bim helpers of this module can use it.
+    Every document is read in a single pass without backtracking.
+    ### Parameters
+    ----
+    documents: str or list
+        A TMDL document or the list of documents of a definition (database.tmdl, model.tmdl, tables/*.tmdl, relationships.tmdl, roles/*.tmdl, expressions.tmdl...).
+    ### Returns
+    ----
+    Dict:
+        A dictionary with the database properties and "model" with tables (columns, measures, partitions, hierarchies, calculationGroup, annotations),
+        relationships, roles, expressions, cultures, perspectives, annotations and references.
+    """
+    if isinstance(documents, str):
+        documents = [documents]
+    database = {"model": {}}
+    model = database["model"]
+    for document in documents:
+        for node in parse_tmdl_tree(document):
+            obj = tmdl_node_to_dict(node)
+            if node["objectType"] == "database":
+                obj.pop("model", None)
+                database.update(obj)
+            elif node["objectType"] == "model":
+                for key, value in obj.items():
+                    if isinstance(value, list):
+                        model.setdefault(key, []).extend(value)
+                    else:
+                        model[key] = value
+            else:
+                collection = tmdl_collection_name(node["objectType"])
+                if collection is None:
+                    model[node["objectType"]] = obj
+                else:
+                    model.setdefault(collection, []).append(obj)
+    return database
+
+def refresh_history_to_pandas(histories):
+    """Normalizes the refresh history of many datasets into a single typed DataFrame.
+    ### Parameters
+    ----
+    histories: list
+        List of tuples (workspace_id, dataset_id, history) where history is the response of get_refresh_history_in_group.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with one row per refresh. Durations are in seconds and times are UTC.
+    """
+    columns = ["workspaceId", "datasetId", "requestId", "id", "refreshType", "status", "startTime", "endTime", "serviceExceptionJson"]
+    records = [dict(entry, workspaceId=workspace_id, datasetId=dataset_id) for workspace_id, dataset_id, history in histories if history for entry in history.get("value", [])]
+    df = pd.DataFrame(records).reindex(columns=columns)
+    for col in ["startTime", "endTime"]:
+        df[col] = pd.to_datetime(df[col], utc=True, errors="coerce")
+    for col in ["workspaceId", "datasetId", "requestId", "refreshType", "status", "serviceExceptionJson"]:
+        df[col] = df[col].astype("string")
+    df["id"] = pd.to_numeric(df["id"], errors="coerce").astype("Int64")
+    df["duration"] = (df["endTime"] - df["startTime"]).dt.total_seconds()
+    df["failed"] = df["status"].eq("Failed").fillna(False).astype("bool")
+    return df.sort_values(["datasetId", "startTime"]).reset_index(drop=True)
+
+def get_refresh_duration_percentiles(df_history, percentiles=(0.5, 0.9, 0.95, 0.99)):
+    """Computes the refresh duration percentiles and failure rate of each dataset. Only finished refreshes count for durations.
+    ### Parameters
+    ----
+    df_history: DataFrame
+        The DataFrame returned by refresh_history_to_pandas.
+    percentiles: tuple
+        The percentiles to compute between 0 and 1. By default (0.5, 0.9, 0.95, 0.99).
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with one row per dataset with refreshes, failures, failureRate, meanDuration, maxDuration and a pXX column per percentile.
+    """
+    keys = ["workspaceId", "datasetId"]
+    stats = df_history.groupby(keys).agg(
+        refreshes=("status", "size"),
+        failures=("failed", "sum"),
+        meanDuration=("duration", "mean"),
+        maxDuration=("duration", "max")
+    )
+    stats["failureRate"] = stats["failures"] / stats["refreshes"]
+    quantiles = df_history.dropna(subset=["duration"]).groupby(keys)["duration"].quantile(list(percentiles)).unstack()
+    quantiles.columns = ["p{:g}".format(p * 100) for p in quantiles.columns]
+    return stats.join(quantiles).reset_index()
+
+def get_refresh_failure_streaks(df_history):
+    """Computes the current and the longest run of consecutive failed refreshes of each dataset.
+    ### Parameters
+    ----
+    df_history: DataFrame
+        The DataFrame returned by refresh_history_to_pandas.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with workspaceId, datasetId, currentStreak, longestStreak and lastSuccess columns sorted by currentStreak.
+    """
+    df = df_history.sort_values(["datasetId", "startTime"])
+    finished = df[df["status"].isin(["Completed", "Failed"])]
+    # Every success or new dataset starts a new run, failures within a run are counted cumulatively
+    run = (~finished["failed"] | finished["datasetId"].ne(finished["datasetId"].shift())).cumsum()
+    streak = finished["failed"].astype("int64").groupby(run).cumsum()
+    last_success = finished["endTime"].where(~finished["failed"])
+    streaks = finished[["workspaceId", "datasetId"]].assign(streak=streak, lastSuccess=last_success).groupby(["workspaceId", "datasetId"]).agg(
+        currentStreak=("streak", "last"),
+        longestStreak=("streak", "max"),
+        lastSuccess=("lastSuccess", "max")
+    ).reset_index()
+    return streaks.sort_values(["currentStreak", "longestStreak"], ascending=False).reset_index(drop=True)
+
+def get_refresh_heatmap(df_history, value="refreshes", tz="UTC"):
+    """Pivots the refreshes by weekday and hour of the start time to find the busy and the failing hours.
+    ### Parameters
+    ----
+    df_history: DataFrame
+        The DataFrame returned by refresh_history_to_pandas.
+    value: str
+        The measure of each cell: refreshes, failures, failureRate or duration (total seconds). By default refreshes.
+    tz: str
+        The time zone for the weekday and hour. By default UTC.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with one row per weekday (Monday to Sunday) and one column per hour (0 to 23).
+    """
+    weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+    start = df_history["startTime"].dropna().dt.tz_convert(tz)
+    df = df_history.loc[start.index, ["failed", "duration"]].assign(weekday=start.dt.dayofweek.to_numpy(), hour=start.dt.hour.to_numpy())
+    cells = df.groupby(["weekday", "hour"]).agg(refreshes=("failed", "size"), failures=("failed", "sum"), duration=("duration", "sum"))
+    cells["failureRate"] = cells["failures"] / cells["refreshes"]
+    heatmap = cells[value].unstack("hour").reindex(index=range(7), columns=range(24))
+    if value != "failureRate":
+        heatmap = heatmap.fillna(0)
+    heatmap.index = pd.CategoricalIndex([weekdays[i] for i in heatmap.index], categories=weekdays, ordered=True, name="weekday")
+    return heatmap
+
+def get_refresh_regressions(df_history, window=10, min_periods=5, threshold=1.5):
+    """Flags refreshes that took longer than a factor of the trailing median duration of the same dataset.
+    ### Parameters
+    ----
+    df_history: DataFrame
+        The DataFrame returned by refresh_history_to_pandas.
+    window: int
+        Number of previous completed refreshes in the baseline. By default 10.
+    min_periods: int
+        Minimum number of previous completed refreshes to have a baseline. By default 5.
+    threshold: float
+        Ratio over the baseline to flag a regression. By default 1.5.
+    ### Returns
+    ----
+    DataFrame:
+        The completed refreshes with baselineDuration, ratio and regression columns.
+    """
+    df = df_history[df_history["status"].eq("Completed").fillna(False)].sort_values(["datasetId", "startTime"])
+    # Shift so the baseline only contains the refreshes before each one
+    previous = df.groupby("datasetId")["duration"].shift()
+    baseline = previous.groupby(df["datasetId"]).rolling(window, min_periods=min_periods).median().reset_index(level=0, drop=True)
+    df = df.assign(baselineDuration=baseline, ratio=df["duration"] / baseline)
+    df["regression"] = (df["ratio"] > threshold).fillna(False)
+    return df.reset_index(drop=True)
+
+def dax_references(expression):
+    """Extracts the column and measure references of a DAX expression in a single scan. Strings and comments are skipped.
+    ### Parameters
+    ----
+    expression: str
+        The DAX expression.
+    ### Returns
+    ----
+    List:
+        List of tuples (table, name). Table is None for unqualified references like [Sales Amount].
+    """
+    references = []
+    for match in re.finditer(r'"(?:[^"]|"")*"|//[^\n]*|--[^\n]*|/\*.*?\*/|(\'(?:[^\']|\'\')*\'|[A-Za-z_]\w*)?\[((?:[^\]]|\]\])*)\]', expression or "", flags=re.DOTALL):
+        if match.group(0)[0] == "[" or match.group(1) is not None:
+            table = unquote_tmdl_name(match.group(1)) if match.group(1) else None
+            references.append((table, match.group(2).replace("]]", "]")))
+    return references
+
+def dax_object_key(object_type, table, name):
+    """Returns the key of a model object in the DAX dependency graph: [Measure] for measures and 'Table'[Column] for columns.
+    ### Parameters
+    ----
+    object_type: str
+        measure, column or any other object type of the graph.
+    table: str
+        The table name.
+    name: str
+        The object name.
+    ### Returns
+    ----
+    str:
+        The key of the object.
+    """
+    if object_type == "measure":
+        return "[{}]".format(name.replace("]", "]]"))
+    return "'{}'[{}]".format(table.replace("'", "''"), name.replace("]", "]]"))
+
+def get_model_dax_objects(model):
+    """Lists the objects of a model that hold or can be referenced by DAX: measures, columns, calculation items and row level security filters.
+    ### Parameters
+    ----
+    model: dict
+        A model.bim dict (get_semantic_model_bim or parse_tmdl) or a dataset of a tenant scan result with datasetExpressions.
+    ### Returns
+    ----
+    List:
+        List of dicts with key, type, table, name, expression and isHidden.
+    """
+    model = model.get("model", model)
+    objects = []
+    for table in model.get("tables", []):
+        table_name = table["name"]
+        for column in table.get("columns", []):
+            if column.get("type") == "rowNumber":
+                continue
+            objects.append({"key": dax_object_key("column", table_name, column["name"]), "type": "column", "table": table_name, "name": column["name"], "expression": column.get("expression"), "isHidden": bool(column.get("isHidden"))})
+        for measure in table.get("measures", []):
+            objects.append({"key": dax_object_key("measure", table_name, measure["name"]), "type": "measure", "table": table_name, "name": measure["name"], "expression": measure.get("expression"), "isHidden": bool(measure.get("isHidden"))})
+        for item in (table.get("calculationGroup") or {}).get("calculationItems", []):
+            objects.append({"key": "calculationItem:'{}'[{}]".format(table_name, item["name"]), "type": "calculationItem", "table": table_name, "name": item["name"], "expression": item.get("expression"), "isHidden": False})
+    for role in model.get("roles", []):
+        for permission in role.get("tablePermissions", []):
+            objects.append({"key": "role:{}'{}'".format(role["name"], permission["name"]), "type": "tablePermission", "table": permission["name"], "name": role["name"], "expression": permission.get("filterExpression"), "isHidden": False})
+    return objects
+
+class DaxDependencyGraph():
+    """Dependency graph of the measures, columns, calculation items and security filters of a semantic model resolved from their DAX expressions.
+    """
+
+    def __init__(self, objects, edges, structural=None):
+        """Create a graph from its objects and edges. Use get_dax_dependency_graph to build it from a model.
+        Args:
+            objects: list
+                The objects returned by get_model_dax_objects.
+            edges: list
+                List of tuples (source key, target key) where the source expression references the target.
+            structural: list
+                Keys of columns used by the model structure (relationships, hierarchies, sort by and variations).
+        """
+        self.objects = {o["key"]: o for o in objects}
+        self.edges = [tuple(e) for e in edges]
+        self.structural = set(structural or [])
+        self.dependencies = collections.defaultdict(set)
+        self.dependents = collections.defaultdict(set)
+        for source, target in self.edges:
+            self.dependencies[source].add(target)
+            self.dependents[target].add(source)
+
+    def walk(self, key, adjacency, transitive):
+        """Breadth first search from an object over the dependencies or the dependents.
+        ### Parameters
+        ----
+        key: str
+            The object key.
+        adjacency: dict
+            self.dependencies or self.dependents.
+        transitive: bool
+            Keep walking from the objects found.
+        ### Returns
+        ----
+        List:
+            The keys found in breadth first order.
+        """
+        found = []
+        seen = {key}
+        queue = collections.deque([key])
+        while queue:
+            for neighbour in adjacency.get(queue.popleft(), ()):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    found.append(neighbour)
+                    if transitive:
+                        queue.append(neighbour)
+        return found
+
+    def get_dependencies(self, key, transitive=True):
+        """Returns the objects referenced by an object.
+        ### Parameters
+        ----
+        key: str
+            The object key, e.g. [Sales Amount] or 'Sales'[Amount]
+        transitive: bool
+            Include the dependencies of the dependencies. By default True.
+        ### Returns
+        ----
+        List:
+            The keys of the referenced objects.
+        """
+        return self.walk(key, self.dependencies, transitive)
+
+    def get_impact(self, key, transitive=True):
+        """Returns the objects that use an object, i.e. what breaks or changes if it is modified or removed.
+        ### Parameters
+        ----
+        key: str
+            The object key, e.g. [Sales Amount] or 'Sales'[Amount]
+        transitive: bool
+            Include the objects using the dependents. By default True.
+        ### Returns
+        ----
+        List:
+            The keys of the dependent objects.
+        """
+        return self.walk(key, self.dependents, transitive)
+
+    def get_unused_measures(self):
+        """Returns the measures not referenced by any other DAX expression of the model. Report visuals are not considered.
+        ### Returns
+        ----
+        List:
+            The keys of the unused measures.
+        """
+        return [k for k, o in self.objects.items() if o["type"] == "measure" and not self.dependents.get(k)]
+
+    def get_unused_columns(self):
+        """Returns the columns not referenced by DAX nor used by relationships, hierarchies or sort by columns. Report visuals are not considered.
+        ### Returns
+        ----
+        List:
+            The keys of the unused columns.
+        """
+        return [k for k, o in self.objects.items() if o["type"] == "column" and not self.dependents.get(k) and k not in self.structural]
+
+    def get_unresolved_references(self):
+        """Returns the references that don't match any object of the model, e.g. broken measures.
+        ### Returns
+        ----
+        List:
+            List of tuples (source key, reference).
+        """
+        return [(s, t) for s, t in self.edges if t not in self.objects]
+
+    def to_pandas(self):
+        """Returns the edges of the graph as a DataFrame.
+        ### Returns
+        ----
+        DataFrame:
+            A pandas DataFrame with source, source_type, target, target_type and resolved columns.
+        """
+        types = {k: o["type"] for k, o in self.objects.items()}
+        df = pd.DataFrame(self.edges, columns=["source", "target"])
+        df["source_type"] = df["source"].map(types)
+        df["target_type"] = df["target"].map(types)
+        df["resolved"] = df["target_type"].notna()
+        return df[["source", "source_type", "target", "target_type", "resolved"]]
+
+    def to_dict(self):
+        """Returns the graph as a json serializable dict. DaxDependencyGraph(**graph.to_dict()) restores it.
+        ### Returns
+        ----
+        Dict:
+            The objects, edges and structural keys.
+        """
+        return {"objects": list(self.objects.values()), "edges": [list(e) for e in self.edges], "structural": sorted(self.structural)}
+
+def get_dax_dependency_graph(model, cache_dir=None):
+    """Builds the DAX dependency graph of a model. References are resolved case insensitive like DAX does:
+    unqualified names are measures or, if there is no such measure, columns of the same table.
+    ### Parameters
+    ----
+    model: dict
+        A model.bim dict (get_semantic_model_bim or parse_tmdl) or a dataset of a tenant scan result with datasetExpressions.
+    cache_dir: str
+        Optional. Folder to store the graphs by model hash so unchanged models aren't analyzed again, e.g. across runs over a tenant scan.
+    ### Returns
+    ----
+    DaxDependencyGraph:
+        The graph with dependency, impact and unused objects queries.
+    """
+    path = None
+    if cache_dir != None:
+        digest = hashlib.sha256(json.dumps(model, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        path = os.path.join(cache_dir, digest + ".json")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                return DaxDependencyGraph(**json.load(f))
+    objects = get_model_dax_objects(model)
+    measures = {o["name"].lower(): o["key"] for o in objects if o["type"] == "measure"}
+    columns = {(o["table"].lower(), o["name"].lower()): o["key"] for o in objects if o["type"] == "column"}
+    edges = []
+    for o in objects:
+        seen = set()
+        for table, name in dax_references(o["expression"]):
+            lower = name.lower()
+            if table is None:
+                target = measures.get(lower) or columns.get((o["table"].lower(), lower)) or dax_object_key("measure", None, name)
+            else:
+                target = columns.get((table.lower(), lower)) or measures.get(lower) or dax_object_key("column", table, name)
+            if target not in seen and target != o["key"]:
+                seen.add(target)
+                edges.append((o["key"], target))
+    structural = []
+    inner = model.get("model", model)
+    for r in inner.get("relationships", []):
+        for side in ("from", "to"):
+            if r.get(side + "Table") and r.get(side + "Column"):
+                structural.append(columns.get((r[side + "Table"].lower(), r[side + "Column"].lower())))
+    for table in inner.get("tables", []):
+        lower = table["name"].lower()
+        for hierarchy in table.get("hierarchies", []):
+            structural.extend(columns.get((lower, str(level.get("column", "")).lower())) for level in hierarchy.get("levels", []))
+        for column in table.get("columns", []):
+            if column.get("sortByColumn"):
+                structural.append(columns.get((lower, column["sortByColumn"].lower())))
+    graph = DaxDependencyGraph(objects, edges, [k for k in structural if k])
+    if path != None:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(graph.to_dict(), f)
+    return graph
+
+def definition_to_model(definition):
+    """Returns the model.bim dict of a semantic model definition in any of its forms.
+    ### Parameters
+    ----
+    definition: dict or list
+        A model.bim dict (get_semantic_model_bim), a getDefinition response in TMSL or TMDL format or a list of parts like build_semantic_model_parts.
+    ### Returns
+    ----
+    Dict:
+        A dictionary shaped like a model.bim with "model".
+    """
+    if isinstance(definition, dict) and "model" in definition:
+        return definition
+    parts = definition["definition"]["parts"] if isinstance(definition, dict) else definition
+    documents = {}
+    for part in parts:
+        path = part.get("path") or part.get("Path")
+        documents[path] = base64.b64decode((part.get("payload") or part.get("Payload")).encode("utf-8")).decode("utf-8-sig")
+    for path, content in documents.items():
+        if path.endswith("model.bim"):
+            return json.loads(content)
+    return parse_tmdl([content for path, content in sorted(documents.items()) if path.endswith(".tmdl")])
+
+def hash_model_object(obj):
+    """Returns a hash of a model object and all its children that doesn't depend on the order of the keys.
+    ### Parameters
+    ----
+    obj: dict
+        Any object of a model.bim dict.
+    ### Returns
+    ----
+    str:
+        The sha1 hex digest of the object.
+    """
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def diff_model_collection(old_items, new_items, object_type, table, children, changes):
+    """Matches two collections of model objects by lineageTag and then by name and appends their differences to changes.
+    Objects with the same hash are skipped without comparing their children.
+    ### Parameters
+    ----
+    old_items: list
+        The objects of the old model.
+    new_items: list
+        The objects of the new model.
+    object_type: str
+        The singular object type reported in the changes, e.g. column.
+    table: str
+        The table of the objects or None for model level objects.
+    children: dict
+        The child collections to compare recursively as {collection: object_type}, e.g. {"columns": "column"}.
+    changes: list
+        The list where the changes are appended.
+    ### Returns
+    ----
+    None
+    """
+    def name_of(obj):
+        if object_type == "relationship" and obj.get("fromTable"):
+            return "{}[{}] -> {}[{}]".format(obj.get("fromTable"), obj.get("fromColumn"), obj.get("toTable"), obj.get("toColumn"))
+        return obj.get("name")
+
+    remaining = list(new_items)
+    by_tag = {o["lineageTag"]: o for o in remaining if o.get("lineageTag")}
+    by_name = {o.get("name"): o for o in remaining}
+    by_endpoints = {name_of(o): o for o in remaining}
+    matched = set()
+    for old in old_items:
+        new = by_tag.get(old.get("lineageTag")) if old.get("lineageTag") else None
+        if new is None or id(new) in matched:
+            new = by_name.get(old.get("name"))
+        if (new is None or id(new) in matched) and object_type == "relationship":
+            new = by_endpoints.get(name_of(old))
+        if new is None or id(new) in matched:
+            changes.append({"change": "removed", "object_type": object_type, "table": table, "name": name_of(old), "new_name": None, "properties": []})
+            continue
+        matched.add(id(new))
+        if hash_model_object(old) == hash_model_object(new):
+            continue
+        properties = sorted(k for k in set(old) | set(new) if k not in children and old.get(k) != new.get(k))
+        if properties:
+            change = "renamed" if properties == ["name"] else "modified"
+            changes.append({"change": change, "object_type": object_type, "table": table, "name": name_of(old), "new_name": new.get("name") if "name" in properties else None, "properties": properties})
+        for collection, child_type in children.items():
+            diff_model_collection(old.get(collection) or [], new.get(collection) or [], child_type, new.get("name") if object_type == "table" else table, {}, changes)
+    for new in new_items:
+        if id(new) not in matched:
+            changes.append({"change": "added", "object_type": object_type, "table": table, "name": name_of(new), "new_name": None, "properties": []})
+
+def diff_semantic_models(old_definition, new_definition):
+    """Compares two semantic model definitions object by object: tables, columns, measures, partitions, hierarchies, roles, relationships and expressions.
+    ### Parameters
+    ----
+    old_definition: dict or list
+        The current definition. Any form accepted by definition_to_model.
+    new_definition: dict or list
+        The definition to compare with. Any form accepted by definition_to_model.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with change (added, removed, modified or renamed), object_type, table, name, new_name and properties. Empty when the models are equal.
+    """
+    old = definition_to_model(old_definition)["model"]
+    new = definition_to_model(new_definition)["model"]
+    columns = ["change", "object_type", "table", "name", "new_name", "properties"]
+    if hash_model_object(old) == hash_model_object(new):
+        return pd.DataFrame(columns=columns)
+    collections_by_level = {"tables": "table", "relationships": "relationship", "roles": "role", "expressions": "expression", "cultures": "culture", "perspectives": "perspective"}
+    table_children = {"columns": "column", "measures": "measure", "partitions": "partition", "hierarchies": "hierarchy", "calculationGroup": "calculationGroup", "annotations": "annotation"}
+    changes = []
+    model_properties = sorted(k for k in set(old) | set(new) if k not in collections_by_level and k != "references" and old.get(k) != new.get(k))
+    if model_properties:
+        changes.append({"change": "modified", "object_type": "model", "table": None, "name": new.get("name"), "new_name": None, "properties": model_properties})
+    for collection, object_type in collections_by_level.items():
+        children = table_children if object_type == "table" else {"tablePermissions": "tablePermission", "members": "member"} if object_type == "role" else {}
+        old_items = old.get(collection) or []
+        new_items = new.get(collection) or []
+        if object_type == "table":
+            # The calculation group is a single object, compare it as a one item collection
+            old_items = [dict(t, calculationGroup=[t["calculationGroup"]]) if isinstance(t.get("calculationGroup"), dict) else t for t in old_items]
+            new_items = [dict(t, calculationGroup=[t["calculationGroup"]]) if isinstance(t.get("calculationGroup"), dict) else t for t in new_items]
+        diff_model_collection(old_items, new_items, object_type, None, children, changes)
+    return pd.DataFrame(changes, columns=columns)
+
+def get_model_rule_frames(definition, model_name=None, graph=None):
+    """Parses a semantic model into the columnar tables evaluated by the best practice rules: table, column, measure and relationship.
+    ### Parameters
+    ----
+    definition: dict or list
+        The model. Any form accepted by definition_to_model.
+    model_name: str
+        Optional. The name written in the model column of every table so many models can be concatenated.
+    graph: DaxDependencyGraph
+        Optional. The dependency graph of the model if you already have it. It is used to flag referenced columns and measures.
+    ### Returns
+    ----
+    Dict:
+        A dict of pandas DataFrames by object type. Missing format strings and descriptions are empty strings and absent flags are False, so predicates don't need to handle nulls.
+    """
+    model = definition_to_model(definition)
+    if graph is None:
+        graph = get_dax_dependency_graph(model)
+    unused = set(graph.get_unused_columns()) | set(graph.get_unused_measures())
+    inner = model.get("model", model)
+    tables, columns, measures, relationships = [], [], [], []
+    for table in inner.get("tables", []):
+        table_name = table["name"]
+        partitions = table.get("partitions", [])
+        tables.append({"table": table_name, "name": table_name, "isHidden": bool(table.get("isHidden")), "description": table.get("description") or "",
+                       "mode": (partitions[0].get("mode") if partitions else None) or inner.get("defaultMode") or "import",
+                       "isCalculationGroup": "calculationGroup" in table, "columns": len(table.get("columns", [])), "measures": len(table.get("measures", []))})
+        for column in table.get("columns", []):
+            if column.get("type") == "rowNumber":
+                continue
+            columns.append({"table": table_name, "name": column["name"], "type": column.get("type") or "data", "dataType": column.get("dataType") or "",
+                            "isHidden": bool(column.get("isHidden")), "isKey": bool(column.get("isKey")), "formatString": column.get("formatString") or "",
+                            "summarizeBy": column.get("summarizeBy") or "default", "description": column.get("description") or "",
+                            "referenced": dax_object_key("column", table_name, column["name"]) not in unused})
+        for measure in table.get("measures", []):
+            format_string = measure.get("formatString") or ("dynamic" if measure.get("formatStringDefinition") else "")
+            measures.append({"table": table_name, "name": measure["name"], "expression": measure.get("expression") or "",
+                             "isHidden": bool(measure.get("isHidden")), "formatString": format_string, "description": measure.get("description") or "",
+                             "displayFolder": measure.get("displayFolder") or "", "referenced": dax_object_key("measure", table_name, measure["name"]) not in unused})
+    for r in inner.get("relationships", []):
+        relationships.append({"table": r.get("fromTable"), "name": "'{}'[{}] -> '{}'[{}]".format(r.get("fromTable"), r.get("fromColumn"), r.get("toTable"), r.get("toColumn")),
+                              "fromTable": r.get("fromTable"), "fromColumn": r.get("fromColumn"), "toTable": r.get("toTable"), "toColumn": r.get("toColumn"),
+                              "crossFilteringBehavior": r.get("crossFilteringBehavior") or "oneDirection", "isActive": r.get("isActive", True) not in (False, "false"),
+                              "fromCardinality": r.get("fromCardinality") or "many", "toCardinality": r.get("toCardinality") or "one"})
+    frames = {
+        "table": pd.DataFrame(tables, columns=["table", "name", "isHidden", "description", "mode", "isCalculationGroup", "columns", "measures"]),
+        "column": pd.DataFrame(columns, columns=["table", "name", "type", "dataType", "isHidden", "isKey", "formatString", "summarizeBy", "description", "referenced"]),
+        "measure": pd.DataFrame(measures, columns=["table", "name", "expression", "isHidden", "formatString", "description", "displayFolder", "referenced"]),
+        "relationship": pd.DataFrame(relationships, columns=["table", "name", "fromTable", "fromColumn", "toTable", "toColumn", "crossFilteringBehavior", "isActive", "fromCardinality", "toCardinality"])
+    }
+    for df in frames.values():
+        df.insert(0, "model", model_name if model_name is not None else inner.get("name"))
+    return frames
+
+def get_default_model_rules():
+    """Returns the default best practice rules. Copy the list to change severities or parameters or to add your own rules.
+    A rule is a dict with id, object_type (table, column, measure or relationship), severity, description, predicate and optional parameters.
+    The predicate is a DataFrame.eval expression, where @name reads a parameter, or a function receiving the whole DataFrame of the object type and returning a boolean Series.
+    ### Returns
+    ----
+    List:
+        List of rule dicts.
+    """
+    return [
+        {"id": "unused_column", "object_type": "column", "severity": "warning", "description": "Column not referenced by DAX, relationships, hierarchies nor sort by columns. Remove it if no report uses it.",
+         "predicate": "~referenced & type != 'calculatedTableColumn'"},
+        {"id": "bidirectional_relationship", "object_type": "relationship", "severity": "warning", "description": "Bidirectional cross filtering can hurt performance and create ambiguous paths.",
+         "predicate": "crossFilteringBehavior == 'bothDirections'"},
+        {"id": "many_to_many_relationship", "object_type": "relationship", "severity": "info", "description": "Many to many relationship.",
+         "predicate": "fromCardinality == 'many' & toCardinality == 'many'"},
+        {"id": "missing_measure_format_string", "object_type": "measure", "severity": "info", "description": "Visible measure without format string.",
+         "predicate": "formatString == '' & ~isHidden"},
+        {"id": "floating_point_column", "object_type": "column", "severity": "info", "description": "Double data type can produce rounding errors, use decimal (fixed decimal number).",
+         "predicate": "dataType == 'double'"},
+        {"id": "high_cardinality_text_column", "object_type": "column", "severity": "warning", "description": "Text column with high cardinality, it compresses badly. Needs column_statistics with cardinality.",
+         "predicate": "dataType == 'string' & cardinality > @max_cardinality", "parameters": {"max_cardinality": 100000}}
+    ]
+
+def evaluate_model_rules(frames, rules=None):
+    """Evaluates best practice rules over the columnar tables of one or many models. Each rule runs once as a vectorised predicate over all the rows of its object type.
+    ### Parameters
+    ----
+    frames: dict
+        A dict of DataFrames by object type like get_model_rule_frames. Frames of many models can be concatenated.
+    rules: list
+        The rules to evaluate. By default get_default_model_rules.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with model, rule, severity, object_type, table, name and description by violation.
+    """
+    if rules is None:
+        rules = get_default_model_rules()
+    columns = ["model", "rule", "severity", "object_type", "table", "name", "description"]
+    violations = []
+    for rule in rules:
+        df = frames.get(rule["object_type"])
+        if df is None or df.empty:
+            continue
+        predicate = rule["predicate"]
+        try:
+            if callable(predicate):
+                mask = predicate(df)
+            else:
+                mask = df.eval(predicate, local_dict=rule.get("parameters") or {})
+        except Exception as e:
+            raise Exception("Rule {} could not be evaluated: {}".format(rule["id"], e))
+        matched = df.loc[pd.Series(mask, index=df.index).fillna(False).astype(bool), ["model", "table", "name"]]
+        if matched.empty:
+            continue
+        matched = matched.assign(rule=rule["id"], severity=rule.get("severity", "warning"), object_type=rule["object_type"], description=rule.get("description", ""))
+        violations.append(matched[columns])
+    if violations == []:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(violations, ignore_index=True).sort_values(["model", "severity", "rule", "table", "name"], kind="stable").reset_index(drop=True)
+
+def run_model_rules(models, rules=None, column_statistics=None, max_workers=None):
+    """Runs best practice rules over many semantic models. The models are parsed in a process pool, their tables are concatenated
+    and every rule is evaluated once for all of them. In scripts, call it under if __name__ == "__main__": because processes are started by importing the main module on Windows.
+    ### Parameters
+    ----
+    models: dict
+        The definitions by model name. Any form accepted by definition_to_model, e.g. the results of SemanticModels.get_semantic_model_definition.
+    rules: list
+        The rules to evaluate. By default get_default_model_rules.
+    column_statistics: DataFrame
+        Optional. A pandas DataFrame with model, table, name and cardinality of columns, e.g. from a COLUMNSTATISTICS() query. Without it, cardinality is empty and rules using it don't match.
+    max_workers: int
+        Maximum number of processes. By default the number of processors. Use 0 to parse in the current process.
+    ### Returns
+    ----
+    DataFrame:
+        A pandas DataFrame with model, rule, severity, object_type, table, name and description by violation.
+    """
+    names = list(models.keys())
+    definitions = [models[n] for n in names]
+    if max_workers == 0:
+        parsed = list(map(get_model_rule_frames, definitions, names))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            parsed = list(executor.map(get_model_rule_frames, definitions, names, chunksize=max(1, len(names) // (4 * (max_workers or os.cpu_count() or 1)))))
+    frames = {}
+    for object_type in ("table", "column", "measure", "relationship"):
+        object_frames = [p[object_type] for p in parsed if not p[object_type].empty]
+        frames[object_type] = pd.concat(object_frames, ignore_index=True) if object_frames else (parsed[0][object_type] if parsed else pd.DataFrame(columns=["model", "table", "name"]))
+    if column_statistics is not None:
+        frames["column"] = frames["column"].merge(column_statistics[["model", "table", "name", "cardinality"]], on=["model", "table", "name"], how="left")
+    else:
+        frames["column"]["cardinality"] = np.nan
+    return evaluate_model_rules(frames, rules)
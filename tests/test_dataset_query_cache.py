@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from simplepbi.datasets import DatasetQueryCache
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+@unittest.skipIf(pyarrow is None, "The query cache stores parquet files, it requires pyarrow")
+class TestDatasetQueryCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = DatasetQueryCache("token", self.folder)
+        self.query = "EVALUATE VALUES(Sales[Region])"
+        self.result = pd.DataFrame({"Region": ["North", "South"]})
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_hit_until_a_new_refresh(self):
+        with mock.patch.object(self.cache.datasets, "run_dax_query_in_group", return_value=self.result) as run, \
+                mock.patch.object(self.cache, "get_last_refresh_in_group", return_value="2024-01-01T00:00:00Z") as refresh:
+            first = self.cache.execute_queries_in_group("ws", "ds", self.query)
+            second = self.cache.execute_queries_in_group("ws", "ds", "  EVALUATE\nVALUES(Sales[Region])  ")
+            self.assertEqual(run.call_count, 1)
+            pd.testing.assert_frame_equal(first, second)
+            refresh.return_value = "2024-01-02T00:00:00Z"
+            self.cache.execute_queries_in_group("ws", "ds", self.query)
+            self.assertEqual(run.call_count, 2)
+        files = os.listdir(os.path.join(self.folder, "ds"))
+        self.assertEqual(len(files), 2)
+        self.assertFalse([f for f in files if f.endswith(".tmp")])
+
+    def test_clear(self):
+        with mock.patch.object(self.cache.datasets, "run_dax_query_in_group", return_value=self.result) as run, \
+                mock.patch.object(self.cache, "get_last_refresh_in_group", return_value="2024-01-01T00:00:00Z"):
+            self.cache.execute_queries_in_group("ws", "ds", self.query)
+            self.cache.clear("ds")
+            self.assertFalse(os.path.exists(os.path.join(self.folder, "ds")))
+            self.cache.execute_queries_in_group("ws", "ds", self.query)
+            self.assertEqual(run.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+import unittest
+
+from simplepbi import utils
+from simplepbi.utils import DaxDependencyGraph
+
+
+MODEL = {"model": {
+    "tables": [
+        {"name": "Sales", "columns": [
+            {"name": "Amount"},
+            {"name": "Quantity"},
+            {"name": "CustomerKey"},
+            {"name": "Unused"},
+            {"name": "Margin", "type": "calculated", "expression": "Sales[Amount] * 0.2"}
+        ], "measures": [
+            {"name": "Total Amount", "expression": "SUM ( Sales[Amount] ) // [Ignored]"},
+            {"name": "Total Margin", "expression": "SUM ( 'Sales'[Margin] )"},
+            {"name": "Margin %", "expression": "DIVIDE ( [Total Margin], [total amount] )"},
+            {"name": "Orphan", "expression": "COUNTROWS ( Sales ) + [Missing]"}
+        ]},
+        {"name": "Customer", "columns": [{"name": "CustomerKey"}, {"name": "Name", "sortByColumn": "CustomerKey"}]}
+    ],
+    "relationships": [{"fromTable": "Sales", "fromColumn": "CustomerKey", "toTable": "Customer", "toColumn": "CustomerKey"}],
+    "roles": [{"name": "EU", "tablePermissions": [{"name": "Customer", "filterExpression": "Customer[Name] <> \"[Not a column]\""}]}]
+}}
+
+
+class TestDaxReferences(unittest.TestCase):
+
+    def test_qualified_and_bare_references(self):
+        self.assertEqual(utils.dax_references("SUM('Sales Table'[Amount]) + Sales[Qty] + [Total]"), [("Sales Table", "Amount"), ("Sales", "Qty"), (None, "Total")])
+
+    def test_escaped_names(self):
+        self.assertEqual(utils.dax_references("'It''s'[A]]B] + [C]]]"), [("It's", "A]B"), (None, "C]")])
+
+    def test_strings_and_comments_are_skipped(self):
+        expression = '"[NotRef]" & "say ""[No]""" // [Line]\n-- [Dash]\n/* [Block\n] */ [Yes]'
+        self.assertEqual(utils.dax_references(expression), [(None, "Yes")])
+
+
+class TestDaxDependencyGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = utils.get_dax_dependency_graph(MODEL)
+
+    def test_dependencies(self):
+        # [total amount] resolves case insensitive like DAX does
+        self.assertEqual(set(self.graph.get_dependencies("[Margin %]", transitive=False)), {"[Total Margin]", "[Total Amount]"})
+        self.assertEqual(set(self.graph.get_dependencies("[Margin %]")), {"[Total Margin]", "[Total Amount]", "'Sales'[Margin]", "'Sales'[Amount]"})
+
+    def test_impact(self):
+        self.assertEqual(set(self.graph.get_impact("'Sales'[Amount]")), {"'Sales'[Margin]", "[Total Amount]", "[Total Margin]", "[Margin %]"})
+        self.assertEqual(set(self.graph.get_impact("'Sales'[Amount]", transitive=False)), {"'Sales'[Margin]", "[Total Amount]"})
+
+    def test_unused_objects(self):
+        self.assertEqual(sorted(self.graph.get_unused_measures()), ["[Margin %]", "[Orphan]"])
+        # Relationship and sort by columns are structural, the role filter references Customer[Name]
+        self.assertEqual(sorted(self.graph.get_unused_columns()), ["'Sales'[Quantity]", "'Sales'[Unused]"])
+
+    def test_unresolved_references(self):
+        self.assertEqual(self.graph.get_unresolved_references(), [("[Orphan]", "[Missing]")])
+        self.assertFalse(self.graph.to_pandas().set_index("target").loc["[Missing]", "resolved"])
+
+    def test_cycles_are_walked_once(self):
+        graph = DaxDependencyGraph(
+            [{"key": k, "type": "measure"} for k in ("[A]", "[B]", "[C]")],
+            [("[A]", "[B]"), ("[B]", "[C]"), ("[C]", "[A]")]
+        )
+        self.assertEqual(graph.get_dependencies("[A]"), ["[B]", "[C]"])
+        self.assertEqual(graph.get_impact("[A]"), ["[C]", "[B]"])
+        self.assertEqual(graph.get_unused_measures(), [])
+
+    def test_cache_round_trip(self):
+        folder = tempfile.mkdtemp()
+        try:
+            first = utils.get_dax_dependency_graph(MODEL, cache_dir=folder)
+            second = utils.get_dax_dependency_graph(MODEL, cache_dir=folder)
+        finally:
+            shutil.rmtree(folder)
+        self.assertEqual(first.to_dict(), second.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
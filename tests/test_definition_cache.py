@@ -0,0 +1,44 @@
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from simplepbi.fabric.core import DefinitionCache
+
+
+class TestDefinitionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = DefinitionCache("token", self.folder)
+        self.definition = {"definition": {"parts": [{"path": "report.json", "payload": "e30=", "payloadType": "InlineBase64"}]}}
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_missing_admin_permission_is_detected_once(self):
+        forbidden = mock.Mock(status_code=403)
+        with mock.patch("simplepbi.fabric.core.requests.get", return_value=forbidden) as get, \
+                mock.patch("simplepbi.fabric.core.Items.get_item_definition", return_value=self.definition) as definition, \
+                mock.patch("builtins.print") as printed:
+            self.cache.get_item_definition("ws", "report", "Report")
+            self.cache.get_item_definition("ws", "report", "Report")
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(definition.call_count, 2)
+        self.assertFalse(self.cache.admin_api)
+        self.assertIn("load_last_modified", printed.call_args_list[0][0][0])
+
+    def test_loaded_dates_serve_the_cache_without_admin_api(self):
+        self.cache.admin_api = False
+        self.cache.load_last_modified([{"id": "report", "lastUpdatedDate": "2024-01-01T00:00:00Z"}])
+        with mock.patch("simplepbi.fabric.core.requests.get") as get, \
+                mock.patch("simplepbi.fabric.core.Items.get_item_definition", return_value=self.definition) as definition:
+            first = self.cache.get_item_definition("ws", "report", "Report")
+            second = self.cache.get_item_definition("ws", "report", "Report")
+        get.assert_not_called()
+        self.assertEqual(definition.call_count, 1)
+        self.assertEqual(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import base64
+import copy
+import json
+import unittest
+from unittest import mock
+
+from simplepbi import utils
+from simplepbi.fabric.core import Items
+
+
+MODEL = {"model": {
+    "culture": "en-US",
+    "tables": [
+        {"name": "Sales", "lineageTag": "t-sales", "columns": [
+            {"name": "Amount", "lineageTag": "c-amount", "dataType": "decimal"},
+            {"name": "Quantity", "lineageTag": "c-quantity", "dataType": "int64"}
+        ], "measures": [
+            {"name": "Total", "lineageTag": "m-total", "expression": "SUM(Sales[Amount])"}
+        ]},
+        {"name": "Customer", "lineageTag": "t-customer", "columns": [{"name": "Name", "dataType": "string"}]}
+    ],
+    "relationships": [{"name": "r1", "fromTable": "Sales", "fromColumn": "CustomerKey", "toTable": "Customer", "toColumn": "CustomerKey"}]
+}}
+
+
+def encode(text):
+    return base64.b64encode(text.encode("utf-8")).decode("utf-8")
+
+
+class TestDiffSemanticModels(unittest.TestCase):
+
+    def setUp(self):
+        self.new = copy.deepcopy(MODEL)
+
+    def changes(self):
+        return utils.diff_semantic_models(MODEL, self.new).to_dict("records")
+
+    def test_equal_models(self):
+        self.assertTrue(utils.diff_semantic_models(MODEL, copy.deepcopy(MODEL)).empty)
+
+    def test_rename_matched_by_lineage_tag(self):
+        self.new["model"]["tables"][0]["measures"][0]["name"] = "Total Amount"
+        self.assertEqual(self.changes(), [{"change": "renamed", "object_type": "measure", "table": "Sales", "name": "Total", "new_name": "Total Amount", "properties": ["name"]}])
+
+    def test_rename_without_lineage_tag_is_removed_and_added(self):
+        self.new["model"]["tables"][1]["columns"][0]["name"] = "Customer Name"
+        self.assertEqual([(c["change"], c["object_type"], c["table"], c["name"]) for c in self.changes()], [
+            ("removed", "column", "Customer", "Name"), ("added", "column", "Customer", "Customer Name")
+        ])
+
+    def test_modified_properties(self):
+        self.new["model"]["tables"][0]["columns"][1]["dataType"] = "double"
+        self.new["model"]["culture"] = "es-ES"
+        self.assertEqual([(c["change"], c["object_type"], c["properties"]) for c in self.changes()], [
+            ("modified", "model", ["culture"]), ("modified", "column", ["dataType"])
+        ])
+
+    def test_unchanged_subtrees_are_skipped_by_hash(self):
+        self.new["model"]["tables"][0]["measures"][0]["expression"] = "SUM(Sales[Quantity])"
+        with mock.patch("simplepbi.utils.diff_model_collection", wraps=utils.diff_model_collection) as diff:
+            changes = self.changes()
+        self.assertEqual([(c["change"], c["name"], c["properties"]) for c in changes], [("modified", "Total", ["expression"])])
+        # Only the children of the changed table are compared, Customer is skipped by its hash
+        compared = [(c.args[2], c.args[3]) for c in diff.call_args_list]
+        self.assertIn(("measure", "Sales"), compared)
+        self.assertNotIn(("column", "Customer"), compared)
+
+    def test_relationship_matched_by_endpoints(self):
+        self.new["model"]["relationships"][0]["name"] = "r2"
+        self.new["model"]["relationships"][0]["isActive"] = False
+        self.assertEqual([(c["change"], c["object_type"], c["name"]) for c in self.changes()], [
+            ("modified", "relationship", "Sales[CustomerKey] -> Customer[CustomerKey]")
+        ])
+
+
+class TestItemsDefinitionChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.items = Items("token")
+
+    def test_semantic_model_parts_are_diffed_by_object(self):
+        current = {"definition": {"parts": [{"path": "model.bim", "payload": encode(json.dumps(MODEL)), "payloadType": "InlineBase64"}]}}
+        new = copy.deepcopy(MODEL)
+        new["model"]["tables"][0]["measures"][0]["formatString"] = "0.00"
+        parts = [{"Path": "model.bim", "Payload": encode(json.dumps(new, indent=2)), "PayloadType": "InlineBase64"}]
+        with mock.patch.object(self.items, "get_item_definition", return_value=current) as get:
+            changes = self.items.get_definition_changes("ws", "model", parts)
+        get.assert_called_once_with("ws", "model", "TMSL")
+        self.assertEqual(changes[["change", "object_type", "name"]].values.tolist(), [["modified", "measure", "Total"]])
+
+    def test_update_is_skipped_without_changes(self):
+        report = {"sections": [{"name": "Page1"}]}
+        current = {"definition": {"parts": [{"path": "report.json", "payload": encode(json.dumps(report)), "payloadType": "InlineBase64"}]}}
+        parts = [{"Path": "report.json", "Payload": encode(json.dumps(report, indent=4)), "PayloadType": "InlineBase64"}]
+        with mock.patch.object(self.items, "get_item_definition", return_value=current), \
+                mock.patch.object(self.items, "update_item_definition") as update:
+            result = self.items.update_item_definition_if_changed("ws", "report", parts)
+        self.assertTrue(result["changes"].empty)
+        self.assertIsNone(result["response"])
+        update.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
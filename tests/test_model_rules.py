@@ -0,0 +1,85 @@
+import unittest
+
+import pandas as pd
+
+from simplepbi import utils
+
+
+MODEL = {"model": {
+    "name": "Sales",
+    "tables": [
+        {"name": "Sales", "columns": [
+            {"name": "CustomerKey", "dataType": "int64"},
+            {"name": "Amount", "dataType": "decimal"},
+            {"name": "Price", "dataType": "double"},
+            {"name": "Comment", "dataType": "string"}
+        ], "measures": [
+            {"name": "Total", "expression": "SUM(Sales[Amount]) + SUM(Sales[Price]) + COUNTROWS(VALUES(Sales[Comment]))", "formatString": "0.00"},
+            {"name": "Unformatted", "expression": "[Total] * 2"},
+            {"name": "Hidden", "expression": "[Total]", "isHidden": True}
+        ]},
+        {"name": "Customer", "columns": [
+            {"name": "CustomerKey", "dataType": "int64"},
+            {"name": "Notes", "dataType": "string"}
+        ]},
+        {"name": "Tag", "columns": [{"name": "CustomerKey", "dataType": "int64"}]}
+    ],
+    "relationships": [
+        {"fromTable": "Sales", "fromColumn": "CustomerKey", "toTable": "Customer", "toColumn": "CustomerKey", "crossFilteringBehavior": "bothDirections"},
+        {"fromTable": "Tag", "fromColumn": "CustomerKey", "toTable": "Customer", "toColumn": "CustomerKey", "toCardinality": "many"}
+    ]
+}}
+
+STATISTICS = pd.DataFrame([
+    {"model": "Sales", "table": "Sales", "name": "Comment", "cardinality": 250000},
+    {"model": "Sales", "table": "Customer", "name": "Notes", "cardinality": 50}
+])
+
+
+class TestModelRules(unittest.TestCase):
+
+    def violations(self, df):
+        return sorted(df[["rule", "table", "name"]].itertuples(index=False, name=None))
+
+    def test_default_rules(self):
+        df = utils.run_model_rules({"Sales": MODEL}, column_statistics=STATISTICS, max_workers=0)
+        self.assertEqual(self.violations(df), [
+            ("bidirectional_relationship", "Sales", "'Sales'[CustomerKey] -> 'Customer'[CustomerKey]"),
+            ("floating_point_column", "Sales", "Price"),
+            ("high_cardinality_text_column", "Sales", "Comment"),
+            ("many_to_many_relationship", "Tag", "'Tag'[CustomerKey] -> 'Customer'[CustomerKey]"),
+            ("missing_measure_format_string", "Sales", "Unformatted"),
+            ("unused_column", "Customer", "Notes")
+        ])
+        self.assertEqual(set(df["model"]), {"Sales"})
+        self.assertEqual(df.loc[df["rule"] == "unused_column", "severity"].tolist(), ["warning"])
+
+    def test_cardinality_rule_needs_statistics(self):
+        df = utils.run_model_rules({"Sales": MODEL}, max_workers=0)
+        self.assertNotIn("high_cardinality_text_column", set(df["rule"]))
+
+    def test_process_pool_matches_current_process(self):
+        models = {"Sales": MODEL, "Copy": MODEL}
+        pooled = utils.run_model_rules(models, column_statistics=STATISTICS, max_workers=2)
+        local = utils.run_model_rules(models, column_statistics=STATISTICS, max_workers=0)
+        pd.testing.assert_frame_equal(pooled, local)
+        self.assertEqual(set(pooled["model"]), {"Sales", "Copy"})
+
+    def test_custom_rules(self):
+        frames = utils.get_model_rule_frames(MODEL)
+        rules = [
+            {"id": "wide_table", "object_type": "table", "severity": "info", "predicate": "columns >= @min_columns", "parameters": {"min_columns": 4}},
+            {"id": "nested_measure", "object_type": "measure", "predicate": lambda df: df["expression"].str.contains(r"\[Total\]")}
+        ]
+        df = utils.evaluate_model_rules(frames, rules)
+        self.assertEqual(self.violations(df), [("nested_measure", "Sales", "Hidden"), ("nested_measure", "Sales", "Unformatted"), ("wide_table", "Sales", "Sales")])
+        self.assertEqual(df.loc[df["rule"] == "nested_measure", "severity"].unique().tolist(), ["warning"])
+
+    def test_invalid_rule_names_the_rule(self):
+        frames = utils.get_model_rule_frames(MODEL)
+        with self.assertRaisesRegex(Exception, "broken"):
+            utils.evaluate_model_rules(frames, [{"id": "broken", "object_type": "column", "predicate": "missing_field > 1"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+from simplepbi import utils
+from simplepbi.fabric import core
+
+
+class FakeResponse():
+
+    def __init__(self, status_code=200, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.content = b"{}" if body is not None else b""
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+class TestLongRunningOperationsPoller(unittest.TestCase):
+
+    def setUp(self):
+        self.poller = core.LongRunningOperationsPoller(poll_interval=0.01, timeout=5)
+
+    def test_result_url_from_location_without_operation_id(self):
+        urls = []
+
+        def get(url, headers=None):
+            urls.append(url)
+            if url.endswith("/result"):
+                return FakeResponse(body={"definition": {}})
+            return FakeResponse(body={"status": "Succeeded"})
+        started = FakeResponse(202, headers={"Location": "https://api.fabric.microsoft.com/v1/operations/abc", "Retry-After": "0"})
+        with mock.patch.object(core.requests, "get", side_effect=get), mock.patch.object(utils.requests, "request", side_effect=lambda method, url, **kwargs: get(url)):
+            self.assertEqual(self.poller.wait(started, "token"), {"definition": {}})
+        self.assertEqual(urls, ["https://api.fabric.microsoft.com/v1/operations/abc", "https://api.fabric.microsoft.com/v1/operations/abc/result"])
+
+    def test_not_started_is_pending(self):
+        states = iter(["NotStarted", "Running", "Succeeded"])
+        started = FakeResponse(202, headers={"x-ms-operation-id": "abc", "Retry-After": "0"})
+        with mock.patch.object(core.requests, "get", side_effect=lambda url, headers=None: FakeResponse(body={"status": next(states)})):
+            self.assertEqual(self.poller.wait(started, "token", result=False), {"status": "Succeeded"})
+
+    def test_unexpected_error_fails_the_future(self):
+        started = FakeResponse(202, headers={"x-ms-operation-id": "abc", "Retry-After": "0"})
+        with mock.patch.object(core.requests, "get", side_effect=KeyError("status")):
+            with self.assertRaises(KeyError):
+                self.poller.wait(started, "token", timeout=2)
+        # The thread survives and keeps resolving other operations
+        with mock.patch.object(core.requests, "get", side_effect=lambda url, headers=None: FakeResponse(body={"status": "Succeeded"})):
+            self.assertEqual(self.poller.wait(started, "token", result=False), {"status": "Succeeded"})
+
+    def test_wait_timeout(self):
+        started = FakeResponse(202, headers={"x-ms-operation-id": "abc", "Retry-After": "0"})
+        with mock.patch.object(core.requests, "get", side_effect=lambda url, headers=None: FakeResponse(body={"status": "Running"})):
+            with self.assertRaises(Exception):
+                self.poller.wait(started, "token", timeout=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
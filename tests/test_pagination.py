@@ -0,0 +1,65 @@
+import unittest
+from unittest import mock
+
+from simplepbi import utils
+from simplepbi.fabric import core, adminfab
+
+
+class FakeResponse():
+
+    def __init__(self, body):
+        self.body = body
+        self.status_code = 200
+        self.headers = {}
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+def paged(key):
+    """Returns a fake requests.request serving three pages of key, following continuationUri on the second page and continuationToken on the third."""
+    def request(method, url, **kwargs):
+        if "continuationToken=t2" in url:
+            return FakeResponse({key: [{"id": "3"}], "continuationToken": None})
+        if url == "https://next/page2":
+            return FakeResponse({key: [{"id": "2"}], "continuationToken": "t2"})
+        return FakeResponse({key: [{"id": "1"}], "continuationToken": "t1", "continuationUri": "https://next/page2"})
+    return request
+
+
+class TestPagination(unittest.TestCase):
+
+    def assert_all_pages(self, key, call):
+        with mock.patch.object(utils.requests, "request", side_effect=paged(key)) as request:
+            data = call()
+        self.assertEqual([i["id"] for i in data[key]], ["1", "2", "3"])
+        self.assertNotIn("continuationToken", data)
+        self.assertEqual(request.call_count, 3)
+
+    def test_get_all_pages(self):
+        self.assert_all_pages("value", lambda: utils.get_all_pages("https://api/items?type=Report", {}))
+
+    def test_core_list_items(self):
+        self.assert_all_pages("value", lambda: core.Items("token").list_items("ws", type="Report"))
+
+    def test_core_list_workspaces(self):
+        self.assert_all_pages("value", lambda: core.Workspaces("token").list_workspaces())
+
+    def test_core_list_folders(self):
+        self.assert_all_pages("value", lambda: core.Folders("token").list_folders("ws"))
+
+    def test_core_list_connections(self):
+        self.assert_all_pages("value", lambda: core.Connections("token").list_connections())
+
+    def test_admin_list_items(self):
+        self.assert_all_pages("itemEntities", lambda: adminfab.Items("token").list_items(type="Report"))
+
+    def test_admin_list_workspaces(self):
+        self.assert_all_pages("workspaces", lambda: adminfab.Workspaces("token").list_workspaces())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from unittest import mock
+
+from simplepbi.datasets import RefreshDag
+
+
+class TestRefreshDagState(unittest.TestCase):
+
+    def setUp(self):
+        self.dag = RefreshDag("token")
+        self.node = {"type": "dataset", "workspaceId": "ws", "id": "ds", "name": "Sales", "upstream": []}
+
+    def test_refresh_not_listed_is_in_progress(self):
+        history = {"value": [{"requestId": "previous", "status": "Completed"}]}
+        with mock.patch.object(self.dag.datasets, "get_refresh_history_in_group", return_value=history):
+            self.assertEqual(self.dag.get_refresh_state(self.node, "new", 0), ("InProgress", None))
+
+    def test_refresh_matched_by_request_id(self):
+        history = {"value": [{"requestId": "new", "status": "Failed", "serviceExceptionJson": "boom"}, {"requestId": "previous", "status": "Completed"}]}
+        with mock.patch.object(self.dag.datasets, "get_refresh_history_in_group", return_value=history):
+            self.assertEqual(self.dag.get_refresh_state(self.node, "new", 0), ("Failed", "boom"))
+
+    def test_unavailable_history_fails_after_max_errors(self):
+        self.dag = RefreshDag("token", min_poll_interval=0, max_poll_interval=0, max_errors=3)
+        with mock.patch.object(self.dag, "start_refresh", return_value="new"), \
+                mock.patch.object(self.dag.datasets, "get_refresh_history_in_group", return_value=None) as history:
+            df = self.dag.run(nodes={"dataset:ds": self.node})
+        self.assertEqual(history.call_count, 3)
+        self.assertEqual(df["status"].tolist(), ["Failed"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest import mock
+
+import requests
+
+from simplepbi.datasets import IncrementalRefreshPlanner, RefreshOrchestrator
+
+
+class TestRefreshOrchestrator(unittest.TestCase):
+
+    def setUp(self):
+        self.orchestrator = RefreshOrchestrator("token", max_refreshes_per_capacity=1, min_poll_interval=0, max_poll_interval=0, max_errors=3)
+        self.capacities = {"ws": "capacity"}
+
+    def test_transient_poll_error_keeps_the_slot(self):
+        completed = {"status": "Completed", "startTime": "2024-01-01T00:00:00Z", "endTime": "2024-01-01T00:01:00Z"}
+        states = [requests.exceptions.ConnectionError("reset"), (completed, None), (completed, None)]
+        started = []
+
+        def start_refresh(workspace_id, dataset_id, body):
+            started.append(dataset_id)
+            # The second refresh must wait until the first one is seen completed, not just failed to poll
+            if dataset_id == "ds2":
+                self.assertEqual(state.call_count, 2)
+            return "refresh-" + dataset_id
+
+        with mock.patch.object(self.orchestrator, "start_refresh", side_effect=start_refresh), \
+                mock.patch.object(self.orchestrator, "get_refresh_state", side_effect=states) as state:
+            df = self.orchestrator.run([("ws", "ds1"), ("ws", "ds2")], workspaces_capacity=self.capacities)
+        self.assertEqual(started, ["ds1", "ds2"])
+        self.assertEqual(df["status"].tolist(), ["Completed", "Completed"])
+        self.assertEqual(df["duration"].tolist(), [60.0, 60.0])
+
+    def test_poll_errors_fail_after_max_errors(self):
+        with mock.patch.object(self.orchestrator, "start_refresh", return_value="refresh"), \
+                mock.patch.object(self.orchestrator, "get_refresh_state", side_effect=requests.exceptions.HTTPError("503")) as state:
+            df = self.orchestrator.run([("ws", "ds1")], workspaces_capacity=self.capacities)
+        self.assertEqual(state.call_count, 3)
+        self.assertEqual(df["status"].tolist(), ["Failed"])
+        self.assertIn("3 times", df["error"][0])
+
+    def test_refresh_in_progress_times_out(self):
+        self.orchestrator.timeout = 0
+        with mock.patch.object(self.orchestrator, "start_refresh", return_value="refresh"), \
+                mock.patch.object(self.orchestrator, "get_refresh_state", return_value=({"status": "Unknown"}, None)):
+            df = self.orchestrator.run([("ws", "ds1")], workspaces_capacity=self.capacities)
+        self.assertEqual(df["status"].tolist(), ["Failed"])
+        self.assertIn("didn't finish", df["error"][0])
+
+
+class TestIncrementalRefreshPlannerBatches(unittest.TestCase):
+
+    def test_failed_batch_is_recorded_instead_of_raised(self):
+        planner = IncrementalRefreshPlanner("token")
+        plan = {"objects": [{"table": "Sales", "partition": "2023"}, {"table": "Sales", "partition": "2024"}]}
+        with mock.patch.object(planner, "plan", return_value=plan), \
+                mock.patch.object(RefreshOrchestrator, "start_refresh", return_value="refresh"), \
+                mock.patch.object(RefreshOrchestrator, "get_refresh_state", side_effect=requests.exceptions.ConnectionError("reset")) as state:
+            result = planner.refresh("ws", "ds", {"*": 24}, batch_size=1, poll_interval=0, max_errors=2)
+        self.assertEqual(state.call_count, 2)
+        self.assertEqual(len(result["batches"]), 1)
+        self.assertEqual(result["batches"][0]["status"], "Failed")
+        self.assertIn("reset", result["batches"][0]["error"])
+
+
+if __name__ == "__main__":
+    unittest.main()
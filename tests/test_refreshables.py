@@ -0,0 +1,82 @@
+import unittest
+
+from simplepbi import utils
+
+
+def refreshable(id, capacity, days, times, average, count=10, failures=0, status="Completed", enabled=True):
+    return {
+        "id": id, "name": "Dataset " + id, "kind": "Dataset",
+        "capacity": {"id": capacity, "displayName": "Capacity " + capacity, "sku": "P1"},
+        "group": {"id": "ws", "name": "Workspace"},
+        "refreshCount": count, "refreshFailures": failures, "averageDuration": average, "medianDuration": average, "refreshesPerDay": 1,
+        "lastRefresh": {"refreshType": "Scheduled", "status": status, "startTime": "2024-01-01T00:00:00Z", "endTime": "2024-01-01T00:10:00Z"},
+        "refreshSchedule": {"enabled": enabled, "days": days, "times": times, "localTimeZoneId": "UTC"}
+    }
+
+
+REFRESHABLES = {"value": [
+    # One hour from Sunday 23:30 wraps to the start of the week
+    refreshable("r1", "A", ["Sunday"], ["23:30"], 3600),
+    refreshable("r2", "A", ["Monday"], ["00:00"], 1800, count=30, failures=3, status="Failed"),
+    # Crosses midnight between Monday and Tuesday
+    refreshable("r3", "A", ["Monday"], ["23:45"], 1800),
+    # Without history it takes a single slot
+    refreshable("r4", "B", ["Tuesday", "Wednesday"], ["08:10"], None, count=0),
+    refreshable("r5", "B", ["Tuesday"], ["08:00"], 600, enabled=False)
+]}
+
+
+class TestRefreshablesTimeSlots(unittest.TestCase):
+
+    def setUp(self):
+        self.df = utils.refreshables_to_pandas(REFRESHABLES)
+        self.slots = utils.get_refreshables_time_slots(self.df)
+
+    def get_slots(self, capacity):
+        rows = self.slots[self.slots["capacityId"] == capacity]
+        return [(str(r.weekday), r.slotStart, r.concurrentRefreshes, r.refreshables) for r in rows.itertuples()]
+
+    def test_slots_wrap_the_week_and_midnight(self):
+        self.assertEqual(self.get_slots("A"), [
+            ("Monday", "00:00", 2, ["Dataset r1", "Dataset r2"]),
+            ("Monday", "23:30", 1, ["Dataset r3"]),
+            ("Tuesday", "00:00", 1, ["Dataset r3"]),
+            ("Sunday", "23:30", 1, ["Dataset r1"])
+        ])
+
+    def test_disabled_schedules_and_refreshables_without_history(self):
+        self.assertEqual(self.get_slots("B"), [
+            ("Tuesday", "08:00", 1, ["Dataset r4"]),
+            ("Wednesday", "08:00", 1, ["Dataset r4"])
+        ])
+
+    def test_slot_size(self):
+        slots = utils.get_refreshables_time_slots(self.df, slot_minutes=60)
+        a = slots[slots["capacityId"] == "A"]
+        self.assertEqual(a["slotStart"].tolist(), ["00:00", "23:00", "00:00", "23:00"])
+        self.assertEqual(a["concurrentRefreshes"].tolist(), [2, 1, 1, 1])
+
+
+class TestRefreshablesCapacityStats(unittest.TestCase):
+
+    def test_stats_by_capacity(self):
+        df = utils.refreshables_to_pandas(REFRESHABLES)
+        stats = utils.get_refreshables_capacity_stats(df, utils.get_refreshables_time_slots(df)).set_index("capacityId")
+        a = stats.loc["A"]
+        self.assertEqual(a["refreshables"], 3)
+        self.assertEqual(a["refreshCount"], 50)
+        self.assertEqual(a["refreshFailures"], 3)
+        self.assertEqual(a["lastRefreshFailures"], 1)
+        # Weighted by refreshes: (3600 * 10 + 1800 * 30 + 1800 * 10) / 50
+        self.assertAlmostEqual(a["averageDuration"], 2160)
+        self.assertAlmostEqual(a["failureRate"], 0.06)
+        self.assertEqual(a["maxAverageDuration"], 3600)
+        self.assertEqual((a["peakConcurrency"], a["overlappingSlots"]), (2, 1))
+        b = stats.loc["B"]
+        self.assertEqual(b["refreshables"], 2)
+        self.assertEqual((b["peakConcurrency"], b["overlappingSlots"]), (1, 0))
+        self.assertEqual(stats.index.tolist()[0], "A")
+
+
+if __name__ == "__main__":
+    unittest.main()
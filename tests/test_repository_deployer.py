@@ -0,0 +1,60 @@
+import base64
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from simplepbi.fabric.core import RepositoryDeployer
+
+
+def encode(content):
+    return base64.b64encode(json.dumps(content, indent=None).encode("utf-8")).decode("utf-8")
+
+
+class TestRepositoryDeployerChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.report_path = os.path.join(self.folder, "Sales.Report")
+        os.makedirs(self.report_path)
+        self.pbir = {"version": "4.0", "datasetReference": {"byPath": {"path": "../Sales.SemanticModel"}}}
+        self.report = {"config": "{}", "sections": [{"name": "Page1", "visualContainers": []}]}
+        with open(os.path.join(self.report_path, "definition.pbir"), "w", encoding="utf-8") as f:
+            json.dump(self.pbir, f, indent=2)
+        with open(os.path.join(self.report_path, "report.json"), "w", encoding="utf-8") as f:
+            json.dump(self.report, f, indent=2)
+        self.item = {"name": "Sales", "type": "Report", "path": self.report_path, "model": "Sales"}
+        self.deployer = RepositoryDeployer("token", "ws")
+        self.deployer.item_ids = {"ws": {"Report": {"Sales": "report-id"}, "SemanticModel": {"Sales": "model-id"}}}
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def get_remote(self, report):
+        # The service returns compact json and its own byConnection reference
+        pbir = {"version": "4.0", "datasetReference": {"byConnection": {"connectionString": "semanticmodelid=model-id"}}}
+        return {"definition": {"parts": [
+            {"path": "definition.pbir", "payload": encode(pbir), "payloadType": "InlineBase64"},
+            {"path": "report.json", "payload": encode(report), "payloadType": "InlineBase64"},
+            {"path": ".platform", "payload": encode({"metadata": {}}), "payloadType": "InlineBase64"}
+        ]}}
+
+    def test_just_deployed_report_has_no_changes(self):
+        with mock.patch.object(self.deployer.items, "get_item_definition", return_value=self.get_remote(self.report)), \
+                mock.patch.object(self.deployer.items, "update_item_definition") as update:
+            result = self.deployer.deploy_item(self.item, incremental=True)
+        self.assertEqual(result["action"], "unchanged")
+        self.assertEqual(result["changed"], [])
+        update.assert_not_called()
+
+    def test_modified_report_part_is_reported(self):
+        remote = dict(self.report, sections=[{"name": "Page2", "visualContainers": []}])
+        with mock.patch.object(self.deployer.items, "get_item_definition", return_value=self.get_remote(remote)):
+            changed = self.deployer.get_changed_parts(self.item, "report-id", {}, self.deployer.items.build_report_parts("ws", self.report_path, {"Sales": "model-id"}))
+        self.assertEqual(changed, ["report.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+
+from simplepbi import utils
+
+
+TABLE = """/// Sales facts
+table 'Sales ''EU'''
+	lineageTag: sales
+
+	measure 'Total Amount' =
+			VAR total = SUM('Sales ''EU'''[Amount])
+			RETURN total
+		formatString: 0.00
+
+	measure Fenced = ```
+			SUMX(
+		Sales,
+			Sales[Amount]
+			)
+			```
+		displayFolder: KPIs
+
+	column Amount
+		dataType: decimal
+		summarizeBy: sum
+
+		annotation SummarizationSetBy = Automatic
+
+	column 'Unit Price' = Sales[Amount] / 2
+		dataType: double
+
+	partition 'Sales-2024' = m
+		mode: import
+		source =
+				let
+				    Source = Sql.Database("server", "database")
+				in
+				    Source
+
+	refreshPolicy
+		policyType: basic
+"""
+
+RELATIONSHIPS = """relationship 5d1b-4e
+	fromColumn: 'Sales ''EU'''.CustomerKey
+	toColumn: Customer.CustomerKey
+
+relationship 9a2c-11
+	isActive: false
+	crossFilteringBehavior: bothDirections
+	fromColumn: Sales.'Order Date'
+	toColumn: 'Date'.Date
+"""
+
+
+class TestTmdlParser(unittest.TestCase):
+
+    def setUp(self):
+        self.model = utils.parse_tmdl([TABLE, RELATIONSHIPS])["model"]
+        self.table = self.model["tables"][0]
+
+    def test_quoted_and_escaped_names(self):
+        self.assertEqual(self.table["name"], "Sales 'EU'")
+        self.assertEqual(self.table["description"], "Sales facts")
+        self.assertEqual(utils.split_tmdl_name("'My ''Table''' = x"), ("My 'Table'", "= x"))
+        self.assertEqual(utils.split_tmdl_name("Plain = 1"), ("Plain", "= 1"))
+
+    def test_multi_line_expression(self):
+        measure = self.table["measures"][0]
+        self.assertEqual(measure["name"], "Total Amount")
+        self.assertEqual(measure["expression"], "VAR total = SUM('Sales ''EU'''[Amount])\nRETURN total")
+        self.assertEqual(measure["formatString"], "0.00")
+
+    def test_fenced_expression(self):
+        measure = self.table["measures"][1]
+        self.assertEqual(measure["expression"], "\tSUMX(\nSales,\n\tSales[Amount]\n\t)")
+        self.assertEqual(measure["displayFolder"], "KPIs")
+
+    def test_columns(self):
+        amount, price = self.table["columns"]
+        self.assertEqual(amount["dataType"], "decimal")
+        self.assertEqual(amount["annotations"], [{"name": "SummarizationSetBy", "value": "Automatic"}])
+        self.assertEqual(price["type"], "calculated")
+        self.assertEqual(price["expression"], "Sales[Amount] / 2")
+
+    def test_partitions(self):
+        partition = self.table["partitions"][0]
+        self.assertEqual(partition["name"], "Sales-2024")
+        self.assertEqual(partition["mode"], "import")
+        self.assertEqual(partition["source"]["type"], "m")
+        self.assertTrue(partition["source"]["expression"].startswith("let\n    Source = Sql.Database"))
+        self.assertEqual(self.table["refreshPolicy"], {"policyType": "basic"})
+        df = utils.parse_tmdl_partitions(TABLE)
+        self.assertEqual(df.to_dict("records"), [{"table": "Sales 'EU'", "partition": "Sales-2024", "source_type": "m", "mode": "import", "has_refresh_policy": True}])
+
+    def test_relationships(self):
+        first, second = self.model["relationships"]
+        self.assertEqual((first["fromTable"], first["fromColumn"], first["toTable"], first["toColumn"]), ("Sales 'EU'", "CustomerKey", "Customer", "CustomerKey"))
+        self.assertEqual((second["fromTable"], second["fromColumn"], second["toTable"], second["toColumn"]), ("Sales", "Order Date", "Date", "Date"))
+        self.assertIs(second["isActive"], False)
+        self.assertEqual(second["crossFilteringBehavior"], "bothDirections")
+
+    def test_structure_skips_other_objects(self):
+        df = utils.parse_tmdl_structure(TABLE)
+        self.assertEqual(df[["name", "type"]].values.tolist(), [["Total Amount", "measure"], ["Fenced", "measure"], ["Amount", "column"], ["Unit Price", "column"]])
+        self.assertEqual(df["data_type"][df["type"] == "column"].tolist(), ["decimal", "double"])
+
+    def test_skipped_objects_are_left_out(self):
+        table = utils.parse_tmdl_tree(TABLE, {"measure", "annotation"})[0]
+        self.assertEqual([c["objectType"] for c in table["children"]], ["column", "column", "partition", "refreshPolicy"])
+        self.assertEqual(table["children"][0]["properties"], {"dataType": "decimal", "summarizeBy": "sum"})
+
+
+if __name__ == "__main__":
+    unittest.main()